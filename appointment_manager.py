@@ -1,13 +1,96 @@
-from typing import List, Dict, Any, Optional
-from config import DOCTORS
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from config import DOCTORS, SLOT_MINUTES, AVAILABILITY_HORIZON_DAYS
+from booking_store import BookingJournal, gc_paused
+from availability import AvailabilityIndex, WEEKDAYS, slot_grid, slot_index, parse_date
+from shared_slots import SharedSlotMap
 import datetime
 import logging
+import re
+import threading
 
 logging.basicConfig(level=logging.INFO)
 
+TIME_FORMATS = ["%H:%M", "%I:%M %p", "%I %p", "%I:%M%p", "%I%p"]
+
+def normalize_time(time_input: Optional[str]) -> Optional[str]:
+    """Normalize spoken/typed times ("14:00", "2:30 PM", "2 p.m.", "2pm") to HH:MM"""
+    if not time_input:
+        return None
+    value = re.sub(r"(\d)\.(\d)", r"\1:\2", time_input.strip())
+    value = value.upper().replace(".", "")
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).strftime("%H:%M")
+        except ValueError:
+            continue
+    return None
+
 class AppointmentManager:
-    def __init__(self):
-        self.appointments = []  # In-memory list
+    def __init__(self, store: Optional[BookingJournal] = None, shared: Optional[SharedSlotMap] = None,
+                 worker_id: Optional[int] = None):
+        # Booked slots indexed by (doctor_id, day) -> {time_slot: appointment}; day is an ISO date
+        self._booked: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        # Serializes writes so concurrent sessions can't double-book a slot
+        self._lock = threading.RLock()
+        self.store = store
+        # Slot bitmap shared with other scheduler processes; it decides who gets a slot.
+        # Each process then needs its own journal directory (booking_store.worker_directory) and
+        # a worker_id that stays the same across restarts, which tags its claims in the map
+        self.shared = shared
+        self.worker_id = worker_id
+        # Free-slot bitmaps over the upcoming horizon for fast earliest/nearest queries. They hold
+        # this process's bookings; other processes' are read from the shared map at query time
+        self.availability = AvailabilityIndex(self._booked_times, AVAILABILITY_HORIZON_DAYS,
+                                              booked_elsewhere=shared.booked_mask if shared else None)
+        # Replayed bookings whose slot another process already holds in the shared map
+        self.replay_conflicts: List[Dict[str, Any]] = []
+        if store:
+            for appointment in store.load():
+                doctor_id, day, time_slot = appointment["doctor_id"], appointment["day"], appointment["time_slot"]
+                self._booked.setdefault(self._key(doctor_id, day), {})[time_slot] = appointment
+                # After a restart against a live map, this worker's own slots are still claimed
+                if shared and not self._claim_shared(doctor_id, day, time_slot) and \
+                        (worker_id is None or shared.holder(doctor_id, day, time_slot) != worker_id):
+                    self.replay_conflicts.append(appointment)
+            if self.replay_conflicts:
+                # Both patients hold a confirmed booking, so neither is dropped; staff have to rebook one
+                logging.error(f"{len(self.replay_conflicts)} replayed bookings are double-booked with another "
+                              f"process: {self.replay_conflicts[:10]}")
+
+    @property
+    def appointments(self) -> List[Dict[str, Any]]:
+        """All booked appointments as a flat list"""
+        with self._lock:
+            return [appt for day_slots in self._booked.values() for appt in day_slots.values()]
+
+    def _key(self, doctor_id: str, day: str) -> Tuple[str, str]:
+        return doctor_id, day.lower()
+
+    def _booked_times(self, doctor_id: str, day: str) -> List[str]:
+        return list(self._booked.get(self._key(doctor_id, day), {}))
+
+    def _claim_shared(self, doctor_id: str, day: str, time_slot: str) -> bool:
+        """Claim a slot in the shared map; False if another process holds it (always True when not shared)"""
+        if not self.shared or not self.shared.covers(doctor_id, day, time_slot):
+            return True
+        return self.shared.claim(doctor_id, day, time_slot, self.worker_id)
+
+    def _release_shared(self, doctor_id: str, day: str, time_slot: str) -> None:
+        if self.shared and self.shared.covers(doctor_id, day, time_slot):
+            self.shared.release(doctor_id, day, time_slot)
+
+    def _update_availability(self, doctor_id: str, day: str, time_slot: str, free: bool) -> None:
+        date = parse_date(day)
+        if date is not None and doctor_id in DOCTORS:
+            index = slot_index(doctor_id, time_slot)
+            if index is not None:
+                self.availability.set_slot(doctor_id, date, index, free)
+
+    @staticmethod
+    def weekday_of(day: str) -> str:
+        """Weekday name for an ISO date, or the day itself for weekday-keyed bookings"""
+        date = parse_date(day)
+        return WEEKDAYS[date.weekday()] if date else day.lower()
 
     def generate_time_slots(self, doctor_id: str, day: str) -> List[str]:
         """Generate available time slots for a doctor on a specific day"""
@@ -15,44 +98,264 @@ class AppointmentManager:
             logging.error(f"Doctor ID '{doctor_id}' not found.")
             return []
         doctor = DOCTORS[doctor_id]
-        if day.lower() not in doctor["days"]:
+        if self.weekday_of(day) not in doctor["days"]:
             logging.error(f"Day '{day}' not available for doctor '{doctor_id}'.")
             return []
-        slots = []
-        start_hour, end_hour = doctor["hours"]
-        start_time = datetime.datetime(2025, 1, 1, start_hour, 0)
-        end_time = datetime.datetime(2025, 1, 1, end_hour, 0)
-        current_time = start_time
-        while current_time < end_time:
-            slot = current_time.strftime("%H:%M")
-            if not self.is_slot_booked(doctor_id, day, slot):
-                slots.append(slot)
-            current_time += datetime.timedelta(minutes=20)
-        return slots
+        with self._lock:
+            booked = self._booked.get(self._key(doctor_id, day), {})
+            remote = self.shared.booked_mask(doctor_id, day) if self.shared else 0
+            return [slot for i, slot in enumerate(slot_grid(doctor_id)) if slot not in booked and not remote >> i & 1]
 
     def is_slot_booked(self, doctor_id: str, day: str, time_slot: str) -> bool:
-        """Check if a specific slot is already booked"""
-        for appointment in self.appointments:
-            if (appointment["doctor_id"] == doctor_id and
-                appointment["day"] == day and
-                appointment["time_slot"] == time_slot):
-                return True
-        return False
+        """Check if a specific slot is already booked (by any process when the slot map is shared)"""
+        if time_slot in self._booked.get(self._key(doctor_id, day), {}):
+            return True
+        return bool(self.shared) and self.shared.is_booked(doctor_id, day, time_slot)
+
+    def get_appointment(self, doctor_id: str, day: str, time_slot: str) -> Optional[Dict[str, Any]]:
+        """Look up the appointment occupying a slot, if any"""
+        return self._booked.get(self._key(doctor_id, day), {}).get(time_slot)
 
     def book_appointment(self, patient_name: str, doctor_id: str, day: str, time_slot: str) -> bool:
-        """Book an appointment"""
-        if self.is_slot_booked(doctor_id, day, time_slot):
-            logging.warning(f"Slot {time_slot} on {day} for doctor {doctor_id} is already booked.")
-            return False
-        self.appointments.append({
-            "patient_name": patient_name,
-            "doctor_id": doctor_id,
-            "day": day,
-            "time_slot": time_slot
-        })
+        """Book an appointment (atomic check-and-claim)"""
+        with self._lock:
+            day_slots = self._booked.setdefault(self._key(doctor_id, day), {})
+            if time_slot in day_slots:
+                logging.warning(f"Slot {time_slot} on {day} for doctor {doctor_id} is already booked.")
+                return False
+            if not self._claim_shared(doctor_id, day, time_slot):
+                logging.warning(f"Slot {time_slot} on {day} for doctor {doctor_id} was booked by another process.")
+                return False
+            appointment = {
+                "patient_name": patient_name,
+                "doctor_id": doctor_id,
+                "day": day,
+                "time_slot": time_slot
+            }
+            day_slots[time_slot] = appointment
+            self._update_availability(doctor_id, day, time_slot, free=False)
+            if self.store:
+                self.store.record_booking(appointment)
+                self._maybe_snapshot()
         logging.info(f"Booked appointment for {patient_name} with {doctor_id} on {day} at {time_slot}.")
         return True
 
+    def cancel_appointment(self, doctor_id: str, day: str, time_slot: str) -> bool:
+        """Cancel the appointment in a slot"""
+        with self._lock:
+            key = self._key(doctor_id, day)
+            day_slots = self._booked.get(key)
+            if not day_slots or time_slot not in day_slots:
+                logging.warning(f"No appointment at {time_slot} on {day} for doctor {doctor_id} to cancel.")
+                return False
+            appointment = day_slots.pop(time_slot)
+            if not day_slots:
+                del self._booked[key]
+            self._release_shared(doctor_id, day, time_slot)
+            self._update_availability(doctor_id, day, time_slot, free=True)
+            if self.store:
+                self.store.record_cancellation(doctor_id, appointment["day"], time_slot)
+                self._maybe_snapshot()
+        logging.info(f"Cancelled appointment for {appointment['patient_name']} with {doctor_id} on {day} at {time_slot}.")
+        return True
+
+    def book_many(self, appointments: Iterable[Dict[str, Any]], atomic: bool = True) -> Dict[str, Any]:
+        """Book many appointments under one lock with a single journal write.
+
+        Rows that cannot be booked (unknown doctor, day not an ISO date or
+        not one of the doctor's working days, time off the slot grid, slot
+        already taken, slot repeated within the batch) are returned as conflicts. With atomic=True
+        any conflict rejects the whole batch; otherwise the other rows are booked.
+        """
+        booked = []
+        keys = []
+        conflicts = []
+        with self._lock, gc_paused():
+            claimed = set()
+            for row in appointments:
+                doctor_id, day, time_slot = row["doctor_id"], row["day"], row["time_slot"]
+                key = self._key(doctor_id, day)
+                date = parse_date(day)
+                if doctor_id not in DOCTORS:
+                    reason = "unknown doctor"
+                elif date is None:
+                    reason = "invalid date"
+                elif WEEKDAYS[date.weekday()] not in DOCTORS[doctor_id]["days"]:
+                    reason = "doctor not working that day"
+                elif slot_index(doctor_id, time_slot) is None:
+                    reason = "not a slot time"
+                elif time_slot in self._booked.get(key, ()) or (self.shared and self.shared.is_booked(doctor_id, day, time_slot)):
+                    reason = "already booked"
+                elif (key, time_slot) in claimed:
+                    reason = "duplicate in batch"
+                else:
+                    claimed.add((key, time_slot))
+                    keys.append(key)
+                    booked.append({
+                        "patient_name": row["patient_name"],
+                        "doctor_id": doctor_id,
+                        "day": day,
+                        "time_slot": time_slot
+                    })
+                    continue
+                conflicts.append({"appointment": row, "reason": reason})
+            if conflicts and atomic:
+                logging.warning(f"Batch of {len(booked) + len(conflicts)} rejected: {len(conflicts)} conflicts.")
+                return {"booked": 0, "conflicts": conflicts}
+            if self.shared:
+                keys, booked = self._claim_batch(keys, booked, conflicts, atomic)
+                if conflicts and atomic:
+                    return {"booked": 0, "conflicts": conflicts}
+            for key, appointment in zip(keys, booked):
+                self._booked.setdefault(key, {})[appointment["time_slot"]] = appointment
+                if self.availability.tracks(key[0]):
+                    self._update_availability(key[0], appointment["day"], appointment["time_slot"], free=False)
+            self._record_batch(booked, [])
+        logging.info(f"Batch booked {len(booked)} appointments ({len(conflicts)} conflicts).")
+        return {"booked": len(booked), "conflicts": conflicts}
+
+    def _claim_batch(self, keys: List[Tuple[str, str]], booked: List[Dict[str, Any]],
+                     conflicts: List[Dict[str, Any]], atomic: bool) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]]]:
+        """Claim a batch in the shared map; rows lost to other processes become conflicts"""
+        claimed = []
+        for key, appointment in zip(keys, booked):
+            if self._claim_shared(appointment["doctor_id"], appointment["day"], appointment["time_slot"]):
+                claimed.append((key, appointment))
+            else:
+                conflicts.append({"appointment": appointment, "reason": "already booked"})
+        if conflicts and atomic:
+            for _, appointment in claimed:
+                self._release_shared(appointment["doctor_id"], appointment["day"], appointment["time_slot"])
+            logging.warning(f"Batch rejected: {len(conflicts)} slots were booked by another process.")
+            return [], []
+        return [key for key, _ in claimed], [appointment for _, appointment in claimed]
+
+    def cancel_many(self, slots: Iterable[Tuple[str, str, str]], atomic: bool = True) -> Dict[str, Any]:
+        """Cancel many (doctor_id, day, time_slot) slots under one lock; empty slots are reported as missing"""
+        cancelled = []
+        missing = []
+        with self._lock:
+            seen = set()
+            for doctor_id, day, time_slot in slots:
+                key = self._key(doctor_id, day)
+                if time_slot in self._booked.get(key, ()) and (key, time_slot) not in seen:
+                    seen.add((key, time_slot))
+                    cancelled.append((doctor_id, day, time_slot))
+                else:
+                    missing.append((doctor_id, day, time_slot))
+            if missing and atomic:
+                logging.warning(f"Cancellation batch rejected: {len(missing)} slots not booked.")
+                return {"cancelled": 0, "missing": missing}
+            journal_rows = []
+            for doctor_id, day, time_slot in cancelled:
+                key = self._key(doctor_id, day)
+                appointment = self._booked[key].pop(time_slot)
+                if not self._booked[key]:
+                    del self._booked[key]
+                self._release_shared(doctor_id, day, time_slot)
+                if self.availability.tracks(doctor_id):
+                    self._update_availability(doctor_id, day, time_slot, free=True)
+                journal_rows.append((doctor_id, appointment["day"], time_slot))
+            self._record_batch([], journal_rows)
+        logging.info(f"Batch cancelled {len(cancelled)} appointments ({len(missing)} missing).")
+        return {"cancelled": len(cancelled), "missing": missing}
+
+    def _record_batch(self, booked: List[Dict[str, Any]], cancelled: List[Tuple[str, str, str]]) -> None:
+        if not self.store or not (booked or cancelled):
+            return
+        if len(booked) + len(cancelled) >= self.store.snapshot_every:
+            # Cheaper to write the whole state once than to journal a huge batch
+            self.store.write_snapshot(self.appointments, background=True)
+        else:
+            self.store.record_batch(booked, cancelled)
+            self._maybe_snapshot()
+
+    @staticmethod
+    def _first_index(doctor_id: str, moment: datetime.datetime) -> int:
+        """Index of the first slot of the doctor's day that starts at or after moment's time"""
+        start_minute = DOCTORS[doctor_id]["hours"][0] * 60
+        minute = moment.hour * 60 + moment.minute + (moment.second > 0 or moment.microsecond > 0)
+        return max(0, -(-(minute - start_minute) // SLOT_MINUTES))
+
+    def find_earliest_slot(self, doctor_id: str, after: Optional[datetime.datetime] = None) -> Optional[Tuple[str, str]]:
+        """Earliest free (ISO date, HH:MM) for a doctor at or after a time, within the horizon"""
+        if doctor_id not in DOCTORS:
+            return None
+        after = max(after, datetime.datetime.now()) if after else datetime.datetime.now()
+        with self._lock:
+            found = self.availability.earliest(doctor_id, after.date(), self._first_index(doctor_id, after))
+        if found is None:
+            return None
+        date, index = found
+        return date.isoformat(), slot_grid(doctor_id)[index]
+
+    def nearest_slots(self, doctor_id: str, day: str, time_slot: str, count: int = 5) -> List[Tuple[str, str]]:
+        """Free slots closest to the requested time on that day; if the day is full or
+        not a working day, the earliest openings after it instead. Slots that have
+        already started today are never offered."""
+        date = parse_date(day)
+        hours, minutes = map(int, time_slot.split(":"))
+        grid = slot_grid(doctor_id)
+        now = datetime.datetime.now()
+        from_index = self._first_index(doctor_id, now) if date == now.date() else 0
+        with self._lock:
+            if date is not None and self.availability.covers(doctor_id, date):
+                indices = self.availability.nearest(doctor_id, date, hours * 60 + minutes, count, from_index)
+                slots = [(day, grid[i]) for i in indices]
+            else:
+                free = self.generate_time_slots(doctor_id, day) if self.weekday_of(day) in DOCTORS[doctor_id]["days"] else []
+                target = hours * 60 + minutes
+                free.sort(key=lambda slot: abs(int(slot[:2]) * 60 + int(slot[3:]) - target))
+                slots = [(day, slot) for slot in free[:count]]
+        if not slots and date is not None:
+            start = datetime.datetime.combine(date + datetime.timedelta(days=1), datetime.time())
+            while len(slots) < count:
+                found = self.find_earliest_slot(doctor_id, start)
+                if found is None:
+                    break
+                slots.append(found)
+                found_time = datetime.datetime.strptime(" ".join(found), "%Y-%m-%d %H:%M")
+                start = found_time + datetime.timedelta(minutes=SLOT_MINUTES)
+        return slots
+
+    def availability_context(self, doctor_id: Optional[str] = None, day: Optional[str] = None,
+                             days: int = 3, max_doctors: int = 10) -> str:
+        """Compact free-slot snapshot for the LLM prompt, read from the cached per-day text.
+
+        Covers the requested doctor (or every doctor when the roster is small)
+        on the requested date, or on their next few working dates.
+        """
+        date = parse_date(day) if day else None
+        if doctor_id in DOCTORS:
+            doctor_ids = [doctor_id]
+        elif len(DOCTORS) <= max_doctors:
+            doctor_ids = list(DOCTORS)
+            days = 1
+        else:
+            return ""
+        lines = []
+        with self._lock:
+            for doc_id in doctor_ids:
+                if date is not None:
+                    dates = [date] if self.availability.covers(doc_id, date) else []
+                else:
+                    dates = self.availability.working_dates(doc_id)[:days]
+                for working_date in dates:
+                    lines.append(f"{DOCTORS[doc_id]['name']} {working_date.isoformat()} "
+                                 f"({working_date.strftime('%a')}): {self.availability.free_text(doc_id, working_date)}")
+        return "\n".join(lines)
+
+    def _maybe_snapshot(self) -> None:
+        if self.store.needs_snapshot():
+            # Rows are copied under the manager lock; the file is written on a background thread
+            self.store.write_snapshot(self.appointments, background=True)
+
+    def close(self) -> None:
+        """Flush any pending journal writes"""
+        with self._lock:
+            if self.store:
+                self.store.close()
+
     def get_doctor_availability_summary(self) -> str:
         summary = []
         for doc_id, info in DOCTORS.items():
@@ -62,13 +365,7 @@ class AppointmentManager:
 
     def normalize_time_input(self, time_input: str) -> Optional[str]:
         """Normalize various time input formats to HH:MM"""
-        try:
-            time_obj = datetime.datetime.strptime(time_input, "%H:%M")
-            return time_obj.strftime("%H:%M")
-        except ValueError:
-            try:
-                time_obj = datetime.datetime.strptime(time_input, "%I:%M %p")
-                return time_obj.strftime("%H:%M")
-            except ValueError:
-                logging.error(f"Invalid time format: {time_input}")
-                return None
\ No newline at end of file
+        normalized = normalize_time(time_input)
+        if normalized is None:
+            logging.error(f"Invalid time format: {time_input}")
+        return normalized
@@ -0,0 +1,287 @@
+import io
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+import numpy as np
+from endpointer import EnergyEndpointer, level_db
+
+def decode_wav(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode 16-bit PCM WAV bytes to mono int16 samples and their sample rate"""
+    with wave.open(io.BytesIO(data), "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError("Expected 16-bit PCM WAV")
+        channels = wav_file.getnchannels()
+        sample_rate = wav_file.getframerate()
+        # Streamed WAVs can carry a placeholder frame count; readframes stops at the real end
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+    return samples[::channels].copy() if channels > 1 else samples.copy(), sample_rate
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    with open(path, "rb") as f:
+        return decode_wav(f.read())
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling (prompt playback only, not for recognition)"""
+    if from_rate == to_rate or not samples.size:
+        return samples
+    positions = np.arange(int(samples.size * to_rate / from_rate)) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.int16)
+
+class SoundDeviceAudio:
+    """Microphone and speaker through blocking sounddevice streams"""
+
+    def __init__(self, input_rate: int = 16000, output_rate: int = 24000):
+        import sounddevice as sd
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self._input = sd.InputStream(samplerate=input_rate, channels=1, dtype="int16")
+        self._output = sd.OutputStream(samplerate=output_rate, channels=1, dtype="int16")
+        self._input.start()
+        self._output.start()
+
+    def read(self, frames: int) -> np.ndarray:
+        data, _ = self._input.read(frames)
+        return data[:, 0].copy()
+
+    def write(self, samples: np.ndarray) -> None:
+        self._output.write(samples.reshape(-1, 1))
+
+    def close(self) -> None:
+        for stream in (self._input, self._output):
+            stream.stop()
+            stream.close()
+
+class NullAudioDevice:
+    """Virtual audio device for offline runs and tests.
+
+    Capture returns audio queued with feed()/feed_wav() and then silence;
+    playback is discarded but kept in ``played``. With ``realtime`` both
+    directions are paced like a real sound card.
+    """
+
+    def __init__(self, input_rate: int = 16000, output_rate: int = 24000, realtime: bool = True):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.realtime = realtime
+        self.played: List[np.ndarray] = []
+        self._input: Deque[np.ndarray] = deque()
+        self._lock = threading.Lock()
+
+    def feed(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> None:
+        """Queue audio for capture (resampled to the input rate)"""
+        samples = resample(np.asarray(samples, dtype=np.int16), sample_rate or self.input_rate, self.input_rate)
+        with self._lock:
+            self._input.append(samples)
+
+    def feed_wav(self, path: str) -> None:
+        samples, sample_rate = read_wav(path)
+        self.feed(samples, sample_rate)
+
+    def read(self, frames: int) -> np.ndarray:
+        if self.realtime:
+            time.sleep(frames / self.input_rate)
+        out = np.zeros(frames, dtype=np.int16)
+        filled = 0
+        with self._lock:
+            while filled < frames and self._input:
+                chunk = self._input[0]
+                take = min(frames - filled, chunk.size)
+                out[filled:filled + take] = chunk[:take]
+                filled += take
+                if take == chunk.size:
+                    self._input.popleft()
+                else:
+                    self._input[0] = chunk[take:]
+        return out
+
+    def write(self, samples: np.ndarray) -> None:
+        if self.realtime:
+            time.sleep(samples.size / self.output_rate)
+        self.played.append(samples.copy())
+
+    def close(self) -> None:
+        pass
+
+class AudioEngine:
+    """Full-duplex audio: playback and capture run concurrently on dedicated threads.
+
+    The capture thread reads the device continuously in frame-sized blocks.
+    While a prompt plays it feeds a barge-in endpointer that needs
+    ``barge_in_margin_db`` above the microphone's noise floor. A frame also
+    has to be no more than ``barge_in_echo_db`` below the loudest block
+    played in the last ``echo_tail_ms``: echo of the prompt arrives well
+    below the level it was played at, a caller talking over it does not.
+    Once the caller starts talking the rest of the prompt (and anything
+    queued after it) is cancelled, and the frames since just before speech onset become
+    the start of the next utterance, so listen() returns it without losing
+    the first words. Playback writes in-memory int16 buffers in small blocks
+    and can stop within one block.
+    """
+
+    def __init__(self, device, frame_ms: int = 30, barge_in: bool = True, barge_in_margin_db: float = 18.0,
+                 barge_in_echo_db: float = 10.0, echo_tail_ms: int = 300, pre_roll_ms: int = 250,
+                 silence_ms: int = 700):
+        self.device = device
+        self.frame_ms = frame_ms
+        self.frame_size = device.input_rate * frame_ms // 1000
+        self.block_size = device.output_rate * frame_ms // 1000
+        self.barge_in = barge_in
+        self.barge_in_margin_db = barge_in_margin_db
+        self.barge_in_echo_db = barge_in_echo_db
+        self.pre_roll_frames = max(1, pre_roll_ms // frame_ms)
+        self.silence_ms = silence_ms
+        self.barge_ins = 0
+        self.interrupted = False
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._playback_queue: "queue.Queue[Optional[np.ndarray]]" = queue.Queue()
+        self._pending = 0
+        self._playing = False
+        self._cancel = threading.Event()
+        self._closed = threading.Event()
+        # Pre-roll plus the frames the barge-in detector needs before it reports speech
+        self._recent: Deque[np.ndarray] = deque(maxlen=self.pre_roll_frames + 500 // frame_ms)
+        self._recording = False
+        self._frames: "queue.Queue[np.ndarray]" = queue.Queue()
+        self._barge = EnergyEndpointer(device.input_rate, frame_ms=frame_ms, margin_db=barge_in_margin_db)
+        # Levels of the blocks just played, the reference the barge-in gate compares the microphone to
+        self._reference: Deque[float] = deque(maxlen=max(1, echo_tail_ms // frame_ms))
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="audio-capture", daemon=True),
+            threading.Thread(target=self._playback_loop, name="audio-playback", daemon=True)
+        ]
+
+    def start(self) -> "AudioEngine":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def close(self) -> None:
+        self._closed.set()
+        self.stop()
+        self._playback_queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self.device.close()
+
+    # Playback
+
+    def play(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> None:
+        """Queue int16 samples for playback without blocking"""
+        samples = resample(np.asarray(samples, dtype=np.int16).reshape(-1),
+                           sample_rate or self.device.output_rate, self.device.output_rate)
+        with self._lock:
+            if not self._pending:
+                self.interrupted = False
+            self._pending += 1
+        self._playback_queue.put(samples)
+
+    def play_wav(self, data: bytes) -> None:
+        samples, sample_rate = decode_wav(data)
+        self.play(samples, sample_rate)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until queued playback ends; False if the caller barged in"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._pending, timeout)
+            return not self.interrupted
+
+    def stop(self) -> None:
+        """Cancel the current prompt and everything queued after it"""
+        with self._lock:
+            if self._pending:
+                self._cancel.set()
+
+    @property
+    def playing(self) -> bool:
+        return self._playing
+
+    def _playback_loop(self) -> None:
+        while True:
+            samples = self._playback_queue.get()
+            if samples is None:
+                return
+            if not self._cancel.is_set():
+                with self._lock:
+                    if not self._playing:
+                        self._barge.reset()
+                        self._reference.clear()
+                    self._playing = True
+                for offset in range(0, samples.size, self.block_size):
+                    if self._cancel.is_set():
+                        break
+                    block = samples[offset:offset + self.block_size]
+                    # Recorded before the write so the reference is in place when the echo arrives
+                    with self._lock:
+                        self._reference.append(level_db(block))
+                    self.device.write(block)
+            with self._idle:
+                self._pending -= 1
+                if not self._pending:
+                    self._playing = False
+                    self._cancel.clear()
+                    self._idle.notify_all()
+
+    # Capture
+
+    def _start_recording(self, seed_frames: int) -> None:
+        self._recording = True
+        self._frames = queue.Queue()
+        for frame in list(self._recent)[-seed_frames:]:
+            self._frames.put(frame)
+
+    def _capture_loop(self) -> None:
+        while not self._closed.is_set():
+            frame = self.device.read(self.frame_size)
+            with self._lock:
+                self._recent.append(frame)
+                if self._recording:
+                    self._frames.put(frame)
+                elif self._playing and self.barge_in and not self._cancel.is_set():
+                    echo_gate = max(self._reference) - self.barge_in_echo_db if self._reference else None
+                    self._barge.process(frame, min_level_db=echo_gate)
+                    if self._barge.speech_started:
+                        self.barge_ins += 1
+                        self.interrupted = True
+                        self._cancel.set()
+                        self._start_recording(len(self._recent))
+
+    def listen(self, timeout: float = 10.0) -> Optional[np.ndarray]:
+        """Record one utterance (continuing one that barged in) until trailing silence or timeout"""
+        with self._lock:
+            if not self._recording:
+                self._start_recording(self.pre_roll_frames)
+            frames = self._frames
+        endpointer = EnergyEndpointer(self.device.input_rate, frame_ms=self.frame_ms, silence_ms=self.silence_ms)
+        chunks = []
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline and not self._closed.is_set():
+                try:
+                    frame = frames.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                chunks.append(frame)
+                if endpointer.process(frame):
+                    break
+        finally:
+            with self._lock:
+                self._recording = False
+        if not endpointer.speech_started:
+            return None
+        recording = np.concatenate(chunks)
+        start = max(0, endpointer.speech_start - self.pre_roll_frames * self.frame_size)
+        end = endpointer.speech_end if endpointer.speech_end is not None else recording.size
+        return recording[start:end]
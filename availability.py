@@ -0,0 +1,235 @@
+import bisect
+import datetime
+import itertools
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config import DOCTORS, SLOT_MINUTES
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DATE_FORMATS = ["%Y-%m-%d", "%B %d", "%d %B", "%b %d", "%d %b", "%B %d %Y", "%d %B %Y"]
+
+_slot_grids: Dict[str, List[str]] = {}
+
+def slot_grid(doctor_id: str) -> List[str]:
+    """All 20-minute slots in a doctor's working hours (cached per doctor)"""
+    grid = _slot_grids.get(doctor_id)
+    if grid is None:
+        start_hour, end_hour = DOCTORS[doctor_id]["hours"]
+        grid = [
+            f"{minute // 60:02d}:{minute % 60:02d}"
+            for minute in range(start_hour * 60, end_hour * 60, SLOT_MINUTES)
+        ]
+        _slot_grids[doctor_id] = grid
+    return grid
+
+def slot_index(doctor_id: str, time_slot: str) -> Optional[int]:
+    """Position of an HH:MM time in the doctor's slot grid, or None if off-grid"""
+    try:
+        hours, minutes = map(int, time_slot.split(":"))
+    except ValueError:
+        return None
+    offset = hours * 60 + minutes - DOCTORS[doctor_id]["hours"][0] * 60
+    if offset < 0 or offset % SLOT_MINUTES:
+        return None
+    index = offset // SLOT_MINUTES
+    return index if index < len(slot_grid(doctor_id)) else None
+
+def parse_date(day: str) -> Optional[datetime.date]:
+    """Parse an ISO (YYYY-MM-DD) booking day; weekday-only legacy keys return None"""
+    try:
+        return datetime.date.fromisoformat(day)
+    except (TypeError, ValueError):
+        return None
+
+def resolve_day(day_preference: str, today: datetime.date) -> Optional[datetime.date]:
+    """Turn a spoken day ("monday", "next monday", "the monday after", "tomorrow", "october 20") into a date"""
+    text = re.sub(r"[^\w\s-]", "", day_preference.lower()).strip()
+    if text == "today":
+        return today
+    if text == "tomorrow":
+        return today + datetime.timedelta(days=1)
+    date = parse_date(text)
+    if date:
+        return date
+    words = text.split()
+    for weekday_index, weekday in enumerate(WEEKDAYS):
+        if weekday in text:
+            ahead = (weekday_index - today.weekday()) % 7
+            if "next" in words and ahead == 0:
+                ahead = 7
+            # "the monday after", "monday after next", "a week from monday" (but not "monday afternoon")
+            if "after" in words or re.search(r"\bweek from\b", text):
+                ahead += 7
+            return today + datetime.timedelta(days=ahead)
+    cleaned = re.sub(r"(\d+)(st|nd|rd|th)\b", r"\1", text)
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            parsed = parsed.replace(year=today.year)
+            if parsed < today:
+                parsed = parsed.replace(year=today.year + 1)
+        return parsed
+    return None
+
+def describe_date(date: datetime.date) -> str:
+    return f"{date.strftime('%A')}, {date.strftime('%B')} {date.day}"
+
+def _lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+def free_ranges(doctor_id: str, mask: int) -> str:
+    """Compact free start times from a slot bitmask ("09:00-10:40, 13:20, 14:00-16:40")"""
+    grid = slot_grid(doctor_id)
+    if not mask:
+        return "fully booked"
+    ranges = []
+    index = 0
+    while mask >> index:
+        if not (mask >> index) & 1:
+            index += _lowest_bit(mask >> index)
+        run = _lowest_bit(~(mask >> index))
+        first, last = grid[index], grid[index + run - 1]
+        ranges.append(first if run == 1 else f"{first}-{last}")
+        index += run
+    return ", ".join(ranges)
+
+class AvailabilityIndex:
+    """Per-doctor free-slot bitmaps over a rolling horizon of real dates.
+
+    For each doctor and working date in [today, today + horizon_days) an int
+    bitmask has bit i set when slot i of that day is free, and a sorted list
+    of dates that still have a free slot supports bisect. Earliest-free and
+    nearest-slot queries are then a bisect plus a few bit operations instead
+    of scanning slots. Doctors are materialized lazily on first use from the
+    ``booked_slots(doctor_id, iso_date)`` callback, and the window rolls
+    forward when the clock passes midnight. The compact free-time text used
+    in LLM prompts is cached per doctor/date until the day's free mask changes.
+
+    Slots booked by other processes change without set_slot() being called,
+    so they are not folded into the bitmaps: ``booked_elsewhere(doctor_id,
+    iso_date)`` returns their booked bits and every query masks them out
+    when it runs.
+    """
+
+    def __init__(self, booked_slots: Callable[[str, str], Iterable[str]], horizon_days: int = 28,
+                 clock: Callable[[], datetime.date] = datetime.date.today,
+                 booked_elsewhere: Optional[Callable[[str, str], int]] = None):
+        self.booked_slots = booked_slots
+        self.horizon_days = horizon_days
+        self.clock = clock
+        self.booked_elsewhere = booked_elsewhere
+        self.today = clock()
+        self._masks: Dict[str, Dict[datetime.date, int]] = {}
+        self._open_dates: Dict[str, List[datetime.date]] = {}
+        self._free_text: Dict[Tuple[str, datetime.date], Tuple[int, str]] = {}
+
+    def _roll(self) -> None:
+        today = self.clock()
+        if today != self.today:
+            self.today = today
+            self._masks.clear()
+            self._open_dates.clear()
+            self._free_text.clear()
+
+    def _doctor(self, doctor_id: str) -> Dict[datetime.date, int]:
+        self._roll()
+        masks = self._masks.get(doctor_id)
+        if masks is None:
+            masks = {}
+            days = {WEEKDAYS.index(day) for day in DOCTORS[doctor_id]["days"]}
+            full = (1 << len(slot_grid(doctor_id))) - 1
+            for offset in range(self.horizon_days):
+                date = self.today + datetime.timedelta(days=offset)
+                if date.weekday() in days:
+                    mask = full
+                    for time_slot in self.booked_slots(doctor_id, date.isoformat()):
+                        index = slot_index(doctor_id, time_slot)
+                        if index is not None:
+                            mask &= ~(1 << index)
+                    masks[date] = mask
+            self._masks[doctor_id] = masks
+            self._open_dates[doctor_id] = sorted(date for date, mask in masks.items() if mask)
+        return masks
+
+    def tracks(self, doctor_id: str) -> bool:
+        """Whether the doctor's bitmaps are materialized; set_slot is a no-op otherwise"""
+        return doctor_id in self._masks
+
+    def covers(self, doctor_id: str, date: datetime.date) -> bool:
+        return date in self._doctor(doctor_id)
+
+    def set_slot(self, doctor_id: str, date: datetime.date, index: int, free: bool) -> None:
+        """Update one slot after a booking or cancellation"""
+        if doctor_id not in self._masks:
+            return  # picked up from booked_slots when materialized
+        masks = self._doctor(doctor_id)
+        if date not in masks:
+            return
+        old = masks[date]
+        new = old | (1 << index) if free else old & ~(1 << index)
+        masks[date] = new
+        open_dates = self._open_dates[doctor_id]
+        if old and not new:
+            open_dates.pop(bisect.bisect_left(open_dates, date))
+        elif new and not old:
+            bisect.insort(open_dates, date)
+
+    def free_mask(self, doctor_id: str, date: datetime.date) -> int:
+        mask = self._doctor(doctor_id).get(date, 0)
+        if mask and self.booked_elsewhere:
+            mask &= ~self.booked_elsewhere(doctor_id, date.isoformat())
+        return mask
+
+    def working_dates(self, doctor_id: str) -> List[datetime.date]:
+        """The doctor's working dates within the horizon, in order"""
+        return list(self._doctor(doctor_id))
+
+    def free_text(self, doctor_id: str, date: datetime.date) -> str:
+        """Cached free_ranges() text for one working date"""
+        key = (doctor_id, date)
+        mask = self.free_mask(doctor_id, date)
+        cached = self._free_text.get(key)
+        if cached is not None and cached[0] == mask:
+            return cached[1]
+        text = free_ranges(doctor_id, mask)
+        self._free_text[key] = (mask, text)
+        return text
+
+    def earliest(self, doctor_id: str, after: datetime.date, from_index: int = 0) -> Optional[Tuple[datetime.date, int]]:
+        """Earliest free slot on or after (date, slot index)"""
+        self._doctor(doctor_id)
+        open_dates = self._open_dates[doctor_id]
+        position = bisect.bisect_left(open_dates, after)
+        # Stops within two dates unless open dates have since filled up elsewhere
+        for date in itertools.islice(open_dates, position, None):
+            start = from_index if date == after else 0
+            remaining = self.free_mask(doctor_id, date) >> start
+            if remaining:
+                return date, start + _lowest_bit(remaining)
+        return None
+
+    def nearest(self, doctor_id: str, date: datetime.date, target_minute: int, count: int = 5,
+                from_index: int = 0) -> List[int]:
+        """Free slot indices (from from_index on) on date ordered by distance from target_minute
+        (minutes since midnight)"""
+        mask = self.free_mask(doctor_id, date) >> from_index << from_index
+        start_minute = DOCTORS[doctor_id]["hours"][0] * 60
+        pivot = max(0, min((target_minute - start_minute) // SLOT_MINUTES, len(slot_grid(doctor_id))))
+        below = mask & ((1 << pivot) - 1)
+        above = mask >> pivot
+        result = []
+        while len(result) < count and (below or above):
+            low = below.bit_length() - 1 if below else None
+            high = pivot + _lowest_bit(above) if above else None
+            if high is None or (low is not None and
+                                target_minute - (start_minute + low * SLOT_MINUTES) <=
+                                start_minute + high * SLOT_MINUTES - target_minute):
+                result.append(low)
+                below &= ~(1 << low)
+            else:
+                result.append(high)
+                above &= ~(1 << (high - pivot))
+        return result
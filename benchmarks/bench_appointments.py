@@ -0,0 +1,79 @@
+"""Micro-benchmarks for AppointmentManager at increasing calendar sizes.
+
+Run from the repository root:
+    python -m benchmarks.bench_appointments --sizes 10000 100000 1000000
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DOCTORS
+from appointment_manager import AppointmentManager
+from availability import slot_grid
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def add_synthetic_doctors(count: int) -> List[str]:
+    """Register synthetic full-week doctors (9:00-17:00) so large calendars fit"""
+    ids = [f"bench{i}" for i in range(count)]
+    for doc_id in ids:
+        DOCTORS[doc_id] = {"name": f"Dr. Bench {doc_id}", "specialty": "Benchmark",
+                           "days": list(WEEKDAYS), "hours": (9, 17)}
+    return ids
+
+def slot_keys(doctor_ids: List[str]) -> List[Tuple[str, str, str]]:
+    """(doctor, ISO date, slot) for every slot of the coming week"""
+    today = datetime.date.today()
+    dates = [(today + datetime.timedelta(days=offset)).isoformat() for offset in range(len(WEEKDAYS))]
+    return [(doc_id, day, slot) for doc_id in doctor_ids for day in dates for slot in slot_grid(doc_id)]
+
+def ops_per_sec(fn: Callable[[], None], n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+def run(size: int, ops: int) -> None:
+    manager = AppointmentManager()
+    slots_per_doctor = len(WEEKDAYS) * 24
+    doctor_ids = add_synthetic_doctors(-(-size // slots_per_doctor))
+    keys = slot_keys(doctor_ids)[:size]
+    rng = random.Random(0)
+
+    start = time.perf_counter()
+    for i, (doc_id, day, slot) in enumerate(keys):
+        manager.book_appointment(f"patient{i}", doc_id, day, slot)
+    load_s = time.perf_counter() - start
+
+    probes = [rng.choice(keys) for _ in range(ops)]
+    it = iter(probes * 4)
+    lookup = ops_per_sec(lambda: manager.is_slot_booked(*next(it)), ops)
+    free = ops_per_sec(lambda: manager.generate_time_slots(*next(it)[:2]), ops)
+    def cancel_and_rebook():
+        doc_id, day, slot = rng.choice(keys)
+        manager.cancel_appointment(doc_id, day, slot)
+        manager.book_appointment("again", doc_id, day, slot)
+    churn = ops_per_sec(cancel_and_rebook, ops)
+    earliest = ops_per_sec(lambda: manager.find_earliest_slot(next(it)[0]), ops)
+    nearest = ops_per_sec(lambda: manager.nearest_slots(*next(it)), ops)
+    print(f"{size:>9,} appointments | book {size / load_s:>9,.0f}/s | is_slot_booked {lookup:>9,.0f}/s | "
+          f"generate_time_slots {free:>8,.0f}/s | cancel+rebook {churn:>8,.0f}/s | "
+          f"earliest {earliest:>8,.0f}/s | nearest {nearest:>8,.0f}/s")
+    for doc_id in doctor_ids:
+        del DOCTORS[doc_id]
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.ops)
@@ -0,0 +1,115 @@
+"""Barge-in check for the full-duplex AudioEngine on the null audio device.
+
+Writes synthetic WAV fixtures (a prompt tone and a speech-like noise
+burst), plays the prompt while the fixture is "spoken" into the virtual
+microphone, and reports how quickly playback stopped and whether listen()
+returned the whole utterance. A second run plays a prompt with leading
+silence on a device that feeds the speaker back into the microphone at
+-20 dB with no caller, and fails if its echo is taken for barge-in. Run
+from the repository root:
+    python -m benchmarks.bench_barge_in --speech-at 1.0 [--fixtures DIR]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from audio_engine import AudioEngine, NullAudioDevice, encode_wav, read_wav, resample
+
+class EchoAudioDevice(NullAudioDevice):
+    """Null device whose microphone also hears the speaker, ``echo_db`` down"""
+
+    def __init__(self, echo_db: float = -20.0, **kwargs):
+        super().__init__(**kwargs)
+        self.gain = 10 ** (echo_db / 20)
+        self._echo = deque()
+        self._echo_lock = threading.Lock()
+
+    def write(self, samples: np.ndarray) -> None:
+        echo = resample(samples, self.output_rate, self.input_rate) * self.gain
+        with self._echo_lock:
+            self._echo.extend(echo.astype(np.int16))
+        super().write(samples)
+
+    def read(self, frames: int) -> np.ndarray:
+        out = super().read(frames).astype(np.int32)
+        with self._echo_lock:
+            take = min(frames, len(self._echo))
+            echo = np.array([self._echo.popleft() for _ in range(take)], dtype=np.int32)
+        out[:take] += echo
+        return np.clip(out, -32768, 32767).astype(np.int16)
+
+def make_fixtures(directory: str, speech_at: float, speech_seconds: float = 1.2, rate: int = 16000) -> dict:
+    """prompt.wav: 3 s tone at 24 kHz; echo_prompt.wav: the same after 250 ms of silence;
+    caller.wav: silence, then a syllable-modulated noise burst"""
+    rng = np.random.default_rng(0)
+    prompt_t = np.arange(int(3.0 * 24000)) / 24000
+    prompt = (3000 * np.sin(2 * np.pi * 440 * prompt_t)).astype(np.int16)
+    echo_prompt = np.concatenate([np.zeros(int(0.25 * 24000), np.int16), prompt])
+    speech_t = np.arange(int(speech_seconds * rate)) / rate
+    envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 4 * speech_t))
+    speech = (rng.normal(0, 4000, speech_t.size) * envelope).astype(np.int16)
+    caller = np.concatenate([np.zeros(int(speech_at * rate), np.int16), speech, np.zeros(rate, np.int16)])
+    paths = {name: os.path.join(directory, f"{name}.wav") for name in ("prompt", "echo_prompt", "caller")}
+    for name, samples, sample_rate in [("prompt", prompt, 24000), ("echo_prompt", echo_prompt, 24000),
+                                       ("caller", caller, rate)]:
+        with open(paths[name], "wb") as f:
+            f.write(encode_wav(samples, sample_rate))
+    return paths
+
+def run(fixtures: dict, speech_at: float, speech_seconds: float) -> None:
+    device = NullAudioDevice()
+    engine = AudioEngine(device).start()
+    prompt, prompt_rate = read_wav(fixtures["prompt"])
+    time.sleep(0.3)  # let the capture thread settle, as it would during start-up
+    started = time.perf_counter()
+    device.feed_wav(fixtures["caller"])
+    engine.play(prompt, prompt_rate)
+    completed = engine.wait(timeout=10)
+    stopped = time.perf_counter() - started
+    recording = engine.listen(timeout=5)
+    played = sum(block.size for block in device.played) / device.output_rate
+    engine.close()
+    print(f"prompt completed: {completed} | barge-ins: {engine.barge_ins}")
+    if completed:
+        print(f"prompt played in full ({played:.2f}s) before the caller spoke")
+    else:
+        print(f"playback stopped {(stopped - speech_at) * 1000:.0f} ms after speech onset "
+              f"({played:.2f}s of {prompt.size / prompt_rate:.2f}s prompt played)")
+    if recording is None:
+        print("listen(): no utterance")
+    else:
+        print(f"listen(): {recording.size / device.input_rate:.2f}s utterance "
+              f"(spoken {speech_seconds:.2f}s, including pre-roll)")
+
+def run_echo(fixtures: dict) -> None:
+    """Prompt echo alone must not count as the caller talking"""
+    device = EchoAudioDevice(echo_db=-20.0)
+    engine = AudioEngine(device).start()
+    prompt, prompt_rate = read_wav(fixtures["echo_prompt"])
+    time.sleep(0.3)
+    engine.play(prompt, prompt_rate)
+    completed = engine.wait(timeout=10)
+    engine.close()
+    print(f"echo at -20 dB, no caller: prompt completed: {completed} | barge-ins: {engine.barge_ins}")
+    if engine.barge_ins:
+        raise SystemExit("prompt echo was taken for barge-in")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--speech-at", type=float, default=1.0, help="seconds into the prompt the caller starts talking")
+    parser.add_argument("--speech-seconds", type=float, default=1.2)
+    parser.add_argument("--fixtures", help="directory to write the WAV fixtures to (default: a temp dir)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.fixtures or tmp
+        os.makedirs(directory, exist_ok=True)
+        fixtures = make_fixtures(directory, args.speech_at, args.speech_seconds)
+        run(fixtures, args.speech_at, args.speech_seconds)
+        run_echo(fixtures)
@@ -0,0 +1,58 @@
+"""Startup load time of the booking journal.
+
+Run from the repository root:
+    python -m benchmarks.bench_booking_store --count 1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from booking_store import BookingJournal
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+def synthetic_bookings(count: int):
+    for i in range(count):
+        yield {
+            "patient_name": f"patient{i}",
+            "doctor_id": f"doc{i % 1000}",
+            "day": DAYS[(i // 1000) % 7] + str(i // 7000),
+            "time_slot": f"{9 + (i // 3) % 8:02d}:{(i % 3) * 20:02d}"
+        }
+
+def run(count: int, tail: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        journal = BookingJournal(directory, snapshot_every=tail + 1)
+        start = time.perf_counter()
+        journal.write_snapshot(list(synthetic_bookings(count)))
+        write_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for appointment in synthetic_bookings(tail):
+            appointment["doctor_id"] = "tail-" + appointment["doctor_id"]
+            journal.record_booking(appointment)
+        journal.close()
+        append_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = BookingJournal(directory).load()
+        load_s = time.perf_counter() - start
+        snapshot_mb = os.path.getsize(os.path.join(directory, "snapshot.json")) / 1e6
+
+    print(f"bookings in snapshot: {count:,} ({snapshot_mb:.1f} MB), journal tail: {tail:,}")
+    print(f"snapshot write: {write_s:.2f}s")
+    print(f"journal append: {append_s:.2f}s ({tail / append_s:,.0f} records/s)")
+    print(f"startup load:   {load_s:.2f}s ({len(loaded):,} bookings)")
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.count, args.tail)
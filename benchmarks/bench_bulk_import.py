@@ -0,0 +1,55 @@
+"""Bulk import, export and utilization-report timings for large calendars.
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_import --rows 1000000
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DOCTORS
+from appointment_manager import AppointmentManager
+from booking_store import BookingJournal
+from booking_io import FIELDS, import_file, export_file, write_appointments
+from benchmarks.bench_appointments import WEEKDAYS, add_synthetic_doctors, slot_keys
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - start:8.2f}s")
+    return result
+
+def run(rows: int) -> None:
+    doctor_ids = add_synthetic_doctors(-(-rows // (len(WEEKDAYS) * 24)))
+    keys = slot_keys(doctor_ids)[:rows]
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "calendar.csv")
+        write_appointments(source, (dict(zip(FIELDS, (f"patient{i}",) + key)) for i, key in enumerate(keys)))
+        manager = AppointmentManager(store=BookingJournal(os.path.join(tmp, "bookings")))
+        result = timed(f"import {rows:,} rows (CSV)", lambda: import_file(manager, source))
+        assert result["booked"] == rows and not result["conflicts"]
+        timed("export CSV", lambda: export_file(manager, os.path.join(tmp, "export.csv")))
+        timed("export JSON", lambda: export_file(manager, os.path.join(tmp, "export.json")))
+        timed("cancel 10% (batch)", lambda: manager.cancel_many(keys[::10]))
+        try:
+            from reports import utilization_report
+            timed("utilization report", lambda: utilization_report(
+                manager.appointments, datetime.date.today(), len(WEEKDAYS)))
+        except ImportError as e:
+            print(f"utilization report skipped: {e}")
+        manager.close()
+    for doc_id in doctor_ids:
+        del DOCTORS[doc_id]
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows)
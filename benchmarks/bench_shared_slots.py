@@ -0,0 +1,92 @@
+"""Multi-process stress test for the shared-memory slot map.
+
+Every worker process runs its own AppointmentManager on one SharedSlotMap
+and tries to book every slot in the same calendar, in its own random
+order. The test checks that each slot ended up with exactly one owner
+(no double bookings, nothing lost) and reports booking attempts per second
+as workers are added. Run from the repository root:
+    python -m benchmarks.bench_shared_slots --workers 1 2 4 8 --days 366
+"""
+import argparse
+import datetime
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment_manager import AppointmentManager
+from availability import WEEKDAYS, slot_grid
+from config import DOCTORS
+from shared_slots import SharedSlotMap
+
+Slot = Tuple[str, str, str]
+
+def calendar(start: datetime.date, days: int) -> List[Slot]:
+    slots = []
+    for offset in range(days):
+        date = start + datetime.timedelta(days=offset)
+        for doctor_id, info in DOCTORS.items():
+            if WEEKDAYS[date.weekday()] in info["days"]:
+                slots.extend((doctor_id, date.isoformat(), time_slot) for time_slot in slot_grid(doctor_id))
+    return slots
+
+def worker(worker_id: int, shared: SharedSlotMap, slots: List[Slot], barrier, results) -> None:
+    logging.getLogger().setLevel(logging.ERROR)
+    manager = AppointmentManager(shared=shared, worker_id=worker_id)
+    for doctor_id in DOCTORS:
+        manager.find_earliest_slot(doctor_id)  # materialize the availability index outside the timing
+    order = slots[:]
+    random.Random(worker_id).shuffle(order)
+    barrier.wait()
+    won = [slot for slot in order if manager.book_appointment(f"caller-{worker_id}", *slot)]
+    results.put((worker_id, won, len(order)))
+    shared.close()
+
+def run(workers: int, slots: List[Slot], start: datetime.date, days: int) -> float:
+    shared = SharedSlotMap.create(start=start, days=days)
+    barrier = multiprocessing.Barrier(workers + 1)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(i, shared, slots, barrier, results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    started = time.perf_counter()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    owners = {}
+    double_booked = 0
+    for worker_id, won, _ in outcomes:
+        for slot in won:
+            double_booked += slot in owners
+            owners[slot] = worker_id
+    attempts = sum(outcome[2] for outcome in outcomes)
+    in_map = shared.booked_count()
+    shared.close()
+    rate = attempts / elapsed
+    print(f"{workers:>2} workers | {attempts:>8} attempts in {elapsed:6.2f}s = {rate:>9,.0f}/s | "
+          f"booked {len(owners)}/{len(slots)} (map {in_map}) | double-booked {double_booked}")
+    if double_booked or len(owners) != len(slots) or in_map != len(slots):
+        raise SystemExit("slot map inconsistent")
+    return rate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--days", type=int, default=366, help="calendar dates every worker tries to fill")
+    args = parser.parse_args()
+    start = datetime.date.today()
+    slots = calendar(start, args.days)
+    print(f"{len(slots)} slots, {os.cpu_count()} CPUs")
+    base = None
+    for count in args.workers:
+        rate = run(count, slots, start, args.days)
+        base = base or rate / count
+        print(f"   scaling {rate / base:.2f}x of {count}x")
@@ -0,0 +1,65 @@
+"""Latency-aware speech routing with stub backends: normal, cloud down and cloud slow.
+
+Drives VoiceInterface.synthesize() and transcribe() through a SpeechRouter
+whose cloud and local engines are offline stubs with configurable delays.
+For each scenario it reports the mean latency of short prompts, open-ended
+speech and yes/no answers, plus the calls each engine served. Run from
+the repository root:
+    python -m benchmarks.bench_speech_routing --cloud-latency 0.4 --local-latency 0.03
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from speech_backends import SpeechRouter, StubSTT, StubTTS, silent_wav
+from voice_interface import VoiceInterface
+
+SHORT_PROMPTS = ["Could you please tell me your name?", "Goodbye!", "Which day works for you?", "Yes, that's right."]
+OPEN_ENDED = ("Dr. Sara is free on Tuesday at 10:00, 10:20 and 11:40, and on Thursday afternoon from 14:00. "
+              "Which of these would suit you best? (option {})")
+
+def run(label: str, cloud_latency: float, local_latency: float, cloud_fail: bool, rounds: int,
+        cloud_deadline: float, slow_seconds: float) -> None:
+    router = SpeechRouter(
+        cloud_tts=StubTTS("cloud-tts", local=False, latency=cloud_latency, fail=cloud_fail),
+        local_tts=StubTTS("local-tts", local=True, latency=local_latency),
+        cloud_stt=StubSTT(["i'd like to see dr. ali on monday"] * rounds * 2, "cloud-stt", local=False,
+                          latency=cloud_latency, fail=cloud_fail),
+        local_stt=StubSTT(["yes"] * rounds * 2, "local-stt", local=True, latency=local_latency),
+        cloud_deadline=cloud_deadline, slow_seconds=slow_seconds
+    )
+    timings: Dict[str, List[float]] = {"short prompt": [], "open-ended": [], "yes/no answer": [], "open answer": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        voice = VoiceInterface(tts_cache_dir=tmp, router=router)
+        for i in range(rounds):
+            for name, action in [
+                ("short prompt", lambda: voice.synthesize(f"{SHORT_PROMPTS[i % len(SHORT_PROMPTS)]} ({i})")),
+                ("open-ended", lambda: voice.synthesize(OPEN_ENDED.format(i))),
+                ("yes/no answer", lambda: voice.transcribe(silent_wav(0.8, 16000), keywords=["yes", "no"])),
+                ("open answer", lambda: voice.transcribe(silent_wav(3.0, 16000)))
+            ]:
+                started = time.perf_counter()
+                action()
+                timings[name].append(time.perf_counter() - started)
+    print(f"\n{label}")
+    for name, samples in timings.items():
+        print(f"  {name:<14} mean {sum(samples) / len(samples) * 1000:7.1f} ms  max {max(samples) * 1000:7.1f} ms")
+    for backend, stats in router.stats().items():
+        print(f"  {backend:<10} calls {stats['calls']:>3}  failures {stats['failures']:>2}  "
+              f"latency {stats['latency_ms']} ms  healthy {stats['healthy']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cloud-latency", type=float, default=0.4)
+    parser.add_argument("--local-latency", type=float, default=0.03)
+    parser.add_argument("--rounds", type=int, default=8)
+    args = parser.parse_args()
+    common = dict(local_latency=args.local_latency, rounds=args.rounds, cloud_deadline=1.0, slow_seconds=0.8)
+    run("cloud healthy", args.cloud_latency, cloud_fail=False, **common)
+    run("cloud unreachable", args.cloud_latency, cloud_fail=True, **common)
+    run("cloud slow (2 s, deadline 1 s)", 2.0, cloud_fail=False, **common)
@@ -0,0 +1,85 @@
+"""Start-up benchmark: import time and time to first audio, with and without warm-up.
+
+Imports are timed in fresh interpreters. Time to first audio runs the
+scheduler start-up against the fake OpenAI backend (cold connection pool,
+empty TTS cache, a booking journal to load) up to the moment the greeting
+audio is ready, then times the first fixed prompt of the call. Run from
+the repository root:
+    python -m benchmarks.bench_startup --bookings 200000 --connect-latency 0.3
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ["openai", "httpx", "numpy", "scipy", "sounddevice", "tiktoken"]
+
+def import_time(statement: str) -> str:
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(f'{elapsed * 1000:8.1f} ms  heavy modules loaded: {loaded or None}')"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or f"failed: {result.stderr.strip().splitlines()[-1]}"
+
+def first_audio(warm_up: bool, bookings: int, latency: dict) -> None:
+    import openai_client
+    import smart_scheduler
+    from booking_store import BookingJournal
+    from voice_interface import VoiceInterface
+    from chatgpt_handler import ChatGPTHandler
+    from benchmarks.fake_openai import FakeOpenAI
+
+    class SilentVoice(VoiceInterface):
+        def play(self, path: str) -> None:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = BookingJournal(os.path.join(tmp, "bookings"))
+        journal.write_snapshot([{"patient_name": f"p{i}", "doctor_id": "ali", "day": f"legacy{i}",
+                                 "time_slot": "09:00"} for i in range(bookings)])
+        fake = FakeOpenAI(latency)
+        openai_client.set_client(fake)
+        smart_scheduler.BOOKINGS_DIR = os.path.join(tmp, "bookings")
+        started = time.perf_counter()
+        voice = SilentVoice(tts_cache_dir=os.path.join(tmp, "tts"))
+        scheduler = smart_scheduler.SmartAppointmentScheduler(voice=voice, chatgpt=ChatGPTHandler(),
+                                                              warm_up=warm_up)
+        if scheduler.warmup:
+            scheduler.warmup.wait("greeting")
+        voice.synthesize(smart_scheduler.GREETING)
+        greeting = time.perf_counter() - started
+        if scheduler.warmup:
+            # The caller is listening to the greeting meanwhile
+            scheduler.warmup.wait(timeout=2.0)
+        prompt_start = time.perf_counter()
+        voice.synthesize(smart_scheduler.NAME_PROMPT)
+        prompt = time.perf_counter() - prompt_start
+        scheduler.appointment_manager.close()
+        openai_client.set_client(None)
+    label = "warm-up" if warm_up else "cold"
+    print(f"{label:<8} greeting audio ready {greeting * 1000:7.0f} ms | first fixed prompt {prompt * 1000:6.0f} ms")
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=200_000, help="bookings in the journal loaded at start-up")
+    parser.add_argument("--connect-latency", type=float, default=0.3, help="simulated TCP + TLS set-up seconds")
+    parser.add_argument("--tts-latency", type=float, default=0.4)
+    args = parser.parse_args()
+    print("import smart_scheduler ", import_time("import smart_scheduler"))
+    for module in ["openai", "numpy", "tiktoken"]:
+        print(f"import {module:<16}", import_time(f"import {module}"))
+    latency = {"connect": args.connect_latency, "tts": args.tts_latency}
+    first_audio(False, args.bookings, latency)
+    first_audio(True, args.bookings, latency)
@@ -0,0 +1,152 @@
+"""Deterministic in-process stand-in for the OpenAI client used by the scheduler.
+
+Implements the subset of the SDK surface the app calls (chat completions,
+incl. streaming and json_schema output, Whisper transcriptions, TTS and
+model listing) with rule-based answers and configurable simulated latency,
+including the set-up cost of a cold connection pool.
+"""
+import io
+import json
+import random
+import re
+import threading
+import time
+import wave
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+from local_extractor import LocalExtractor, FILLER_WORDS
+
+DEFAULT_LATENCY = {
+    "chat": 0.6,         # full chat completion
+    "first_token": 0.3,  # streamed completion, time to first token
+    "token": 0.01,       # streamed completion, per token
+    "transcribe": 0.5,
+    "tts": 0.4,
+    "models": 0.05,
+    "connect": 0.0       # TCP + TLS set-up when no idle pooled connection is available
+}
+
+REPLIES = [
+    "Sure, I can help you with that.",
+    "Thanks! Let me check that for you.",
+    "Of course. Let's get your appointment sorted out.",
+]
+
+def _usage(messages: List[Dict[str, str]]) -> SimpleNamespace:
+    prompt_tokens = sum(len(m["content"]) // 4 + 4 for m in messages)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=20,
+                           prompt_tokens_details=SimpleNamespace(cached_tokens=0))
+
+class FakeOpenAI:
+    def __init__(self, latency: Optional[Dict[str, float]] = None, jitter: float = 0.0, seed: int = 0):
+        self.latency = dict(DEFAULT_LATENCY, **(latency or {}))
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.transcripts: List[str] = []
+        self.idle_connections = 0
+        self.extractor = LocalExtractor()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat_create))
+        self.audio = SimpleNamespace(
+            speech=SimpleNamespace(create=self._speech_create),
+            transcriptions=SimpleNamespace(create=self._transcription_create)
+        )
+        self.models = SimpleNamespace(list=self._models_list)
+
+    def _sleep(self, operation: str, scale: float = 1.0) -> None:
+        seconds = self.latency[operation] * scale
+        if self.jitter:
+            with self._lock:
+                seconds *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _connect(self) -> None:
+        """Take an idle pooled connection, or pay the connection set-up latency"""
+        with self._lock:
+            if self.idle_connections:
+                self.idle_connections -= 1
+                return
+        self._sleep("connect")
+
+    def _release(self) -> None:
+        with self._lock:
+            self.idle_connections += 1
+
+    def _count(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] += 1
+
+    def extract(self, utterance: str) -> Dict[str, Any]:
+        """Rule-based stand-in for the model's field extraction"""
+        info, _ = self.extractor.parse(utterance)
+        words = re.findall(r"[a-z']+", utterance.lower())
+        if not info and 0 < len(words) <= 3 and not any(w in FILLER_WORDS for w in words):
+            info["patient_name"] = " ".join(words).title()
+        fields = ["patient_name", "doctor_preference", "day_preference", "time_preference"]
+        return {field: info.get(field) for field in fields}
+
+    def _chat_create(self, model: str, messages: List[Dict[str, str]], stream: bool = False,
+                     response_format: Optional[Dict[str, Any]] = None, **kwargs):
+        self._count("chat")
+        utterance = messages[-1]["content"]
+        reply = REPLIES[sum(map(ord, utterance)) % len(REPLIES)]
+        if response_format is not None:
+            content = json.dumps(dict(self.extract(utterance), reply=reply))
+        elif "Extract the following information" in messages[0]["content"]:
+            content = json.dumps(self.extract(utterance))
+        else:
+            content = reply
+        if stream:
+            return self._stream(content, messages)
+        self._connect()
+        self._sleep("chat")
+        self._release()
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=_usage(messages))
+
+    def _stream(self, content: str, messages: List[Dict[str, str]]):
+        self._connect()
+        self._sleep("first_token")
+        for token in re.findall(r"\S+\s*", content):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))], usage=None)
+            self._sleep("token")
+        self._release()
+        yield SimpleNamespace(choices=[], usage=_usage(messages))
+
+    def _speech_create(self, model: str, voice: str, input: str, **kwargs):
+        self._count("tts")
+        self._connect()
+        self._sleep("tts")
+        self._release()
+        if kwargs.get("response_format") == "wav":
+            # Silent 24 kHz audio, roughly as long as the text takes to say
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(24000)
+                wav_file.writeframes(b"\0\0" * int(24000 * 0.06 * len(input)))
+            return SimpleNamespace(content=buffer.getvalue())
+        return SimpleNamespace(content=b"ID3" + input.encode("utf-8"))
+
+    def _models_list(self, **kwargs) -> List[Any]:
+        self._count("models")
+        self._connect()
+        self._sleep("models")
+        self._release()
+        return []
+
+    def queue_transcript(self, text: str) -> None:
+        """Set the text returned by the next transcription call"""
+        self.transcripts.append(text)
+
+    def _transcription_create(self, model: str, file: Any, **kwargs):
+        self._count("transcribe")
+        self._connect()
+        self._sleep("transcribe")
+        self._release()
+        return SimpleNamespace(text=self.transcripts.pop(0) if self.transcripts else "")
@@ -0,0 +1,103 @@
+"""Offline replay benchmark for SmartAppointmentScheduler.
+
+Drives process_user_input from scripted transcripts against the fake
+OpenAI backend, then reports throughput, per-turn latency percentiles,
+LLM calls per booking, booking success rate and speculative work used and
+wasted. Run from the repository root:
+    python -m benchmarks.replay --repeat 5 --chat-latency 0.6 --tts [--two-call] [--no-speculation]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai_client
+import smart_scheduler
+from appointment_manager import AppointmentManager
+from cache import LRUCache
+from chatgpt_handler import ChatGPTHandler
+from config import CACHE_CONFIG
+from smart_scheduler import SmartAppointmentScheduler
+from tracing import Histogram
+from turn_executor import TurnExecutor
+from voice_interface import VoiceInterface, iter_sentences
+from benchmarks.fake_openai import FakeOpenAI
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "scripted_calls.json")
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def replay(conversations: List[Dict[str, Any]], latency: Dict[str, float], repeat: int = 1,
+           tts: bool = False, jitter: float = 0.0, speculate: bool = True) -> Dict[str, Any]:
+    fake = FakeOpenAI(latency, jitter=jitter)
+    openai_client.set_client(fake)
+    turn_latency = Histogram()
+    turns = bookings = 0
+    speculation = TurnExecutor(enabled=speculate)
+    # Shared by the run's sessions like the module-level cache, but not carried over between runs
+    extraction_cache = LRUCache(CACHE_CONFIG["extraction_size"], CACHE_CONFIG["extraction_ttl"])
+    with tempfile.TemporaryDirectory() as cache_dir:
+        voice = VoiceInterface(client=fake, tts_cache_dir=cache_dir)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            # Fresh calendar per pass so repeated conversations don't collide with themselves
+            manager = AppointmentManager()
+            for conversation in conversations:
+                scheduler = SmartAppointmentScheduler(
+                    voice=voice, chatgpt=ChatGPTHandler(client=fake, extraction_cache=extraction_cache),
+                    appointment_manager=manager, speak_replies=tts
+                )
+                # One set of speculation counters (and waste cap) across the run
+                scheduler.executor = speculation
+                booked_before = len(manager.appointments)
+                for utterance in conversation["turns"]:
+                    turn_start = time.perf_counter()
+                    response = scheduler.process_user_input(utterance.lower())
+                    if tts:
+                        for sentence in (iter_sentences([response]) if smart_scheduler.STREAMING_TTS else [response]):
+                            voice.synthesize(sentence)
+                    turn_latency.add(time.perf_counter() - turn_start)
+                    turns += 1
+                scheduler.cancel_speculation()
+                bookings += len(manager.appointments) > booked_before
+        elapsed = time.perf_counter() - started
+    openai_client.set_client(None)
+    conversations_run = len(conversations) * repeat
+    return {
+        "conversations": conversations_run,
+        "turns": turns,
+        "turns_per_sec": round(turns / elapsed, 2),
+        "turn_latency": turn_latency.summary(),
+        "llm_calls": fake.calls["chat"],
+        "llm_calls_per_turn": round(fake.calls["chat"] / turns, 3) if turns else 0.0,
+        "llm_calls_per_booking": round(fake.calls["chat"] / bookings, 3) if bookings else None,
+        "tts_calls": fake.calls["tts"],
+        "booking_success_rate": round(bookings / conversations_run, 3) if conversations_run else 0.0,
+        "speculation": speculation.metrics()
+    }
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON list of {name, turns} conversations")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="simulated seconds per chat completion")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="simulated seconds per TTS request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="relative latency jitter, e.g. 0.2")
+    parser.add_argument("--tts", action="store_true", help="also synthesize every reply")
+    parser.add_argument("--two-call", action="store_true", help="separate extraction and reply requests")
+    parser.add_argument("--no-speculation", action="store_true", help="run turn work sequentially")
+    args = parser.parse_args()
+    smart_scheduler.SINGLE_CALL_MODE = not args.two_call
+    latency = {"chat": args.chat_latency, "first_token": args.chat_latency / 2, "tts": args.tts_latency}
+    result = replay(load_corpus(args.corpus), latency, args.repeat, args.tts, args.jitter,
+                    speculate=not args.no_speculation)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,110 @@
+"""Bulk import and export of appointments as CSV or JSON.
+
+    python booking_io.py import calendar.csv [--partial]
+    python booking_io.py export calendar.json
+"""
+import argparse
+import csv
+import json
+import logging
+import re
+from operator import itemgetter
+from typing import Dict, Any, Iterable, List, Optional
+from appointment_manager import AppointmentManager, normalize_time
+from booking_store import BookingJournal, gc_paused
+from config import BOOKINGS_DIR
+
+FIELDS = ["patient_name", "doctor_id", "day", "time_slot"]
+HHMM = re.compile(r"\d{2}:\d{2}")
+
+def _slot(time_slot: str, line: int) -> str:
+    if HHMM.fullmatch(time_slot):
+        return time_slot
+    normalized = normalize_time(time_slot)
+    if normalized is None:
+        raise ValueError(f"Row {line}: invalid time '{time_slot}'")
+    return normalized
+
+def _appointment(values: Iterable[Any], line: int) -> Dict[str, str]:
+    patient_name, doctor_id, day, time_slot = (str(value).strip() for value in values)
+    return {
+        "patient_name": patient_name,
+        "doctor_id": doctor_id.lower(),
+        "day": day.lower(),
+        "time_slot": _slot(time_slot, line)
+    }
+
+def _read_csv(f) -> List[Dict[str, str]]:
+    # csv.reader with column positions is much faster than DictReader on large files
+    reader = csv.reader(f)
+    header = [column.strip() for column in next(reader, [])]
+    missing = [field for field in FIELDS if field not in header]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {missing}")
+    columns = [header.index(field) for field in FIELDS]
+    try:
+        return [_appointment([row[column] for column in columns], line) for line, row in enumerate(reader, start=2)]
+    except IndexError:
+        raise ValueError(f"CSV row {reader.line_num}: expected {len(header)} columns")
+
+def _read_record(record: Dict[str, Any], line: int) -> Dict[str, str]:
+    try:
+        return _appointment([record[field] for field in FIELDS], line)
+    except KeyError as e:
+        raise ValueError(f"Row {line}: missing field {e}")
+
+def read_appointments(path: str) -> List[Dict[str, str]]:
+    """Read appointments from CSV (columns patient_name, doctor_id, day, time_slot)
+    or JSON (a list of records, or {"appointments": [...]})"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f, gc_paused():
+            return _read_csv(f)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("appointments", [])
+    return [_read_record(record, line) for line, record in enumerate(data, start=1)]
+
+def write_appointments(path: str, appointments: Iterable[Dict[str, Any]]) -> int:
+    """Write appointments as CSV or JSON (by file extension), sorted by doctor, day and time"""
+    with gc_paused():
+        rows = sorted(([a[field] for field in FIELDS] for a in appointments), key=itemgetter(1, 2, 3))
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"appointments": [dict(zip(FIELDS, row)) for row in rows]}, separators=(",", ":")))
+    return len(rows)
+
+def import_file(manager: AppointmentManager, path: str, atomic: bool = True) -> Dict[str, Any]:
+    """Book every appointment in a CSV/JSON file through AppointmentManager.book_many"""
+    return manager.book_many(read_appointments(path), atomic=atomic)
+
+def export_file(manager: AppointmentManager, path: str) -> int:
+    return write_appointments(path, manager.appointments)
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import/export of booked appointments")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="CSV or JSON file")
+    parser.add_argument("--partial", action="store_true",
+                        help="import the conflict-free rows instead of rejecting the whole file")
+    args = parser.parse_args(argv)
+    manager = AppointmentManager(store=BookingJournal(BOOKINGS_DIR, read_only=args.command == "export"))
+    try:
+        if args.command == "import":
+            result = import_file(manager, args.path, atomic=not args.partial)
+            print(f"Booked {result['booked']} appointments, {len(result['conflicts'])} conflicts.")
+            for conflict in result["conflicts"][:20]:
+                print(f"  {conflict['reason']}: {conflict['appointment']}")
+        else:
+            print(f"Exported {export_file(manager, args.path)} appointments to {args.path}.")
+    finally:
+        manager.close()
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
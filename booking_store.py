@@ -0,0 +1,264 @@
+import gc
+import json
+import os
+import shutil
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, keeping one process per directory is up to the caller
+    fcntl = None
+
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.log"
+# Journal covered by a snapshot still being written; removed once the snapshot is in place
+PREVIOUS_JOURNAL_FILE = "journal.prev.log"
+LOCK_FILE = "journal.lock"
+
+def worker_directory(directory: str, worker_id: int) -> str:
+    """Journal directory for one of several scheduler processes sharing a slot map"""
+    return os.path.join(directory, f"worker-{worker_id}")
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Suspend the cyclic GC while building millions of small, acyclic objects"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+class BookingJournal:
+    """Append-only booking journal with periodic compacted snapshots.
+
+    Every book/cancel is appended to the journal as one JSON line and flushed
+    to the OS straight away; fsync is batched (every ``fsync_every`` records
+    or ``fsync_interval`` seconds). Once ``snapshot_every`` records have been
+    appended the owner writes a snapshot of the full state and the journal is
+    truncated, so startup only ever replays a short tail.
+
+    With ``background=True`` write_snapshot() only copies the rows and
+    moves the journal aside (to journal.prev.log) before returning; the
+    JSON is encoded and written on a thread while new records go to a fresh
+    journal. Startup replays the snapshot, then the previous journal if it
+    is still there, then the current one.
+
+    Replay is idempotent per slot (a book on a taken slot and a cancel on a
+    free slot are no-ops), so a crash between writing a snapshot and
+    removing the journals it covers is harmless.
+
+    A directory has one writer: load() takes an exclusive lock on it, held
+    until close(), because a snapshot truncates the journal and would drop
+    another process's records. Processes sharing a SharedSlotMap each need
+    their own directory (see worker_directory()). ``read_only`` journals
+    (reports, exports) load without the lock and can't be written; they
+    skip a partial last record instead of truncating it, since it may be
+    one the writer is still appending.
+    """
+
+    def __init__(self, directory: str, fsync_every: int = 64, fsync_interval: float = 1.0,
+                 snapshot_every: int = 10000, read_only: bool = False):
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.read_only = read_only
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.previous_journal_path = os.path.join(directory, PREVIOUS_JOURNAL_FILE)
+        self.records_since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._journal = None
+        self._lock_file = None
+
+    def _acquire_lock(self) -> None:
+        if fcntl is None or self._lock_file is not None:
+            return
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Bookings directory '{self.directory}' is in use by another process; "
+                               f"give each scheduler process its own directory") from None
+        self._lock_file = lock_file
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load the snapshot and replay the journal tail, returning all live appointments"""
+        if not self.read_only:
+            self._acquire_lock()
+        state: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        for patient_name, doctor_id, day, time_slot in self._read_snapshot():
+            state[(doctor_id, day, time_slot)] = {
+                "patient_name": patient_name,
+                "doctor_id": doctor_id,
+                "day": day,
+                "time_slot": time_slot
+            }
+        replayed = 0
+        for record in self._read_journals():
+            key = (record[-3], record[-2], record[-1])
+            if record[0] == "b":
+                if key not in state:
+                    state[key] = {
+                        "patient_name": record[1],
+                        "doctor_id": key[0],
+                        "day": key[1],
+                        "time_slot": key[2]
+                    }
+            elif record[0] == "c":
+                state.pop(key, None)
+            replayed += 1
+        self.records_since_snapshot = replayed
+        logging.info(f"Loaded {len(state)} bookings ({replayed} journal records replayed).")
+        return list(state.values())
+
+    def _read_snapshot(self) -> List[List[str]]:
+        if not os.path.exists(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return []
+        # One read into bytes; json can't parse an mmap without copying it out anyway
+        with open(self.snapshot_path, "rb") as f:
+            return json.loads(f.read())["appointments"]
+
+    def _read_journals(self) -> Iterator[List[str]]:
+        yield from self._read_journal(self.previous_journal_path)
+        yield from self._read_journal(self.journal_path)
+
+    def _read_journal(self, path: str) -> Iterator[List[str]]:
+        if not os.path.exists(path):
+            return
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                yield record
+        if self.read_only:
+            return  # the tail may be a record the writer is still appending
+        if valid_bytes != os.path.getsize(path):
+            # Drop a torn trailing record left by a crash mid-write
+            logging.warning(f"Truncating corrupt journal tail of {path} at byte {valid_bytes}.")
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _append(self, records: List[List[str]]) -> None:
+        if self.read_only:
+            raise RuntimeError(f"Bookings journal in '{self.directory}' was opened read-only")
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+        self._journal.flush()
+        self.records_since_snapshot += len(records)
+        self._pending += len(records)
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def record_booking(self, appointment: Dict[str, Any]) -> None:
+        self._append([["b", appointment["patient_name"], appointment["doctor_id"],
+                       appointment["day"], appointment["time_slot"]]])
+
+    def record_cancellation(self, doctor_id: str, day: str, time_slot: str) -> None:
+        self._append([["c", doctor_id, day, time_slot]])
+
+    def record_batch(self, booked: List[Dict[str, Any]], cancelled: List[Tuple[str, str, str]]) -> None:
+        """Append a batch of bookings/cancellations in one write and fsync it"""
+        records = [["c", doctor_id, day, time_slot] for doctor_id, day, time_slot in cancelled]
+        records += [["b", a["patient_name"], a["doctor_id"], a["day"], a["time_slot"]] for a in booked]
+        if records:
+            self._append(records)
+            self.sync()
+
+    def needs_snapshot(self) -> bool:
+        return self.records_since_snapshot >= self.snapshot_every and not self.snapshot_in_progress
+
+    @property
+    def snapshot_in_progress(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def sync(self) -> None:
+        """Force pending journal records to disk"""
+        if self._journal is not None and self._pending:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def write_snapshot(self, appointments: List[Dict[str, Any]], background: bool = False) -> None:
+        """Atomically replace the snapshot with the given state and retire the journal it covers.
+
+        The caller must hold off new records until this returns; with
+        ``background`` that is only as long as copying the rows takes.
+        """
+        if self.read_only:
+            raise RuntimeError(f"Bookings journal in '{self.directory}' was opened read-only")
+        self.wait_for_snapshot()
+        with gc_paused():
+            rows = [[a["patient_name"], a["doctor_id"], a["day"], a["time_slot"]] for a in appointments]
+        self.sync()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self.previous_journal_path):
+                # The last snapshot failed, so its journal is still needed: keep both
+                with open(self.journal_path, "rb") as src, open(self.previous_journal_path, "ab") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.previous_journal_path)
+        self.records_since_snapshot = 0
+        if background:
+            self._snapshot_thread = threading.Thread(target=self._write_snapshot_file, args=(rows,),
+                                                     name="booking-snapshot", daemon=True)
+            self._snapshot_thread.start()
+        else:
+            self._write_snapshot_file(rows)
+
+    def _write_snapshot_file(self, rows: List[List[str]]) -> None:
+        try:
+            with gc_paused():
+                # dumps uses the C encoder; json.dump streams through the pure-Python one
+                data = json.dumps({"version": 1, "appointments": rows}, separators=(",", ":"))
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            if os.path.exists(self.previous_journal_path):
+                os.remove(self.previous_journal_path)
+        except OSError as e:
+            # The previous journal stays in place, so nothing is lost; the next snapshot retries
+            logging.error(f"Writing booking snapshot failed: {e}")
+            return
+        logging.info(f"Wrote booking snapshot with {len(rows)} appointments.")
+
+    def wait_for_snapshot(self) -> None:
+        """Block until a background snapshot write has finished"""
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def close(self) -> None:
+        self.sync()
+        self.wait_for_snapshot()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
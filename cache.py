@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """Bounded in-memory cache with LRU eviction and a per-entry TTL"""
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class DiskCache:
+    """Content-addressed file cache with LRU eviction and TTL, persisted across runs.
+
+    Entries are stored as <sha256>.<suffix> under ``directory``. The file
+    mtime records when an entry was written (for the TTL) and the atime is
+    bumped on every hit (for the LRU order), so the order survives restarts.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 500, ttl: Optional[float] = None, suffix: str = "bin"):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for filename in os.listdir(directory):
+            if filename.endswith("." + suffix):
+                stat = os.stat(os.path.join(directory, filename))
+                entries.append((stat.st_atime, filename[:-len(suffix) - 1]))
+        self._order: "OrderedDict[str, None]" = OrderedDict((key, None) for _, key in sorted(entries))
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{self.suffix}")
+
+    def get_path(self, key: str) -> Optional[str]:
+        """Return the path of a live cached entry, or None on a miss"""
+        with self._lock:
+            path = self.path_for(key)
+            if key in self._order:
+                try:
+                    mtime = os.stat(path).st_mtime
+                    if self.ttl is None or time.time() - mtime < self.ttl:
+                        os.utime(path, (time.time(), mtime))
+                        self._order.move_to_end(key)
+                        self.hits += 1
+                        return path
+                    os.remove(path)
+                except OSError:
+                    pass
+                del self._order[key]
+            self.misses += 1
+            return None
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.get_path(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def set(self, key: str, data: bytes) -> str:
+        """Store data under key and return its path"""
+        with self._lock:
+            path = self.path_for(key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._order[key] = None
+            self._order.move_to_end(key)
+            while len(self._order) > self.max_entries:
+                old_key, _ = self._order.popitem(last=False)
+                try:
+                    os.remove(self.path_for(old_key))
+                except OSError:
+                    pass
+            return path
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._order),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,77 +1,362 @@
-import openai
+import datetime
 import json
-from typing import Dict, Any, Optional
-from config import OPENAI_API_KEY, OPENAI_MODEL, DOCTORS
+import re
+import time
+from typing import Dict, Any, Optional, Tuple, List, Iterator
+from config import OPENAI_MODEL, CACHE_CONFIG, PROMPT_TOKEN_BUDGET
+from cache import LRUCache
+from conversation_memory import ConversationMemory
+from openai_client import get_client, call_with_retries, hedged
+from tracing import tracer
+from doctor_directory import get_directory
+
+BOOKING_FIELDS = ["patient_name", "doctor_preference", "day_preference", "time_preference"]
+ERROR_REPLY = "Sorry, there was an error communicating with ChatGPT"
+
+# Structured output for the single-call mode: booking fields plus the spoken reply
+BOOKING_TURN_SCHEMA = {
+    "name": "booking_turn",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            **{field: {"type": ["string", "null"]} for field in BOOKING_FIELDS},
+            "reply": {"type": "string"}
+        },
+        "required": BOOKING_FIELDS + ["reply"],
+        "additionalProperties": False
+    }
+}
+SINGLE_CALL_INSTRUCTIONS = (
+    "For every user message, extract patient_name, doctor_preference, day_preference "
+    "and time_preference (null when not mentioned) and write your spoken reply in 'reply'. "
+    "Give day_preference as a YYYY-MM-DD date for specific or relative days, otherwise a weekday name."
+)
+_REPLY_KEY = re.compile(r'"reply"\s*:\s*"')
+
+def _json_string_prefix(raw: str) -> Tuple[str, bool]:
+    """Decode the body of a JSON string that may still be arriving; returns (text so far, closed)"""
+    i = 0
+    while i < len(raw):
+        if raw[i] == '"':
+            return json.loads(f'"{raw[:i]}"'), True
+        if raw[i] == "\\":
+            width = 2
+            if raw[i + 1:i + 2] == "u":
+                # A high surrogate is only decodable together with the low one after it
+                width = 12 if raw[i + 2:i + 4].lower() in ("d8", "d9", "da", "db") else 6
+            if i + width > len(raw):
+                break  # escape sequence still arriving
+            i += width
+        else:
+            i += 1
+    return json.loads(f'"{raw[:i]}"'), False
+
+# Extraction depends only on the utterance and the date, so every session shares one cache
+_extraction_cache = LRUCache(CACHE_CONFIG["extraction_size"], CACHE_CONFIG["extraction_ttl"])
 
 class ChatGPTHandler:
-    def __init__(self):
-        if not OPENAI_API_KEY:
-            raise EnvironmentError("OPENAI_API_KEY not found in config. Please set your OpenAI API key.")
-        self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        self.conversation_history = []
-        self.system_prompt = self._create_system_prompt()
-
-    def _create_system_prompt(self) -> str:
+    def __init__(self, client: Any = None, extraction_cache: Optional[LRUCache] = None):
+        self._client = client
+        self.memory = ConversationMemory(PROMPT_TOKEN_BUDGET)
+        self.prompt_token_log: List[Dict[str, Any]] = []
+        self.llm_calls = 0
+        self._prompt_date: Optional[datetime.date] = None
+        self._system_prompt = ""
+        self.extraction_cache = extraction_cache if extraction_cache is not None else _extraction_cache
+
+    @property
+    def client(self) -> Any:
+        # Resolved on first use so constructing the handler doesn't import the OpenAI SDK
+        return self._client if self._client is not None else get_client()
+
+    @property
+    def system_prompt(self) -> str:
+        # Rebuilt when the date changes so "today" stays right in sessions that span midnight
+        today = datetime.date.today()
+        if today != self._prompt_date:
+            self._system_prompt = self._create_system_prompt(today)
+            self._prompt_date = today
+        return self._system_prompt
+
+    def _create_system_prompt(self, today: datetime.date) -> str:
         """Create the system prompt with doctor information"""
-        doctors_info = []
-        for doc_id, info in DOCTORS.items():
-            doctors_info.append(
-                f"{info['name']} ({info['specialty']}): {', '.join(info['days'])} {info['hours'][0]}:00-{info['hours'][1]}:00"
-            )
+        # Large rosters are summarized per specialty to keep the prompt small
+        doctors_info = get_directory().summary()
         return (
             "You are a helpful medical appointment scheduler. "
+            f"Today is {today.strftime('%A')}, {today.isoformat()}. "
             "Here are the available doctors and their schedules:\n" +
             "\n".join(doctors_info)
         )
 
-    def get_response(self, user_input: str, context: Dict[str, Any] = None) -> str:
-        # Limit conversation history to last 10 messages
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
-        messages = [{"role": "system", "content": self.system_prompt}]
-        for msg in self.conversation_history:
-            messages.append(msg)
-        messages.append({"role": "user", "content": user_input})
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        return self.memory.history
+
+    def _build_messages(self, user_input: str, context: Dict[str, Any] = None,
+                        instructions: Optional[str] = None) -> List[Dict[str, str]]:
+        live_context = None
+        if context:
+            self.memory.update_booking_state(context.get("current_booking"))
+            if context.get("availability"):
+                live_context = (
+                    "Current free appointment start times (only offer these, never guess):\n" +
+                    context["availability"]
+                )
+        return self.memory.build_messages(self.system_prompt, user_input, instructions, live_context)
+
+    def _record_usage(self, messages: List[Dict[str, str]], usage: Any) -> None:
+        """Log prompt tokens for the turn: our estimate, and the billed/cached counts when reported"""
+        self.llm_calls += 1
+        entry = {"estimated_prompt_tokens": self.memory.estimate_tokens(messages)}
+        if usage is not None:
+            entry["prompt_tokens"] = usage.prompt_tokens
+            details = getattr(usage, "prompt_tokens_details", None)
+            entry["cached_tokens"] = getattr(details, "cached_tokens", None) or 0
+        self.prompt_token_log.append(entry)
+
+    def usage_stats(self) -> Dict[str, Any]:
+        """Per-session prompt token totals"""
+        reported = [e for e in self.prompt_token_log if "prompt_tokens" in e]
+        prompt_tokens = sum(e["prompt_tokens"] for e in reported)
+        cached_tokens = sum(e["cached_tokens"] for e in reported)
+        return {
+            "turns": len(self.prompt_token_log),
+            "last_prompt_tokens": self.prompt_token_log[-1] if self.prompt_token_log else None,
+            "avg_prompt_tokens": prompt_tokens / len(reported) if reported else 0.0,
+            "cached_share": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            "evicted_messages": self.memory.evicted_turns
+        }
+
+    def get_response(self, user_input: str, context: Dict[str, Any] = None, remember: bool = True) -> str:
+        """Generate the conversational reply; with remember=False the caller commits it via remember_turn()"""
+        messages = self._build_messages(user_input, context)
         try:
-            response = self.client.chat.completions.create(
+            response = call_with_retries("chat", lambda timeout: self.client.chat.completions.create(
                 model=OPENAI_MODEL,
-                messages=messages
-            )
+                messages=messages,
+                timeout=timeout
+            ))
+            self._record_usage(messages, getattr(response, "usage", None))
             reply = response.choices[0].message.content.strip()
-            self.conversation_history.append({"role": "user", "content": user_input})
-            self.conversation_history.append({"role": "assistant", "content": reply})
+            if remember:
+                self.remember_turn(user_input, reply)
             return reply
         except Exception as e:
-            return f"Sorry, there was an error communicating with ChatGPT: {e}"
+            return f"{ERROR_REPLY}: {e}"
+
+    def stream_response(self, user_input: str, context: Dict[str, Any] = None, remember: bool = True) -> Iterator[str]:
+        """Like get_response, but yields the reply text as tokens arrive"""
+        messages = self._build_messages(user_input, context)
+        parts = []
+        usage = None
+        started = time.perf_counter()
+        try:
+            stream = call_with_retries("chat", lambda timeout: self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}},
+                timeout=timeout
+            ))
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        tracer.record("llm_first_token", time.perf_counter() - started)
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            if not parts:
+                yield f"{ERROR_REPLY}: {e}"
+            return
+        self._record_usage(messages, usage)
+        if remember:
+            self.remember_turn(user_input, "".join(parts).strip())
+
+    def get_response_with_extraction(self, user_input: str, context: Dict[str, Any] = None) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Extract booking fields and generate the reply in a single request.
+
+        Returns (extracted_info, reply), or None if the call or its output is
+        unusable so the caller can fall back to the two-call path. The turn is
+        not added to the history; call remember_turn() if the reply is used.
+        """
+        messages = self._build_messages(user_input, context, SINGLE_CALL_INSTRUCTIONS)
+        try:
+            response = call_with_retries("chat", lambda timeout: self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                response_format={"type": "json_schema", "json_schema": BOOKING_TURN_SCHEMA},
+                timeout=timeout
+            ))
+            self._record_usage(messages, getattr(response, "usage", None))
+            data = self._parse_json_object(response.choices[0].message.content)
+            if not data or not isinstance(data.get("reply"), str):
+                return None
+            reply = data.pop("reply").strip()
+            return self._validate_info(data), reply
+        except Exception:
+            return None
+
+    def stream_response_with_extraction(self, user_input: str, context: Dict[str, Any] = None
+                                        ) -> Optional[Tuple[Dict[str, Any], Iterator[str]]]:
+        """Streaming variant of get_response_with_extraction.
+
+        The schema puts the booking fields before ``reply``, so this returns
+        as soon as the reply starts: (extracted_info, reply chunks). The
+        caller can check the fields before speaking a word, and close the
+        iterator to drop the rest of the reply. If the model writes the reply
+        first, the whole object is read before returning. Returns None if the
+        request fails before the fields arrive, so the caller can fall back.
+        The turn is not added to the history.
+        """
+        messages = self._build_messages(user_input, context, SINGLE_CALL_INSTRUCTIONS)
+        started = time.perf_counter()
+        try:
+            stream = call_with_retries("chat", lambda timeout: self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                response_format={"type": "json_schema", "json_schema": BOOKING_TURN_SCHEMA},
+                stream=True,
+                extra_body={"stream_options": {"include_usage": True}},
+                timeout=timeout
+            ))
+            chunks = iter(stream)
+            content = ""
+            usage = None
+            reply_start = None
+            for chunk in chunks:
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content += chunk.choices[0].delta.content
+                    reply_start = _REPLY_KEY.search(content)
+                    if reply_start:
+                        break
+            prefix = content[:reply_start.start()].rstrip(" ,\n") if reply_start else ""
+            # Nothing before "reply" means the fields come after it
+            fields = self._parse_json_object(prefix + "}") if prefix.strip("{ \n") else None
+        except Exception:
+            return None
+        if not fields:
+            # Reply came first (or no reply at all): wait for the whole object
+            try:
+                for chunk in chunks:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        content += chunk.choices[0].delta.content
+            except Exception:
+                return None
+            self._record_usage(messages, usage)
+            data = self._parse_json_object(content)
+            if not data or not isinstance(data.get("reply"), str):
+                return None
+            reply = data.pop("reply").strip()
+            return self._validate_info(data), iter([reply])
+        tracer.record("llm_first_token", time.perf_counter() - started)
+
+        def reply_chunks() -> Iterator[str]:
+            nonlocal usage
+            raw = content[reply_start.end():]
+            emitted = 0
+            closed = False
+            try:
+                while True:
+                    if not closed:
+                        text, closed = _json_string_prefix(raw)
+                        if len(text) > emitted:
+                            yield text[emitted:]
+                            emitted = len(text)
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content and not closed:
+                        raw += chunk.choices[0].delta.content
+                self._record_usage(messages, usage)
+            except Exception as e:
+                if not emitted:
+                    yield f"{ERROR_REPLY}: {e}"
+            finally:
+                close = getattr(stream, "close", None)
+                if close:
+                    close()
+
+        return self._validate_info(fields), reply_chunks()
+
+    def remember_turn(self, user_input: str, reply: str) -> None:
+        self.memory.add("user", user_input)
+        self.memory.add("assistant", reply)
+
+    @staticmethod
+    def _parse_json_object(content: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parse a JSON object reply, tolerating prose around it"""
+        if not content:
+            return None
+        try:
+            data = json.loads(content)
+        except ValueError:
+            match = re.search(r"\{.*\}", content, re.DOTALL)
+            if not match:
+                return None
+            try:
+                data = json.loads(match.group())
+            except ValueError:
+                return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _validate_info(info: Dict[str, Any]) -> Dict[str, Any]:
+        # Resolve the spoken doctor name/specialty to a doctor id (None if unknown); a specialty
+        # several doctors share is kept as said so the scheduler can pick among them
+        if info.get("doctor_preference"):
+            directory = get_directory()
+            text = str(info["doctor_preference"])
+            info["doctor_preference"] = directory.resolve(text) or (text if directory.specialty_ids(text) else None)
+        return info
+
+    @staticmethod
+    def _normalize_utterance(user_input: str) -> str:
+        return " ".join(re.sub(r"[^\w\s:']", " ", user_input.lower()).split())
 
     def extract_appointment_info(self, user_input: str) -> Dict[str, Any]:
+        # Relative days ("tomorrow") resolve against today, so a cached answer only holds for one date
+        cache_key = (datetime.date.today().isoformat(), self._normalize_utterance(user_input))
+        cached = self.extraction_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
         # Use GPT to extract structured info
         try:
             prompt = (
                 f"{self.system_prompt}\n"
                 "Extract the following information from the user's message if available: "
                 "patient_name, doctor_preference, day_preference, time_preference. "
+                "Give day_preference as a YYYY-MM-DD date when the user names a specific date or "
+                "relative day (e.g. 'next Monday', 'tomorrow'), otherwise as a weekday name. "
                 "Return as a JSON object."
             )
-            response = self.client.chat.completions.create(
+            messages = [
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": user_input}
+            ]
+            # Latency-critical: hedge with a duplicate request if the first is slow
+            response = hedged("extract", lambda timeout: self.client.chat.completions.create(
                 model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": prompt},
-                    {"role": "user", "content": user_input}
-                ]
-            )
-            import json
-            import re
-            match = re.search(r"\{.*\}", response.choices[0].message.content, re.DOTALL)
-            if match:
-                info = json.loads(match.group())
-                # Validate doctor name
-                if info.get("doctor_preference") and info["doctor_preference"].lower() not in DOCTORS:
-                    info["doctor_preference"] = None
+                messages=messages,
+                timeout=timeout
+            ))
+            self.llm_calls += 1
+            info = self._parse_json_object(response.choices[0].message.content)
+            if info:
+                info = self._validate_info(info)
+                self.extraction_cache.set(cache_key, dict(info))
                 return info
             return {}
-        except Exception as e:
+        except Exception:
             return {}
 
     def reset_conversation(self):
-        self.conversation_history = []
\ No newline at end of file
+        self.memory.clear()
\ No newline at end of file
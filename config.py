@@ -6,8 +6,47 @@ load_dotenv()
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = "gpt-4o-mini"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = api.openai.com; set to a local stub for testing
+
+# Shared client: connection pool, retry/backoff and hedging
+OPENAI_CLIENT_CONFIG = {
+    "max_connections": 20,
+    "max_keepalive": 10,
+    "keepalive_expiry": 120.0,  # seconds
+    "connect_timeout": 3.0,
+    "max_retries": 2,
+    "backoff_base": 0.25,
+    "backoff_max": 2.0,
+    "hedging": True,            # send a duplicate of slow extraction requests (openai_client.hedged)
+    "hedge_after": 1.5,         # seconds after sending before the duplicate goes out
+    "warm_connections": 2       # connections opened by the start-up warm-up
+}
+
+# Per-operation deadlines in seconds (including retries)
+OPENAI_TIMEOUTS = {
+    "chat": 20.0,
+    "extract": 8.0,
+    "transcribe": 15.0,
+    "tts": 15.0
+}
+# Extract booking fields and reply in one structured request (falls back to two calls on failure).
+# With STREAMING_TTS the request is streamed: the fields arrive first, then the reply is spoken as it streams
+SINGLE_CALL_MODE = True
+# Minimum confidence for the local extractor to skip LLM extraction
+LOCAL_EXTRACTION_THRESHOLD = 0.85
+# Stream the reply and speak it sentence by sentence while the rest is generated
+STREAMING_TTS = True
+# Prompt token budget for chat history; older turns are folded into a summary
+PROMPT_TOKEN_BUDGET = 1200
+
+# Booking storage (journal + snapshot directory)
+BOOKINGS_DIR = os.getenv("BOOKINGS_DIR", "bookings")
 
 # Doctor schedules (20-minute slots)
+SLOT_MINUTES = 20
+# Days ahead for which free slots are indexed and offered
+AVAILABILITY_HORIZON_DAYS = 28
+
 DOCTORS = {
     "ali": {
         "name": "Dr. Ali",
@@ -29,8 +68,68 @@ DOCTORS = {
     }
 }
 
+# Optional roster file (JSON or CSV, see doctor_directory.load_roster) replacing the doctors above
+DOCTORS_FILE = os.getenv("DOCTORS_FILE")
+if DOCTORS_FILE:
+    from doctor_directory import load_roster
+    DOCTORS = load_roster(DOCTORS_FILE)
+
 # Grouped config for future scalability
 VOICE_CONFIG = {
-    "rate": 150,
-    "volume": 0.9
-}
\ No newline at end of file
+    "rate": 150,                    # local TTS (pyttsx3) words per minute
+    "volume": 0.9,
+    "local_tts": True,              # use pyttsx3 for short prompts when it is installed
+    "local_stt": True,              # use PocketSphinx for short yes/no answers when it is installed
+    "local_max_chars": 60,          # texts up to this long go to the fastest TTS engine
+    "local_stt_max_seconds": 1.5,   # recordings up to this long may use local recognition
+    "cloud_slow_seconds": 2.5,      # latency average above this takes a cloud engine out of rotation
+    "cloud_deadline": 4.0,          # cap on a cloud request when a local engine can take over
+    "cooldown": 30.0                # seconds before a failed or slow engine is preferred again
+}
+
+# Full-duplex audio engine (in-process playback, barge-in); False = CLI player + per-turn recording
+AUDIO_CONFIG = {
+    "full_duplex": True,
+    "input_rate": 16000,            # capture, what Whisper expects
+    "output_rate": 24000,           # OpenAI TTS WAV output
+    "frame_ms": 30,
+    "barge_in": True,
+    "barge_in_margin_db": 18.0,     # caller speech must exceed playback echo by this much
+    "pre_roll_ms": 250,
+    "decoded_prompts": 64           # decoded prompt buffers kept in memory
+}
+
+CACHE_CONFIG = {
+    "extraction_size": 512,
+    "extraction_ttl": 3600,         # seconds
+    "tts_dir": "tts_cache",
+    "tts_entries": 500,
+    "tts_ttl": 30 * 24 * 3600       # seconds
+}
+
+# Speculative turn work (turn_executor.py): LLM extraction and the reply run in parallel,
+# and slots/confirmation audio are prepared ahead of the next turn
+SPECULATION_CONFIG = {
+    "enabled": True,
+    "workers": 8,                   # shared pool for look-ahead speculation (turn work and replies use the turn pool)
+    "max_inflight": 3,              # speculations running at once per session
+    "max_waste_ratio": 0.6,         # stop speculating on a kind once more of it is thrown away
+    "min_samples": 5                # outcomes seen before the waste cap applies
+}
+
+# Slot bitmap shared by several scheduler processes (shared_slots.py)
+SHARED_SLOTS_CONFIG = {
+    "days": 366,                    # dates covered from the day the map is created
+    "shards": 64                    # process-shared locks; a claim locks one shard
+}
+
+# Multi-caller session server (session_server.py)
+SERVER_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "max_sessions": 500,
+    "llm_concurrency": 64,
+    "stt_concurrency": 32,
+    "tts_concurrency": 32,
+    "idle_timeout": 300  # seconds
+}
@@ -0,0 +1,117 @@
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding: Any = None
+_encoding_lock = threading.Lock()
+
+def load_tokenizer() -> Any:
+    """Load the tiktoken encoding once per process (slow: reads the BPE ranks); None if unavailable"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _encoding = False
+    return _encoding or None
+
+def default_count_tokens(text: str) -> int:
+    """Use tiktoken when installed, otherwise the usual ~4 characters per token estimate"""
+    encoding = load_tokenizer()
+    return len(encoding.encode(text)) if encoding else len(text) // 4 + 1
+
+class ConversationMemory:
+    """Token-budgeted chat history with a rolling summary of older turns.
+
+    Messages are laid out as [static system prompt, mode instructions,
+    summary, recent turns, live context, user message]: the static part never
+    changes during a call, so provider-side prompt caching can reuse it, and
+    the availability snapshot that changes every turn comes last. When the
+    prompt would exceed ``token_budget`` the oldest turns are evicted and
+    folded into the summary, which holds the booking state collected so far
+    and the gist of what the caller said earlier.
+    """
+
+    def __init__(self, token_budget: int = 1200, count_tokens: Optional[Callable[[str], int]] = None,
+                 summary_utterances: int = 4, utterance_chars: int = 120):
+        self.token_budget = token_budget
+        # The tokenizer is loaded on the first count (or by the start-up warm-up), not here
+        self.count_tokens = count_tokens or default_count_tokens
+        self.summary_utterances = summary_utterances
+        self.utterance_chars = utterance_chars
+        self.turns: "deque[Dict[str, Any]]" = deque()
+        self.booking_state: Dict[str, Any] = {}
+        self.earlier_utterances: "deque[str]" = deque(maxlen=summary_utterances)
+        self.evicted_turns = 0
+
+    def _message_tokens(self, content: str) -> int:
+        return self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def add(self, role: str, content: str) -> None:
+        self.turns.append({"role": role, "content": content, "tokens": self._message_tokens(content)})
+
+    def update_booking_state(self, booking_state: Optional[Dict[str, Any]]) -> None:
+        if booking_state is not None:
+            self.booking_state = {k: v for k, v in booking_state.items() if v}
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.earlier_utterances.clear()
+        self.booking_state = {}
+        self.evicted_turns = 0
+
+    @property
+    def history(self) -> List[Dict[str, str]]:
+        return [{"role": turn["role"], "content": turn["content"]} for turn in self.turns]
+
+    def summary(self) -> str:
+        if not self.evicted_turns:
+            return ""
+        parts = [f"Summary of the {self.evicted_turns} earlier messages in this call."]
+        if self.booking_state:
+            state = ", ".join(f"{key}={value}" for key, value in self.booking_state.items())
+            parts.append(f"Booking details collected so far: {state}.")
+        if self.earlier_utterances:
+            parts.append("Earlier the caller said: " + " | ".join(self.earlier_utterances))
+        return " ".join(parts)
+
+    def _evict_oldest(self) -> None:
+        turn = self.turns.popleft()
+        self.evicted_turns += 1
+        if turn["role"] == "user":
+            self.earlier_utterances.append(turn["content"][:self.utterance_chars])
+
+    def build_messages(self, system_prompt: str, user_input: str, instructions: Optional[str] = None,
+                       live_context: Optional[str] = None) -> List[Dict[str, str]]:
+        """Assemble the prompt, evicting old turns into the summary to stay within budget"""
+        prefix = [{"role": "system", "content": system_prompt}]
+        if instructions:
+            prefix.append({"role": "system", "content": instructions})
+        fixed = sum(self._message_tokens(m["content"]) for m in prefix) + self._message_tokens(user_input)
+        if live_context:
+            fixed += self._message_tokens(live_context)
+        while self.turns:
+            summary = self.summary()
+            used = fixed + sum(turn["tokens"] for turn in self.turns)
+            if summary:
+                used += self._message_tokens(summary)
+            if used <= self.token_budget:
+                break
+            self._evict_oldest()
+        messages = list(prefix)
+        summary = self.summary()
+        if summary:
+            messages.append({"role": "system", "content": summary})
+        messages.extend(self.history)
+        if live_context:
+            messages.append({"role": "system", "content": live_context})
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self._message_tokens(m["content"]) for m in messages)
@@ -0,0 +1,214 @@
+import csv
+import json
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Spoken names for specialties that don't share a stem with the specialty itself
+SPECIALTY_ALIASES = {
+    "gp": "general medicine",
+    "general practitioner": "general medicine",
+    "family doctor": "general medicine",
+    "kids doctor": "pediatrics",
+    "children's doctor": "pediatrics",
+    "heart doctor": "cardiology",
+    "skin doctor": "dermatology",
+}
+
+TITLE_WORDS = {"dr", "doctor", "the"}
+
+# Longest first; "surgeon"/"surgery"/"surgical" -> "surg", "cardiology"/"cardiologist"/"cardiac" -> "cardi"
+SPECIALTY_SUFFIXES = ("ologist", "ology", "ician", "ical", "ics", "ist", "eon", "ery", "ic", "ac", "al", "y", "s")
+
+def load_roster(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load doctors from JSON or CSV into the DOCTORS dict format.
+
+    JSON: either {id: {name, specialty, days, hours}} or a list of records
+    with an "id". CSV columns: id, name, specialty, days (separated by ';'),
+    start_hour, end_hour.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            records = [
+                {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "specialty": row["specialty"],
+                    "days": row["days"].split(";"),
+                    "hours": (int(row["start_hour"]), int(row["end_hour"]))
+                }
+                for row in csv.DictReader(f)
+            ]
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = [dict(info, id=doc_id) for doc_id, info in data.items()] if isinstance(data, dict) else data
+    doctors = {}
+    for record in records:
+        doc_id = str(record["id"]).strip().lower()
+        days = [day.strip().lower() for day in record["days"] if day.strip()]
+        unknown = [day for day in days if day not in WEEKDAYS]
+        if unknown:
+            raise ValueError(f"Doctor '{doc_id}' has unknown days: {unknown}")
+        start_hour, end_hour = (int(hour) for hour in record["hours"])
+        doctors[doc_id] = {
+            "name": record["name"],
+            "specialty": record["specialty"],
+            "days": days,
+            "hours": (start_hour, end_hour)
+        }
+    return doctors
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z]+", text.lower()) if t not in TITLE_WORDS]
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _specialty_stem(word: str) -> str:
+    word = word.lower()
+    for suffix in SPECIALTY_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            word = word[:-len(suffix)]
+            break
+    return word[:6]
+
+def soundex(token: str) -> str:
+    """American Soundex code, used to match names Whisper spells differently"""
+    codes = {c: d for d, letters in {"1": "bfpv", "2": "cgjkqsxz", "3": "dt", "4": "l", "5": "mn", "6": "r"}.items()
+             for c in letters}
+    token = token.lower()
+    if not token:
+        return ""
+    result = token[0].upper()
+    previous = codes.get(token[0], "")
+    for char in token[1:]:
+        code = codes.get(char, "")
+        if code and code != previous:
+            result += code
+        if char not in "hw":
+            previous = code
+    return (result + "000")[:4]
+
+class DoctorDirectory:
+    """Indexed doctor roster: by specialty, weekday, exact name token and fuzzy name.
+
+    Fuzzy name lookup goes through a character-trigram index over name
+    tokens (scored by Dice coefficient) with a Soundex index as a second
+    signal, so lookups only touch doctors sharing trigrams with the query.
+    """
+
+    def __init__(self, doctors: Dict[str, Dict[str, Any]], min_score: float = 0.5):
+        self.doctors = doctors
+        self.min_score = min_score
+        self.by_specialty: Dict[str, Set[str]] = {}
+        self.by_weekday: Dict[str, Set[str]] = {day: set() for day in WEEKDAYS}
+        self.by_token: Dict[str, Set[str]] = {}
+        self.by_trigram: Dict[str, Set[str]] = {}
+        self.by_soundex: Dict[str, Set[str]] = {}
+        for doc_id, info in doctors.items():
+            self._index(doc_id, info)
+
+    def _index(self, doc_id: str, info: Dict[str, Any]) -> None:
+        for word in _tokens(info["specialty"]):
+            if len(word) >= 5:
+                self.by_specialty.setdefault(_specialty_stem(word), set()).add(doc_id)
+        for day in info["days"]:
+            self.by_weekday[day].add(doc_id)
+        for token in set(_tokens(info["name"])) | {doc_id}:
+            self.by_token.setdefault(token, set()).add(doc_id)
+            for trigram in _trigrams(token):
+                self.by_trigram.setdefault(trigram, set()).add(token)
+            self.by_soundex.setdefault(soundex(token), set()).add(token)
+
+    def doctors_on(self, weekday: str) -> Set[str]:
+        return self.by_weekday.get(weekday.lower(), set())
+
+    def specialty_ids(self, text: str) -> Set[str]:
+        """Doctors whose specialty matches the most words or aliases in text
+        ("cardiologist", "heart doctor", "orthopedic surgeon")"""
+        text = text.lower()
+        for alias, specialty in SPECIALTY_ALIASES.items():
+            text = re.sub(rf"\b{re.escape(alias)}\b", specialty, text)
+        matches: Counter = Counter()
+        for word in set(re.findall(r"[a-z]+", text)):
+            if len(word) >= 5:
+                matches.update(self.by_specialty.get(_specialty_stem(word), ()))
+        best = max(matches.values(), default=0)
+        return {doc_id for doc_id, count in matches.items() if count == best}
+
+    def token_ids(self, token: str) -> Set[str]:
+        """Doctors with an exact name token or id match"""
+        return self.by_token.get(token.lower(), set())
+
+    def _fuzzy_token(self, token: str) -> Dict[str, float]:
+        """Score indexed name tokens similar to token"""
+        grams = _trigrams(token)
+        overlap: Counter = Counter()
+        for gram in grams:
+            for candidate in self.by_trigram.get(gram, ()):
+                overlap[candidate] += 1
+        code = soundex(token)
+        scores = {}
+        for candidate, shared in overlap.items():
+            score = 2 * shared / (len(grams) + len(_trigrams(candidate)))
+            if candidate in self.by_soundex.get(code, ()):
+                score = min(1.0, score + 0.15)
+            if score >= self.min_score:
+                scores[candidate] = score
+        return scores
+
+    def resolve(self, text: Optional[str]) -> Optional[str]:
+        """Best doctor id for a spoken name/id ("Dr Sarah", "sara") or specialty, None if unknown or ambiguous.
+
+        A specialty several doctors share is ambiguous here; callers narrow
+        it with specialty_ids() (see SmartAppointmentScheduler).
+        """
+        if not text:
+            return None
+        text = str(text).strip().lower()
+        if text in self.doctors:
+            return text
+        # Each query token adds its best match score (exact = 1.0) to every doctor it matches
+        scores: Counter = Counter()
+        for token in _tokens(text):
+            matches = dict.fromkeys(self.token_ids(token), 1.0)
+            if not matches:
+                for candidate, score in self._fuzzy_token(token).items():
+                    for doc_id in self.by_token[candidate]:
+                        matches[doc_id] = max(matches.get(doc_id, 0.0), score)
+            for doc_id, score in matches.items():
+                scores[doc_id] += score
+        if not scores:
+            specialty = self.specialty_ids(text)
+            return next(iter(specialty)) if len(specialty) == 1 else None
+        ranked = scores.most_common(2)
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            return None
+        return ranked[0][0]
+
+    def specialties(self) -> List[str]:
+        return sorted({info["specialty"] for info in self.doctors.values()})
+
+    def summary(self, limit: int = 30) -> List[str]:
+        """One line per doctor, or per specialty once the roster is larger than limit"""
+        if len(self.doctors) <= limit:
+            return [
+                f"{info['name']} ({info['specialty']}): {', '.join(info['days'])} {info['hours'][0]}:00-{info['hours'][1]}:00"
+                for info in self.doctors.values()
+            ]
+        specialties = Counter(info["specialty"] for info in self.doctors.values())
+        return [f"{specialty}: {count} doctors" for specialty, count in specialties.most_common()]
+
+_directory: Optional[DoctorDirectory] = None
+
+def get_directory() -> DoctorDirectory:
+    """Shared directory over config.DOCTORS, built on first use"""
+    global _directory
+    from config import DOCTORS
+    if _directory is None or _directory.doctors is not DOCTORS or len(_directory.doctors) != len(DOCTORS):
+        _directory = DoctorDirectory(DOCTORS)
+    return _directory
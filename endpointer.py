@@ -0,0 +1,117 @@
+import wave
+from typing import Optional, Tuple
+import numpy as np
+
+def level_db(samples: np.ndarray) -> float:
+    """RMS level of int16 samples in dBFS (-90.3 for silence)"""
+    samples = np.asarray(samples, dtype=np.float64).reshape(-1)
+    rms = np.sqrt(np.mean(samples ** 2)) if samples.size else 0.0
+    return 20.0 * float(np.log10(max(rms, 1.0) / 32768.0))
+
+class EnergyEndpointer:
+    """Frame-energy voice activity detector that finds the end of an utterance.
+
+    Audio is fed in arbitrary-sized int16 chunks and cut into fixed frames.
+    The first ``calibration_ms`` of audio set the noise floor; a frame counts
+    as speech when its level is ``margin_db`` above that floor (and above
+    ``min_level_db``). Speech starts after ``min_speech_ms`` of consecutive
+    speech frames and the utterance ends after ``silence_ms`` of trailing
+    non-speech.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, silence_ms: int = 700,
+                 min_speech_ms: int = 120, calibration_ms: int = 240, margin_db: float = 12.0,
+                 min_level_db: float = -50.0):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.calibration_frames = max(1, calibration_ms // frame_ms)
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.reset()
+
+    def reset(self) -> None:
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._frames_seen = 0
+        self._calibration_levels = []
+        self.noise_floor_db: Optional[float] = None
+        self._speech_run = 0
+        self._silence_run = 0
+        self.speech_start: Optional[int] = None  # sample index
+        self.speech_end: Optional[int] = None  # sample index
+        self.done = False
+
+    @property
+    def speech_started(self) -> bool:
+        return self.speech_start is not None
+
+    def _frame_levels(self, frames: np.ndarray) -> np.ndarray:
+        rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+        return 20.0 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+
+    def process(self, samples: np.ndarray, min_level_db: Optional[float] = None) -> bool:
+        """Feed int16 samples; returns True once the end of speech has been detected.
+
+        ``min_level_db`` raises the speech threshold for just these samples
+        (e.g. to stay above echo of audio being played).
+        """
+        if self.done:
+            return True
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        data = np.concatenate([self._pending, samples]) if self._pending.size else samples
+        n_frames = data.size // self.frame_size
+        self._pending = data[n_frames * self.frame_size:].copy()
+        if not n_frames:
+            return False
+        levels = self._frame_levels(data[:n_frames * self.frame_size].reshape(n_frames, self.frame_size))
+        floor_db = self.min_level_db if min_level_db is None else max(self.min_level_db, min_level_db)
+        for level in levels:
+            frame_index = self._frames_seen
+            self._frames_seen += 1
+            if self.noise_floor_db is None:
+                self._calibration_levels.append(level)
+                if len(self._calibration_levels) < self.calibration_frames:
+                    continue
+                self.noise_floor_db = float(np.median(self._calibration_levels))
+            is_speech = level >= max(self.noise_floor_db + self.margin_db, floor_db)
+            if not self.speech_started:
+                self._speech_run = self._speech_run + 1 if is_speech else 0
+                if self._speech_run >= self.min_speech_frames:
+                    self.speech_start = (frame_index - self._speech_run + 1) * self.frame_size
+            elif is_speech:
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+                if self._silence_run >= self.silence_frames:
+                    self.speech_end = (frame_index - self._silence_run + 1) * self.frame_size
+                    self.done = True
+                    return True
+        return False
+
+    def detect(self, samples: np.ndarray, chunk_size: int = 1024) -> Optional[Tuple[int, int]]:
+        """Run over a whole recording in streaming-sized chunks; returns (start, end) sample indices"""
+        self.reset()
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        for offset in range(0, samples.size, chunk_size):
+            if self.process(samples[offset:offset + chunk_size]):
+                break
+        if not self.speech_started:
+            return None
+        return self.speech_start, self.speech_end if self.speech_end is not None else samples.size
+
+    @classmethod
+    def detect_wav(cls, path: str, **kwargs) -> Optional[Tuple[float, float]]:
+        """Detect speech in a mono 16-bit WAV fixture; returns (start, end) in seconds"""
+        with wave.open(path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError("Expected 16-bit PCM WAV")
+            sample_rate = wav_file.getframerate()
+            samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+            if wav_file.getnchannels() > 1:
+                samples = samples[::wav_file.getnchannels()]
+        endpointer = cls(sample_rate=sample_rate, **kwargs)
+        span = endpointer.detect(samples)
+        if span is None:
+            return None
+        return span[0] / sample_rate, span[1] / sample_rate
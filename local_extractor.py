@@ -0,0 +1,168 @@
+import re
+import time
+from typing import Dict, Any, Optional, Tuple
+from appointment_manager import normalize_time
+from doctor_directory import get_directory
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Words that carry no booking information; an utterance made only of these
+# plus recognised fields can be handled without the LLM.
+FILLER_WORDS = {
+    "a", "an", "and", "the", "i", "i'd", "id", "me", "my", "is", "am", "i'm", "im", "it", "this",
+    "hi", "hello", "hey", "please", "yes", "yeah", "ok", "okay", "sure", "thanks", "thank", "you",
+    "with", "on", "at", "for", "to", "see", "book", "booking", "appointment", "schedule",
+    "like", "would", "want", "need", "can", "could", "get", "make", "name", "name's", "dr", "doctor",
+    "around", "about", "let's", "lets", "do", "go", "be", "fine", "good", "great", "that", "works",
+}
+
+NAME_STOP_WORDS = FILLER_WORDS | {
+    "looking", "calling", "trying", "here", "not", "going", "available", "interested", "free",
+    "booked", "sick", "new", "just", "also", "so", "well", "sorry",
+}
+
+# Words whose meaning the patterns don't capture (relative dates, vague times,
+# corrections); their presence always defers to the LLM.
+AMBIGUOUS_WORDS = {
+    "morning", "afternoon", "evening", "noon", "weekend", "today", "tomorrow", "next", "after",
+    "before", "earlier", "later", "not", "no", "don't", "dont", "cancel", "change", "instead", "but",
+}
+
+class LocalExtractor:
+    """Deterministic extractor for utterances that don't need the LLM.
+
+    Weekday and time patterns are compiled once; doctor names and
+    specialties are exact token lookups in the doctor directory. parse()
+    returns the extracted fields and a confidence score: the share of words
+    in the utterance explained by a recognised field or filler word (zero if
+    it has ambiguous words or an unexplained number). extract() only returns
+    a result when that score reaches the threshold and keeps hit-rate
+    metrics.
+
+    Many first names are also doctor names, so context decides what a bare
+    name means. Right after the app asked for the caller's name
+    (``expecting="patient_name"``) it is the patient's name. A doctor
+    already chosen is only replaced when the utterance says "dr"/"doctor".
+    """
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self.day_pattern = re.compile(r"\b(" + "|".join(WEEKDAYS) + r")\b")
+        self.time_pattern = re.compile(
+            r"\b(?:at\s+)?(\d{1,2}(?:[:.]\d{2})?\s*[ap]\.?m\.?|\d{1,2}:\d{2})(?!\w)"
+        )
+        self.name_pattern = re.compile(
+            r"\b(?:my name is|my name's|name is|i am|i'm|im|this is)\s+([a-z]+)(?:\s+([a-z]+))?"
+        )
+        self.attempts = 0
+        self.hits = 0
+        self.local_seconds = 0.0
+        self.llm_calls_skipped = 0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+
+    def parse(self, user_input: str, expecting: Optional[str] = None,
+              context: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], float]:
+        """Extract booking fields locally and score how fully the utterance was understood.
+
+        ``expecting`` is the field the app last asked for and ``context`` the
+        booking fields known so far.
+        """
+        text = user_input.lower().strip()
+        info: Dict[str, Any] = {}
+        spans = []
+        directory = get_directory()
+        tokens = list(re.finditer(r"[a-z0-9']+", text))
+        doctor_cue = any(w.group() in ("dr", "doctor") for w in tokens)
+
+        name_match = self.name_pattern.search(text)
+        if name_match and name_match.group(1) not in NAME_STOP_WORDS:
+            words = [name_match.group(1)]
+            end = name_match.end(1)
+            if name_match.group(2) and name_match.group(2) not in NAME_STOP_WORDS and name_match.group(2) not in WEEKDAYS:
+                words.append(name_match.group(2))
+                end = name_match.end(2)
+            info["patient_name"] = " ".join(words).title()
+            spans.append((name_match.start(1), end))
+        elif expecting == "patient_name" and not doctor_cue:
+            # Answer to "what's your name?": "ali", "sara khan"
+            rest = [w for w in tokens if w.group() not in FILLER_WORDS]
+            if 1 <= len(rest) <= 2 and all(
+                w.group().isalpha() and w.group() not in NAME_STOP_WORDS and w.group() not in WEEKDAYS
+                and w.group() not in AMBIGUOUS_WORDS and not directory.specialty_ids(w.group())
+                for w in rest
+            ):
+                info["patient_name"] = " ".join(w.group() for w in rest).title()
+                spans.extend(w.span() for w in rest)
+
+        # Every name/specialty word narrows the candidate doctors ("dr sara", "the cardiologist")
+        candidates = None
+        doctor_spans = []
+        for m in re.finditer(r"[a-z]+", text):
+            token = m.group()
+            if token in FILLER_WORDS or token in WEEKDAYS or any(s <= m.start() < e for s, e in spans):
+                continue
+            ids = directory.token_ids(token) or (directory.specialty_ids(token) if len(token) >= 5 else set())
+            if ids:
+                candidates = ids if candidates is None else candidates & ids
+                doctor_spans.append(m.span())
+        doctor_chosen = bool(context and context.get("doctor_preference"))
+        if candidates and len(candidates) == 1 and (doctor_cue or not doctor_chosen):
+            info["doctor_preference"] = next(iter(candidates))
+            spans.extend(doctor_spans)
+
+        days = {m.group(1) for m in self.day_pattern.finditer(text)}
+        if len(days) == 1:
+            info["day_preference"] = days.pop()
+            spans.extend(m.span() for m in self.day_pattern.finditer(text))
+
+        times = [m for m in self.time_pattern.finditer(text)]
+        if len(times) == 1:
+            normalized = normalize_time(times[0].group(1))
+            if normalized:
+                info["time_preference"] = normalized
+                spans.append(times[0].span())
+
+        if not info:
+            return info, 0.0
+        if any(w.group() in AMBIGUOUS_WORDS for w in tokens):
+            return info, 0.0
+        # A number no field accounts for ("at 10", an unparsed time) is a field the LLM must read
+        if any(any(c.isdigit() for c in w.group()) and not any(s <= w.start() < e for s, e in spans) for w in tokens):
+            return info, 0.0
+        explained = sum(
+            1 for w in tokens
+            if w.group() in FILLER_WORDS or any(s <= w.start() < e for s, e in spans)
+        )
+        return info, explained / len(tokens) if tokens else 0.0
+
+    def extract(self, user_input: str, expecting: Optional[str] = None,
+                context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Return locally extracted fields if confident enough, otherwise None"""
+        start = time.perf_counter()
+        info, confidence = self.parse(user_input, expecting, context)
+        self.local_seconds += time.perf_counter() - start
+        self.attempts += 1
+        if confidence >= self.threshold:
+            self.hits += 1
+            return info
+        return None
+
+    def record_llm_call(self, seconds: float) -> None:
+        """Record the latency of an LLM extraction call, used to estimate time saved"""
+        self.llm_calls += 1
+        self.llm_seconds += seconds
+
+    def record_skipped_call(self) -> None:
+        self.llm_calls_skipped += 1
+
+    def metrics(self) -> Dict[str, float]:
+        avg_llm = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.attempts if self.attempts else 0.0,
+            "avg_local_ms": 1000 * self.local_seconds / self.attempts if self.attempts else 0.0,
+            "llm_calls_skipped": self.llm_calls_skipped,
+            "estimated_ms_saved": 1000 * (self.llm_calls_skipped * avg_llm - self.local_seconds),
+        }
@@ -0,0 +1,156 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional, TypeVar
+from config import OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_CLIENT_CONFIG, OPENAI_TIMEOUTS, SERVER_CONFIG
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_client = None
+_client_lock = threading.Lock()
+# Every in-flight LLM call may be hedged, so room for two requests per concurrent call
+_hedge_pool = ThreadPoolExecutor(max_workers=2 * SERVER_CONFIG["llm_concurrency"], thread_name_prefix="openai-hedge")
+
+def get_client() -> Any:
+    """Return the process-wide OpenAI client shared by chat, Whisper and TTS.
+
+    The client sits on one pooled keep-alive httpx connection pool. SDK
+    retries are disabled because call_with_retries() applies our own
+    deadlines and jittered backoff. Set OPENAI_BASE_URL to point it at a
+    local stub server.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            import openai
+            if not OPENAI_API_KEY:
+                raise EnvironmentError("OPENAI_API_KEY not found in config. Please set your OpenAI API key.")
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_CLIENT_CONFIG["max_connections"],
+                    max_keepalive_connections=OPENAI_CLIENT_CONFIG["max_keepalive"],
+                    keepalive_expiry=OPENAI_CLIENT_CONFIG["keepalive_expiry"]
+                ),
+                timeout=httpx.Timeout(OPENAI_TIMEOUTS["chat"], connect=OPENAI_CLIENT_CONFIG["connect_timeout"])
+            )
+            _client = openai.OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                http_client=http_client,
+                max_retries=0
+            )
+        return _client
+
+def warm_connections(count: int = OPENAI_CLIENT_CONFIG["warm_connections"]) -> None:
+    """Open keep-alive connections (TLS handshake included) before the first real request.
+
+    Sends ``count`` concurrent model-list requests, which are cheap and not
+    billed, so each one leaves an open connection in the shared pool.
+    """
+    client = get_client()
+    timeout = OPENAI_CLIENT_CONFIG["connect_timeout"] * 2
+    futures = [_hedge_pool.submit(client.models.list, timeout=timeout) for _ in range(count)]
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            logging.debug(f"Connection warm-up request failed: {e}")
+
+def set_client(client: Any) -> None:
+    """Replace the shared client (e.g. with a fake backend); None resets to the default"""
+    global _client
+    with _client_lock:
+        _client = client
+
+def is_retryable(error: Exception) -> bool:
+    try:
+        import openai
+        if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+            return True
+    except ImportError:
+        pass
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS or isinstance(error, TimeoutError)
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with equal jitter"""
+    delay = min(OPENAI_CLIENT_CONFIG["backoff_max"], OPENAI_CLIENT_CONFIG["backoff_base"] * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def call_with_retries(operation: str, fn: Callable[[float], T], deadline: Optional[float] = None) -> T:
+    """Call fn(timeout) until it succeeds, retrying transient errors within the operation deadline.
+
+    Each attempt is given the time remaining until the deadline as its
+    request timeout, so the whole operation never exceeds OPENAI_TIMEOUTS.
+    """
+    deadline = deadline if deadline is not None else OPENAI_TIMEOUTS[operation]
+    expires = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        remaining = expires - time.monotonic()
+        try:
+            return fn(max(remaining, 0.1))
+        except Exception as e:
+            if attempt >= OPENAI_CLIENT_CONFIG["max_retries"] or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay >= expires:
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+def _cancel_hedge(future: Future) -> None:
+    """Drop a request that lost the race: unsent if it is still queued, else its response is
+    closed (releasing the pooled connection) as soon as it arrives"""
+    if future.cancel():
+        return
+
+    def close(done: Future) -> None:
+        if not done.cancelled() and done.exception() is None:
+            close_response = getattr(done.result(), "close", None)
+            if close_response:
+                close_response()
+
+    future.add_done_callback(close)
+
+def hedged(operation: str, fn: Callable[[float], T], hedge_after: Optional[float] = None) -> T:
+    """Like call_with_retries, but each attempt fires a duplicate request if the first
+    hasn't answered within hedge_after seconds of being sent and returns whichever
+    finishes first. The other request is cancelled (see _cancel_hedge). With
+    OPENAI_CLIENT_CONFIG["hedging"] off this is plain call_with_retries.
+    """
+    if not OPENAI_CLIENT_CONFIG["hedging"]:
+        return call_with_retries(operation, fn)
+    hedge_after = hedge_after if hedge_after is not None else OPENAI_CLIENT_CONFIG["hedge_after"]
+
+    def attempt(timeout: float) -> T:
+        expires = time.monotonic() + timeout
+        sent = threading.Event()
+
+        def first() -> T:
+            sent.set()
+            return fn(max(expires - time.monotonic(), 0.1))
+
+        futures = {_hedge_pool.submit(first)}
+        # Time spent waiting for a pool thread doesn't count towards hedge_after
+        sent.wait(timeout)
+        done, _ = wait(futures, timeout=max(0.0, min(hedge_after, expires - time.monotonic())))
+        if not done and time.monotonic() < expires:
+            futures.add(_hedge_pool.submit(lambda: fn(max(expires - time.monotonic(), 0.1))))
+        error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in (done - {future}) | futures:
+                        _cancel_hedge(loser)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    return call_with_retries(operation, attempt)
@@ -0,0 +1,119 @@
+"""Per-doctor utilization, idle-slot and peak-hour reports over the slot grid.
+
+Appointments are turned into index arrays once and every aggregate is a
+NumPy operation over a (doctor, date, slot) grid, so a report over a
+million bookings does not loop in Python. Run from the repository root:
+    python reports.py --start 2026-10-19 --days 28 [--json]
+"""
+import argparse
+import datetime
+import json
+import logging
+from typing import Dict, Any, Iterable, List, Optional
+import numpy as np
+from config import DOCTORS, SLOT_MINUTES, BOOKINGS_DIR
+from availability import WEEKDAYS, slot_grid
+
+def _minutes(times: List[str]) -> np.ndarray:
+    """Minutes since midnight for HH:MM strings, decoded from the UCS-4 code points"""
+    digits = np.array(times, dtype="U5").view(np.uint32).reshape(-1, 5).astype(np.int64) - ord("0")
+    return (digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]
+
+class SlotGrid:
+    """Booked and bookable slots as boolean (doctor, date, slot) arrays over [start, start + days)"""
+
+    def __init__(self, appointments: Iterable[Dict[str, Any]], start: datetime.date, days: int,
+                 doctor_ids: Optional[List[str]] = None):
+        self.doctor_ids = sorted(doctor_ids or DOCTORS)
+        self.start = start
+        self.days = days
+        grid_sizes = np.array([len(slot_grid(doc_id)) for doc_id in self.doctor_ids])
+        self.start_minutes = np.array([DOCTORS[doc_id]["hours"][0] * 60 for doc_id in self.doctor_ids])
+        self.width = int(grid_sizes.max()) if len(grid_sizes) else 0
+        works = np.array([[day in DOCTORS[doc_id]["days"] for day in WEEKDAYS] for doc_id in self.doctor_ids],
+                         dtype=bool).reshape(len(self.doctor_ids), 7)
+        self.weekdays = (start.weekday() + np.arange(days)) % 7
+        in_hours = np.arange(self.width)[None, :] < grid_sizes[:, None]
+        self.capacity = works[:, self.weekdays][:, :, None] & in_hours[:, None, :]
+        self.booked = np.zeros_like(self.capacity)
+        self._fill(list(appointments))
+
+    def _fill(self, appointments: List[Dict[str, Any]]) -> None:
+        # Only date-keyed bookings can be placed on the grid; legacy weekday keys are skipped
+        rows = [a for a in appointments if len(a["day"]) == 10 and a["doctor_id"] in DOCTORS]
+        if not rows or not self.doctor_ids:
+            return
+        ids = np.array(self.doctor_ids)
+        doctors = np.array([a["doctor_id"] for a in rows])
+        doctor_index = np.searchsorted(ids, doctors).clip(0, len(ids) - 1)
+        known = ids[doctor_index] == doctors
+        date_index = (np.array([a["day"] for a in rows], dtype="datetime64[D]")
+                      - np.datetime64(self.start.isoformat(), "D")).astype(np.int64)
+        offset = _minutes([a["time_slot"] for a in rows]) - self.start_minutes[doctor_index]
+        slot_index = offset // SLOT_MINUTES
+        valid = (known & (date_index >= 0) & (date_index < self.days) & (offset >= 0)
+                 & (offset % SLOT_MINUTES == 0) & (slot_index < self.width))
+        self.booked[doctor_index[valid], date_index[valid], slot_index[valid]] = True
+        self.booked &= self.capacity
+
+    def utilization(self) -> np.ndarray:
+        """Booked share of bookable slots per doctor"""
+        capacity = self.capacity.sum(axis=(1, 2))
+        return np.divide(self.booked.sum(axis=(1, 2)), capacity, out=np.zeros(len(capacity)), where=capacity > 0)
+
+    def idle_slots(self) -> np.ndarray:
+        """Free bookable slots per doctor and slot of the day, summed over dates: (doctor, slot)"""
+        return (self.capacity & ~self.booked).sum(axis=1)
+
+    def peak_hour_heatmap(self) -> np.ndarray:
+        """Bookings per doctor, weekday and hour of day: (doctor, 7, 24)"""
+        doctor_index, date_index, slot_index = np.nonzero(self.booked)
+        hours = (self.start_minutes[doctor_index] + slot_index * SLOT_MINUTES) // 60
+        heatmap = np.zeros((len(self.doctor_ids), 7, 24), dtype=np.int64)
+        np.add.at(heatmap, (doctor_index, self.weekdays[date_index], hours), 1)
+        return heatmap
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        utilization = self.utilization()
+        idle = self.idle_slots()
+        heatmap = self.peak_hour_heatmap()
+        booked = self.booked.sum(axis=(1, 2))
+        capacity = self.capacity.sum(axis=(1, 2))
+        by_hour = heatmap.sum(axis=1)
+        result = {}
+        for i, doc_id in enumerate(self.doctor_ids):
+            grid = slot_grid(doc_id)
+            result[doc_id] = {
+                "booked": int(booked[i]),
+                "capacity": int(capacity[i]),
+                "utilization": round(float(utilization[i]), 4),
+                "idle_slots": int(idle[i].sum()),
+                "most_idle_slot": grid[int(idle[i, :len(grid)].argmax())] if capacity[i] else None,
+                "peak_hour": f"{int(by_hour[i].argmax()):02d}:00" if booked[i] else None,
+                "heatmap": {WEEKDAYS[day]: heatmap[i, day].tolist() for day in range(7) if heatmap[i, day].any()}
+            }
+        return result
+
+def utilization_report(appointments: Iterable[Dict[str, Any]], start: datetime.date, days: int) -> Dict[str, Dict[str, Any]]:
+    return SlotGrid(appointments, start, days).report()
+
+def main(argv: Optional[list] = None) -> None:
+    from appointment_manager import AppointmentManager
+    from booking_store import BookingJournal
+    parser = argparse.ArgumentParser(description="Doctor utilization report")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date.today())
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--json", action="store_true", help="print the full report, including heatmaps, as JSON")
+    args = parser.parse_args(argv)
+    manager = AppointmentManager(store=BookingJournal(BOOKINGS_DIR, read_only=True))
+    report = utilization_report(manager.appointments, args.start, args.days)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for doc_id, row in report.items():
+        print(f"{DOCTORS[doc_id]['name']:<24} {row['booked']:>7}/{row['capacity']:<7} "
+              f"{row['utilization']:>7.1%}  idle {row['idle_slots']:>6}  peak {row['peak_hour'] or '-'}")
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.WARNING)
+    main()
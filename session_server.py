@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from appointment_manager import AppointmentManager
+from booking_store import BookingJournal
+from chatgpt_handler import ChatGPTHandler
+from config import BOOKINGS_DIR, SERVER_CONFIG
+from smart_scheduler import SmartAppointmentScheduler, GREETING, FAREWELL, EXIT_WORDS
+from voice_interface import VoiceInterface
+
+class ConcurrencyLimits:
+    """Bounded, non-blocking access to the blocking LLM/STT/TTS clients.
+
+    Each kind of call has its own semaphore; the call itself runs on a
+    shared thread pool so the event loop never blocks on network I/O.
+    """
+
+    def __init__(self, llm: int, stt: int, tts: int):
+        self.semaphores = {
+            "llm": asyncio.Semaphore(llm),
+            "stt": asyncio.Semaphore(stt),
+            "tts": asyncio.Semaphore(tts)
+        }
+        self.executor = ThreadPoolExecutor(max_workers=llm + stt + tts, thread_name_prefix="session-io")
+
+    async def run(self, kind: str, fn: Callable[..., Any], *args: Any) -> Any:
+        async with self.semaphores[kind]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+class SessionServer:
+    """Asyncio TCP server running one isolated scheduler session per connection.
+
+    Protocol: the client sends one utterance per line (plain text, or JSON
+    {"text": ...}); the server answers each with a JSON line
+    {"session": id, "reply": text, "audio": path-or-null}. Every session
+    has its own booking context and conversation history, and all sessions
+    book against one shared, thread-safe AppointmentManager.
+    """
+
+    def __init__(self, appointment_manager: AppointmentManager, tts: bool = False,
+                 max_sessions: int = SERVER_CONFIG["max_sessions"],
+                 llm_concurrency: int = SERVER_CONFIG["llm_concurrency"],
+                 stt_concurrency: int = SERVER_CONFIG["stt_concurrency"],
+                 tts_concurrency: int = SERVER_CONFIG["tts_concurrency"],
+                 idle_timeout: float = SERVER_CONFIG["idle_timeout"]):
+        self.appointment_manager = appointment_manager
+        self.tts = tts
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.limits = ConcurrencyLimits(llm_concurrency, stt_concurrency, tts_concurrency)
+        self.voice = VoiceInterface()
+        self.sessions: Dict[int, SmartAppointmentScheduler] = {}
+        self._ids = itertools.count(1)
+
+    async def _send(self, writer: asyncio.StreamWriter, session_id: int, reply: str) -> None:
+        audio = await self.limits.run("tts", self.voice.synthesize, reply) if self.tts else None
+        writer.write((json.dumps({"session": session_id, "reply": reply, "audio": audio}) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    @staticmethod
+    def _parse_line(line: bytes) -> str:
+        text = line.decode("utf-8", errors="replace").strip()
+        if text.startswith("{"):
+            try:
+                return str(json.loads(text).get("text", "")).strip()
+            except ValueError:
+                pass
+        return text
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session_id = next(self._ids)
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b'{"error": "All lines are busy. Please try again later."}\n')
+            await writer.drain()
+            writer.close()
+            return
+        session = SmartAppointmentScheduler(
+            voice=self.voice, chatgpt=ChatGPTHandler(), appointment_manager=self.appointment_manager,
+            speak_replies=self.tts
+        )
+        self.sessions[session_id] = session
+        logging.info(f"Session {session_id} opened ({len(self.sessions)} active).")
+        try:
+            await self._send(writer, session_id, GREETING)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=self.idle_timeout)
+                if not line:
+                    break
+                user_input = self._parse_line(line).lower()
+                if not user_input:
+                    continue
+                if any(word in user_input for word in EXIT_WORDS):
+                    await self._send(writer, session_id, FAREWELL)
+                    break
+                response = await self.limits.run("llm", session.process_user_input, user_input)
+                await self._send(writer, session_id, response)
+        except asyncio.TimeoutError:
+            logging.info(f"Session {session_id} timed out.")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logging.error(f"Session {session_id} error: {e}")
+        finally:
+            session.cancel_speculation()
+            del self.sessions[session_id]
+            writer.close()
+            logging.info(f"Session {session_id} closed ({len(self.sessions)} active).")
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port)
+        logging.info(f"Session server listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.limits.shutdown()
+            self.appointment_manager.close()
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Multi-caller appointment scheduling session server")
+    parser.add_argument("--host", default=SERVER_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVER_CONFIG["port"])
+    parser.add_argument("--tts", action="store_true", help="synthesize every reply and return the audio path")
+    args = parser.parse_args(argv)
+    server = SessionServer(AppointmentManager(store=BookingJournal(BOOKINGS_DIR)), tts=args.tts)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import datetime
+import hashlib
+import os
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from config import DOCTORS, SHARED_SLOTS_CONFIG
+from availability import parse_date, slot_grid, slot_index
+
+# magic, base date ordinal, days, words per (doctor, day) cell, slots per cell, doctors, roster hash
+_HEADER = struct.Struct("<6qQ")
+_HEADER_WORDS = 8
+_MAGIC = 0x534C4F54  # "SLOT"
+
+def roster_hash(doctor_ids: Sequence[str]) -> int:
+    """64-bit hash of the doctor ids and their hours, which fix what each bit of the map means"""
+    roster = "\n".join(f"{doctor_id}:{DOCTORS[doctor_id]['hours']}" for doctor_id in doctor_ids)
+    return int.from_bytes(hashlib.blake2b(roster.encode(), digest_size=8).digest(), "little")
+
+class SharedSlotMap:
+    """Booked-slot bitmaps in shared memory so several scheduler processes share one calendar.
+
+    The segment holds one fixed-width cell of 64-bit words for each
+    (doctor, date) in a window of ``days`` dates from the creation date.
+    Bit i of a cell is set when slot i of that doctor's day is booked, so a
+    zero-filled segment is an empty calendar. claim() and release() are
+    compare-and-set operations under one of ``shards`` process-shared
+    locks, picked by cell. Reads don't take a lock because a cell word is
+    read in one piece. Only the bitmaps are shared: each process keeps its
+    own appointment details and journal.
+
+    Each booked slot is also tagged with the id of the worker that claimed
+    it (``worker`` in claim()), so a worker replaying its journal after a
+    restart can tell its own slots (holder()) from other workers' bookings.
+
+    Create the map in the supervising process and pass it to the worker
+    processes (e.g. as a Process argument), since the locks have to be
+    inherited. The header records a hash of the doctor roster, and
+    attaching with a different one fails. Days outside the window, legacy weekday keys and off-grid
+    times are not covered (covers() is False). Callers keep those local.
+    """
+
+    def __init__(self, shm: Any, locks: Sequence[Any], owner: bool = False):
+        self._shm = shm
+        self._locks = list(locks)
+        # Forked workers inherit this object as-is; only the creating process frees the segment
+        self._owner_pid = os.getpid() if owner else None
+        magic, base, self.days, self.cell_words, self.cell_slots, doctors, roster = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a slot map")
+        self.doctor_ids = sorted(DOCTORS)
+        if doctors != len(self.doctor_ids) or roster != roster_hash(self.doctor_ids):
+            raise ValueError(f"Slot map '{shm.name}' was created for a different doctor roster "
+                             f"({doctors} doctors, config has {len(self.doctor_ids)})")
+        self.start = datetime.date.fromordinal(base)
+        self._doctor_index: Dict[str, int] = {doctor_id: i for i, doctor_id in enumerate(self.doctor_ids)}
+        cells = doctors * self.days
+        holders_offset = (_HEADER_WORDS + cells * self.cell_words) * 8
+        self._words = shm.buf[:holders_offset].cast("Q")
+        # Claiming worker id + 1 per slot (0: free, or claimed without an id)
+        self._holders = shm.buf[holders_offset:holders_offset + cells * self.cell_slots * 2].cast("H")
+
+    @classmethod
+    def create(cls, name: Optional[str] = None, start: Optional[datetime.date] = None,
+               days: int = SHARED_SLOTS_CONFIG["days"], shards: int = SHARED_SLOTS_CONFIG["shards"]) -> "SharedSlotMap":
+        """Allocate a zeroed (empty) map starting at ``start`` (default today)"""
+        # Imported here so the scheduler doesn't pay for multiprocessing at start-up
+        import multiprocessing
+        from multiprocessing import shared_memory
+        start = start or datetime.date.today()
+        cell_slots = max(len(slot_grid(doctor_id)) for doctor_id in DOCTORS)
+        cell_words = -(-cell_slots // 64)
+        cells = len(DOCTORS) * days
+        size = (_HEADER_WORDS + cells * cell_words) * 8 + cells * cell_slots * 2
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, start.toordinal(), days, cell_words, cell_slots, len(DOCTORS),
+                          roster_hash(sorted(DOCTORS)))
+        return cls(shm, [multiprocessing.Lock() for _ in range(shards)], owner=True)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self._shm.name, "locks": self._locks}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        from multiprocessing import shared_memory
+        self.__init__(shared_memory.SharedMemory(name=state["name"]), state["locks"])
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _locate(self, doctor_id: str, day: str, time_slot: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """(cell, slot index) for a booking, or None if the map doesn't cover it"""
+        doctor = self._doctor_index.get(doctor_id)
+        date = parse_date(day)
+        if doctor is None or date is None:
+            return None
+        offset = (date - self.start).days
+        if not 0 <= offset < self.days:
+            return None
+        index = slot_index(doctor_id, time_slot) if time_slot is not None else 0
+        if index is None:
+            return None
+        return doctor * self.days + offset, index
+
+    def _word(self, cell: int, index: int) -> Tuple[int, int]:
+        return _HEADER_WORDS + cell * self.cell_words + index // 64, 1 << (index % 64)
+
+    def covers(self, doctor_id: str, day: str, time_slot: Optional[str] = None) -> bool:
+        return self._locate(doctor_id, day, time_slot) is not None
+
+    def _holder_index(self, cell: int, index: int) -> int:
+        return cell * self.cell_slots + index
+
+    def claim(self, doctor_id: str, day: str, time_slot: str, worker: Optional[int] = None) -> bool:
+        """Atomically mark a free slot booked, tagged with ``worker``; False if any process already holds it"""
+        location = self._locate(doctor_id, day, time_slot)
+        if location is None:
+            raise ValueError(f"{doctor_id} {day} {time_slot} is outside the shared slot map")
+        word, bit = self._word(*location)
+        with self._locks[location[0] % len(self._locks)]:
+            value = self._words[word]
+            if value & bit:
+                return False
+            self._words[word] = value | bit
+            self._holders[self._holder_index(*location)] = 0 if worker is None else worker + 1
+        return True
+
+    def release(self, doctor_id: str, day: str, time_slot: str) -> bool:
+        """Atomically mark a booked slot free; False if it wasn't booked"""
+        location = self._locate(doctor_id, day, time_slot)
+        if location is None:
+            raise ValueError(f"{doctor_id} {day} {time_slot} is outside the shared slot map")
+        word, bit = self._word(*location)
+        with self._locks[location[0] % len(self._locks)]:
+            value = self._words[word]
+            if not value & bit:
+                return False
+            self._words[word] = value & ~bit
+            self._holders[self._holder_index(*location)] = 0
+        return True
+
+    def is_booked(self, doctor_id: str, day: str, time_slot: str) -> bool:
+        location = self._locate(doctor_id, day, time_slot)
+        if location is None:
+            return False
+        word, bit = self._word(*location)
+        return bool(self._words[word] & bit)
+
+    def holder(self, doctor_id: str, day: str, time_slot: str) -> Optional[int]:
+        """Id of the worker holding a booked slot; None if free, uncovered or claimed without an id"""
+        location = self._locate(doctor_id, day, time_slot)
+        if location is None:
+            return None
+        tag = self._holders[self._holder_index(*location)]
+        return tag - 1 if tag else None
+
+    def booked_mask(self, doctor_id: str, day: str) -> int:
+        """The day's booked bits as one int (bit i = slot i); 0 if not covered"""
+        location = self._locate(doctor_id, day)
+        if location is None:
+            return 0
+        first = _HEADER_WORDS + location[0] * self.cell_words
+        mask = 0
+        for i in range(self.cell_words):
+            mask |= self._words[first + i] << (64 * i)
+        return mask
+
+    def booked_slots(self, doctor_id: str, day: str) -> List[str]:
+        mask = self.booked_mask(doctor_id, day)
+        grid = slot_grid(doctor_id) if mask else []
+        return [slot for i, slot in enumerate(grid) if mask >> i & 1]
+
+    def booked_count(self) -> int:
+        """Booked slots across the whole map"""
+        return sum(bin(word).count("1") for word in self._words[_HEADER_WORDS:])
+
+    def close(self) -> None:
+        """Detach this process; the creator also frees the segment"""
+        self._words.release()
+        self._holders.release()
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
@@ -1,10 +1,23 @@
 import sys
 import os
-from typing import Dict, Any, Optional
-from voice_interface import VoiceInterface
-from chatgpt_handler import ChatGPTHandler
-from appointment_manager import AppointmentManager
-from config import DOCTORS
+import argparse
+import datetime
+import time
+import logging
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from voice_interface import VoiceInterface, RETRY_PROMPT, iter_sentences
+from chatgpt_handler import ChatGPTHandler, BOOKING_FIELDS, ERROR_REPLY
+from appointment_manager import AppointmentManager, normalize_time
+from booking_store import BookingJournal
+from local_extractor import LocalExtractor
+from availability import WEEKDAYS, resolve_day, parse_date, describe_date
+from doctor_directory import get_directory
+from tracing import span, tracer
+from warmup import WarmUp
+from turn_executor import TurnExecutor, Speculation
+from conversation_memory import load_tokenizer
+from openai_client import warm_connections
+from config import DOCTORS, BOOKINGS_DIR, SINGLE_CALL_MODE, LOCAL_EXTRACTION_THRESHOLD, STREAMING_TTS, OPENAI_TIMEOUTS
 
 # Handle frozen executable paths
 if getattr(sys, 'frozen', False):
@@ -12,144 +25,498 @@ if getattr(sys, 'frozen', False):
     application_path = os.path.dirname(sys.executable)
     os.chdir(application_path)
 
+GREETING = "Hello! I'm your AI appointment scheduling assistant. How can I help you today?"
+FAREWELL = "Thank you for using our appointment system. Have a great day!"
+EXIT_WORDS = ["exit", "quit", "goodbye", "bye"]
+NAME_PROMPT = "Could you please tell me your name?"
+ERROR_PROMPT = "I'm sorry, there was an unexpected error. Please try again later."
+# Answers expected right after a booking confirmation ("Is there anything else...?")
+YES_NO = ["yes", "no"]
+# Fixed phrases synthesized ahead of time by the start-up warm-up (cached on disk across runs)
+COMMON_PROMPTS = [FAREWELL, NAME_PROMPT, RETRY_PROMPT, "Goodbye!", ERROR_PROMPT]
+
 class SmartAppointmentScheduler:
-    def __init__(self):
-        self.voice = VoiceInterface()
-        self.chatgpt = ChatGPTHandler()
-        self.appointment_manager = AppointmentManager()
+    def __init__(self, voice: Optional[VoiceInterface] = None, chatgpt: Optional[ChatGPTHandler] = None,
+                 appointment_manager: Optional[AppointmentManager] = None, warm_up: bool = False,
+                 speculate: Optional[bool] = None, speak_replies: bool = True):
+        self.voice = voice if voice is not None else VoiceInterface()
+        self.chatgpt = chatgpt if chatgpt is not None else ChatGPTHandler()
+        # Start before loading the booking journal so the two overlap
+        self.warmup = self._start_warm_up() if warm_up else None
+        if appointment_manager is None:
+            appointment_manager = AppointmentManager(store=BookingJournal(BOOKINGS_DIR))
+        self.appointment_manager = appointment_manager
+        self.local_extractor = LocalExtractor(LOCAL_EXTRACTION_THRESHOLD)
         self.booking_context = {}
+        self.bookings_completed = 0
+        self.awaiting_yes_no = False
+        # The booking field the last reply asked for, which decides what a bare name means
+        self.expecting: Optional[str] = "patient_name"
+        self.executor = TurnExecutor() if speculate is None else TurnExecutor(enabled=speculate)
+        # Replies are synthesized (the voice loop, or a server that returns audio); audio is only speculated then
+        self.speak_replies = speak_replies
+        # Work started for the next turn: free slots per (doctor, day), audio per predicted text
+        self._slot_prefetch: Dict[Tuple[str, str], Speculation] = {}
+        self._audio_prefetch: Dict[str, Tuple[Speculation, int, float]] = {}
+        self.turns = 0
         
+    def _start_warm_up(self) -> WarmUp:
+        """Open connections, load the tokenizer and audio stack, and pre-synthesize fixed prompts"""
+        return WarmUp([
+            ("client", lambda: self.voice.client),
+            ("greeting", lambda: self.voice.synthesize(GREETING)),
+            ("connections", warm_connections),
+            ("tokenizer", load_tokenizer),
+            ("audio", self.voice.load_audio_stack),
+            ("speech_backends", self.voice.router.load),
+            ("audio_engine", lambda: self.voice.engine),
+            ("prompts", lambda: [self.voice.synthesize(prompt) for prompt in COMMON_PROMPTS])
+        ]).start()
+
     def run(self):
         """Main application loop"""
         try:
-            self.voice.speak("Hello! I'm your AI appointment scheduling assistant. How can I help you today?")
+            if self.warmup:
+                self.warmup.wait("greeting", timeout=OPENAI_TIMEOUTS["tts"])
+            self.voice.speak(GREETING)
             
             while True:
-                user_input = self.voice.listen()
+                tracer.start_turn()
+                with span("listen"):
+                    user_input = self.voice.listen(expect=YES_NO if self.awaiting_yes_no else None)
                 
                 if not user_input:
+                    tracer.end_turn()
                     continue
+                self.awaiting_yes_no = False
                     
                 # Check for exit commands
-                if any(word in user_input for word in ["exit", "quit", "goodbye", "bye"]):
-                    self.voice.speak("Thank you for using our appointment system. Have a great day!")
+                if any(word in user_input for word in EXIT_WORDS):
+                    self.voice.speak(FAREWELL)
                     break
                 
                 # Process the user input with ChatGPT
-                response = self.process_user_input(user_input)
-                self.voice.speak(response)
+                with span("respond"):
+                    if STREAMING_TTS:
+                        self.voice.speak_stream(self.stream_user_input(user_input))
+                    else:
+                        with span("process_user_input"):
+                            response = self.process_user_input(user_input)
+                        self.voice.speak(response)
+                tracer.end_turn()
                 
         except KeyboardInterrupt:
             self.voice.speak("Goodbye!")
         except Exception as e:
             print(f"Application error: {e}")
-            self.voice.speak("I'm sorry, there was an unexpected error. Please try again later.")
+            self.voice.speak(ERROR_PROMPT)
+        finally:
+            logging.info(f"Local extraction metrics: {self.local_extractor.metrics()}")
+            logging.info(f"Prompt tokens: {self.chatgpt.usage_stats()}")
+            logging.info(f"Booking metrics: {self.booking_metrics()}")
+            self.cancel_speculation()
+            logging.info(f"Speculation: {self.executor.metrics()}")
+            logging.info(f"Speech backends: {self.voice.router.stats()}")
+            if self.warmup:
+                logging.info(f"Warm-up timings: {self.warmup.timings}")
+            logging.info(f"Extraction cache: {self.chatgpt.extraction_cache.stats()}, "
+                         f"TTS cache: {self.voice.tts_cache.stats()}")
+            self.appointment_manager.close()
+            self.voice.close()
     
     def process_user_input(self, user_input: str) -> str:
         """Process user input and return appropriate response"""
-        # Extract appointment information
-        extracted_info = self.chatgpt.extract_appointment_info(user_input)
+        response = self._process_turn(user_input)
+        self._after_turn(response)
+        return response
+
+    def _process_turn(self, user_input: str) -> str:
+        # Fast path: trivially parseable utterances skip LLM extraction
+        with span("extract_local"):
+            local_info = self.local_extractor.extract(user_input, self.expecting, self.booking_context)
+        if local_info is not None:
+            self.update_booking_context(local_info)
+            if self.is_booking_complete():
+                self.local_extractor.record_skipped_call()
+                return self.attempt_booking()
+            if not SINGLE_CALL_MODE:
+                self.local_extractor.record_skipped_call()
+            with span("get_response"):
+                response = self.chatgpt.get_response(user_input, self._context_info())
+            return self._prompt_for_missing_info(response)
+
+        if SINGLE_CALL_MODE:
+            # One structured request returns both the booking fields and the reply
+            start = time.perf_counter()
+            with span("single_call"):
+                result = self.chatgpt.get_response_with_extraction(user_input, self._context_info())
+            self.local_extractor.record_llm_call(time.perf_counter() - start)
+            if result is not None:
+                extracted_info, response = result
+                self.update_booking_context(extracted_info)
+                if self.is_booking_complete():
+                    return self.attempt_booking()
+                self.chatgpt.remember_turn(user_input, response)
+                return self._prompt_for_missing_info(response)
+
+        # Extract appointment information while the reply is drafted from the current context
+        extraction = self.executor.run(self._extract_llm, user_input)
+        reply = self.executor.speculate("reply", self.chatgpt.get_response, user_input, self._context_info(), False,
+                                        urgent=True)
+        extracted_info = extraction.result()
         
         # Update booking context with extracted information
         self.update_booking_context(extracted_info)
         
         # Check if we have enough information to book
         if self.is_booking_complete():
+            self.executor.discard(reply)
             return self.attempt_booking()
         
         # Get conversational response from ChatGPT
-        context_info = {
+        with span("get_response"):
+            if reply is not None:
+                response = self.executor.use(reply)
+                if not response.startswith(ERROR_REPLY):
+                    self.chatgpt.remember_turn(user_input, response)
+            else:
+                response = self.chatgpt.get_response(user_input, self._context_info())
+        return self._prompt_for_missing_info(response)
+
+    def _extract_llm(self, user_input: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with span("extract_llm"):
+            extracted_info = self.chatgpt.extract_appointment_info(user_input)
+        self.local_extractor.record_llm_call(time.perf_counter() - start)
+        return extracted_info
+
+    def stream_user_input(self, user_input: str) -> Iterator[str]:
+        """Streaming variant of process_user_input that yields the reply as it is generated"""
+        parts: List[str] = []
+        try:
+            for chunk in self._stream_turn(user_input):
+                parts.append(chunk)
+                yield chunk
+        finally:
+            self._after_turn("".join(parts))
+
+    def _stream_turn(self, user_input: str) -> Iterator[str]:
+        reply = None
+        with span("extract_local"):
+            extracted_info = self.local_extractor.extract(user_input, self.expecting, self.booking_context)
+        local = extracted_info is not None
+        if extracted_info is None and SINGLE_CALL_MODE:
+            # One streamed structured request: the fields arrive before the reply text
+            start = time.perf_counter()
+            with span("single_call"):
+                result = self.chatgpt.stream_response_with_extraction(user_input, self._context_info())
+            self.local_extractor.record_llm_call(time.perf_counter() - start)
+            if result is not None:
+                yield from self._stream_single_call(user_input, *result)
+                return
+        if extracted_info is None:
+            # Start streaming the reply while LLM extraction runs; dropped if the booking completes
+            extraction = self.executor.run(self._extract_llm, user_input)
+            reply = self.executor.speculate_stream("reply", self.chatgpt.stream_response, user_input,
+                                                   self._context_info(), False, urgent=True)
+            extracted_info = extraction.result()
+        self.update_booking_context(extracted_info)
+        if self.is_booking_complete():
+            if local:
+                self.local_extractor.record_skipped_call()
+            self.executor.discard(reply)
+            yield self.attempt_booking()
+            return
+        if local and not SINGLE_CALL_MODE:
+            self.local_extractor.record_skipped_call()
+
+        parts = []
+        if reply is not None:
+            chunks = self.executor.stream(reply)
+        else:
+            chunks = self.chatgpt.stream_response(user_input, self._context_info())
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        response = "".join(parts)
+        if reply is not None and not response.startswith(ERROR_REPLY):
+            self.chatgpt.remember_turn(user_input, response.strip())
+        yield self._prompt_for_missing_info(response)[len(response):]
+
+    def _stream_single_call(self, user_input: str, extracted_info: Dict[str, Any], chunks: Iterator[str]) -> Iterator[str]:
+        self.update_booking_context(extracted_info)
+        if self.is_booking_complete():
+            chunks.close()
+            yield self.attempt_booking()
+            return
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        response = "".join(parts)
+        if not response.startswith(ERROR_REPLY):
+            self.chatgpt.remember_turn(user_input, response.strip())
+        yield self._prompt_for_missing_info(response)[len(response):]
+
+    def _after_turn(self, response: str) -> None:
+        """Settle last turn's speculative work against what was said, then speculate for the next turn"""
+        self.turns += 1
+        self.expecting = next((field for field in BOOKING_FIELDS if not self.booking_context.get(field)), None)
+        # This turn's reply is spoken after we return, so audio is settled a turn later
+        for text, (_, turn, _) in list(self._audio_prefetch.items()):
+            if turn < self.turns - 1:
+                self._settle_audio(text)
+        likely = (self.booking_context.get("doctor_preference"), self.booking_context.get("day_preference"))
+        for key in list(self._slot_prefetch):
+            if key != likely:
+                self.executor.discard(self._slot_prefetch.pop(key))
+        if all(likely) and likely not in self._slot_prefetch and self._works_on(*likely):
+            speculation = self.executor.speculate("slots", self.appointment_manager.generate_time_slots, *likely)
+            if speculation is not None:
+                self._slot_prefetch[likely] = speculation
+        text = self._probable_next_utterance() if self.speak_replies else None
+        if text and text not in self._audio_prefetch:
+            started = time.monotonic()
+            speculation = self.executor.speculate("audio", self._presynthesize, text)
+            if speculation is not None:
+                self._audio_prefetch[text] = (speculation, self.turns, started)
+
+    def _settle_audio(self, text: str) -> None:
+        """Count presynthesized audio as used only if speech actually took it from the TTS cache"""
+        speculation, _, started = self._audio_prefetch.pop(text)
+        if all(self.voice.served_since(sentence, started) for sentence in self._sentences(text)):
+            self.executor.use(speculation)
+        else:
+            self.executor.discard(speculation)
+
+    def _works_on(self, doctor_id: str, day: str) -> bool:
+        return doctor_id in DOCTORS and self.appointment_manager.weekday_of(day) in DOCTORS[doctor_id]["days"]
+
+    def cancel_speculation(self) -> None:
+        """Settle speculative work at the end of a conversation: audio the last reply played
+        counts as used, everything else pending is discarded"""
+        for speculation in self._slot_prefetch.values():
+            self.executor.discard(speculation)
+        for text in list(self._audio_prefetch):
+            self._settle_audio(text)
+        self._slot_prefetch.clear()
+
+    def _probable_next_utterance(self) -> Optional[str]:
+        """What the assistant will most likely say next when only one booking field is missing"""
+        missing = [field for field in BOOKING_FIELDS if not self.booking_context.get(field)]
+        if len(missing) != 1:
+            return None
+        if missing[0] == "patient_name":
+            # Doctor, day and time are known: once the name arrives, the reply is the confirmation
+            doctor_id = self.booking_context["doctor_preference"]
+            day = self.booking_context["day_preference"]
+            time_slot = normalize_time(self.booking_context["time_preference"])
+            if not time_slot or not self._works_on(doctor_id, day) or parse_date(day) < datetime.date.today():
+                return None
+            if self.appointment_manager.is_slot_booked(doctor_id, day, time_slot):
+                return None
+            return self._confirmation_text(doctor_id, parse_date(day), time_slot)
+        prompt = self._missing_info_prompt()
+        return prompt[1] if prompt else None
+
+    @staticmethod
+    def _sentences(text: str) -> List[str]:
+        # Split the way speak_stream() will, so each sentence lands in the TTS cache under its own key
+        return list(iter_sentences([text])) if STREAMING_TTS else [text]
+
+    def _presynthesize(self, text: str) -> None:
+        for sentence in self._sentences(text):
+            self.voice.synthesize(sentence, prefetch=True)
+
+    def _context_info(self) -> Dict[str, Any]:
+        # Doctors and schedules are already in the system prompt; add what is actually free right now
+        with span("availability_context"):
+            availability = self.appointment_manager.availability_context(
+                self.booking_context.get("doctor_preference"), self.booking_context.get("day_preference")
+            )
+        return {
             "current_booking": self.booking_context,
-            "available_doctors": list(DOCTORS.keys()),
-            "doctor_schedules": {doc_id: info["days"] for doc_id, info in DOCTORS.items()}
+            "availability": availability
         }
-        
-        response = self.chatgpt.get_response(user_input, context_info)
-        
-        # Add helpful information based on what's missing
+
+    def booking_metrics(self) -> Dict[str, Any]:
+        """LLM requests per completed booking for this session"""
+        return {
+            "llm_calls": self.chatgpt.llm_calls,
+            "bookings": self.bookings_completed,
+            "llm_calls_per_booking": self.chatgpt.llm_calls / self.bookings_completed if self.bookings_completed else None
+        }
+
+    def _missing_info_prompt(self) -> Optional[Tuple[Optional[str], str]]:
+        """The follow-up question for what's missing, with the word that shows a reply already asks it"""
         if not self.booking_context.get("patient_name"):
-            if "name" not in response.lower():
-                response += " Could you please tell me your name?"
+            return "name", NAME_PROMPT
         elif not self.booking_context.get("doctor_preference"):
-            if "doctor" not in response.lower():
-                response += f" We have {', '.join([info['name'] for info in DOCTORS.values()])} available."
+            if len(DOCTORS) <= 10:
+                return "doctor", f"We have {', '.join([info['name'] for info in DOCTORS.values()])} available."
+            return "doctor", f"We have doctors in {', '.join(get_directory().specialties())}."
         elif not self.booking_context.get("day_preference"):
             doctor_id = self.booking_context.get("doctor_preference")
             if doctor_id and doctor_id in DOCTORS:
                 days = ", ".join(DOCTORS[doctor_id]["days"])
-                response += f" {DOCTORS[doctor_id]['name']} is available on {days}."
-        
+                return None, f"{DOCTORS[doctor_id]['name']} is available on {days}."
+        return None
+
+    def _prompt_for_missing_info(self, response: str) -> str:
+        # Add helpful information based on what's missing
+        prompt = self._missing_info_prompt()
+        if prompt:
+            keyword, question = prompt
+            if keyword is None or keyword not in response.lower():
+                response += f" {question}"
         return response
     
     def update_booking_context(self, extracted_info: Dict[str, Any]):
         """Update the booking context with new information"""
-        for key, value in extracted_info.items():
+        # The doctor last, so a specialty can be narrowed to doctors working the requested day
+        for key, value in sorted(extracted_info.items(), key=lambda item: item[0] == "doctor_preference"):
             if value and value != "null":
                 if key == "doctor_preference":
-                    # Normalize doctor names
-                    value = value.lower()
-                    if value in DOCTORS:
-                        self.booking_context[key] = value
+                    # Resolve spoken names/specialties ("Dr Sarah", "the cardiologist") to a doctor id
+                    doctor_id = get_directory().resolve(value) or self._doctor_for_specialty(str(value))
+                    if doctor_id:
+                        self.booking_context[key] = doctor_id
                 elif key == "day_preference":
-                    # Normalize day names
-                    value = value.lower()
-                    days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-                    if value in days:
-                        self.booking_context[key] = value
+                    # Resolve spoken days ("monday", "next monday", "tomorrow") to an ISO date
+                    date = resolve_day(str(value), datetime.date.today())
+                    if date:
+                        self.booking_context[key] = date.isoformat()
                 else:
                     self.booking_context[key] = value
     
+    def _doctor_for_specialty(self, text: str) -> Optional[str]:
+        """Among doctors with the requested specialty, the one with the earliest opening
+        (on the requested day when there is one)"""
+        directory = get_directory()
+        doctor_ids = directory.specialty_ids(text)
+        date = parse_date(self.booking_context.get("day_preference") or "")
+        start = None
+        if date:
+            working = doctor_ids & directory.doctors_on(WEEKDAYS[date.weekday()])
+            if working:
+                doctor_ids = working
+                start = datetime.datetime.combine(date, datetime.time())
+        openings = {}
+        for doctor_id in doctor_ids:
+            opening = self.appointment_manager.find_earliest_slot(doctor_id, start)
+            if opening:
+                openings[doctor_id] = opening
+        if openings:
+            return min(openings, key=lambda doctor_id: (openings[doctor_id], doctor_id))
+        return min(doctor_ids, default=None)
+
     def is_booking_complete(self) -> bool:
         """Check if we have all required information for booking"""
         required_fields = ["patient_name", "doctor_preference", "day_preference", "time_preference"]
         return all(field in self.booking_context and self.booking_context[field] for field in required_fields)
+
+    def _offer_alternatives(self, doctor_id: str, day: str, normalized_time: str, reason: str) -> str:
+        """Suggest the free slots nearest to the requested time (or the next openings if the day is full)"""
+        alternatives = self.appointment_manager.nearest_slots(doctor_id, day, normalized_time)
+        if not alternatives:
+            return f"{reason} {DOCTORS[doctor_id]['name']} has no available slots in the coming weeks."
+        if all(alt_day == day for alt_day, _ in alternatives):
+            slots_str = ", ".join(slot for _, slot in alternatives)
+            return f"{reason} The closest available times are: {slots_str}. Would you like one of these instead?"
+        slots_str = ", ".join(f"{describe_date(parse_date(alt_day))} at {slot}" for alt_day, slot in alternatives)
+        return (f"{reason} {DOCTORS[doctor_id]['name']} has no free slots on {describe_date(parse_date(day))}. "
+                f"The earliest openings are: {slots_str}. Would you like one of these instead?")
     
+    @staticmethod
+    def _confirmation_text(doctor_id: str, date: datetime.date, time_slot: str) -> str:
+        doctor_name = DOCTORS[doctor_id]["name"]
+        confirmation = f"Perfect! I've booked your appointment with {doctor_name} on {describe_date(date)} at {time_slot}. "
+        confirmation += f"Please arrive 15 minutes early. Is there anything else I can help you with?"
+        return confirmation
+
     def attempt_booking(self) -> str:
         """Attempt to book the appointment with current context"""
         patient_name = self.booking_context["patient_name"]
         doctor_id = self.booking_context["doctor_preference"]
-        day = self.booking_context["day_preference"]
+        day = self.booking_context["day_preference"]  # ISO date, see update_booking_context
         time_input = self.booking_context["time_preference"]
+        date = parse_date(day)
         
         # Normalize the time
         normalized_time = self.appointment_manager.normalize_time_input(time_input)
         
         if not normalized_time:
             return f"I couldn't understand the time '{time_input}'. Could you please specify a time like '10:00 AM' or '2:30 PM'?"
+
+        now = datetime.datetime.now()
+        if date < now.date():
+            del self.booking_context["day_preference"]
+            return f"{describe_date(date)} has already passed. Which day would you like?"
         
         # Check if the doctor works on that day
-        if day not in DOCTORS[doctor_id]["days"]:
+        weekday = self.appointment_manager.weekday_of(day)
+        if weekday not in DOCTORS[doctor_id]["days"]:
             available_days = ", ".join(DOCTORS[doctor_id]["days"])
-            return f"I'm sorry, {DOCTORS[doctor_id]['name']} doesn't work on {day.title()}. They're available on {available_days}."
+            response = f"I'm sorry, {DOCTORS[doctor_id]['name']} doesn't work on {weekday.title()}. They're available on {available_days}."
+            earliest = self.appointment_manager.find_earliest_slot(doctor_id, datetime.datetime.combine(date, datetime.time()))
+            if earliest:
+                response += f" The next opening is {describe_date(parse_date(earliest[0]))} at {earliest[1]}."
+            return response
         
-        # Get available slots
-        available_slots = self.appointment_manager.generate_time_slots(doctor_id, day)
+        # Get available slots (prefetched when the doctor and day were settled on an earlier turn)
+        with span("generate_time_slots"):
+            prefetched = self._slot_prefetch.pop((doctor_id, day), None)
+            if prefetched is not None:
+                available_slots = self.executor.use(prefetched)
+            else:
+                available_slots = self.appointment_manager.generate_time_slots(doctor_id, day)
         
+        # A slot that has already started can't be booked, even by a few seconds
+        start = datetime.datetime.combine(date, datetime.time.fromisoformat(normalized_time))
+        if start < datetime.datetime.now():
+            return self._offer_alternatives(doctor_id, day, normalized_time, f"I'm sorry, {normalized_time} has already passed today.")
+
         if normalized_time not in available_slots:
-            if available_slots:
-                slots_str = ", ".join(available_slots[:5])
-                return f"I'm sorry, {normalized_time} is not available. Here are some available times: {slots_str}. Would you like one of these instead?"
-            else:
-                return f"I'm sorry, {DOCTORS[doctor_id]['name']} has no available slots on {day.title()}."
+            return self._offer_alternatives(doctor_id, day, normalized_time, f"I'm sorry, {normalized_time} is not available.")
         
         # Book the appointment
         success = self.appointment_manager.book_appointment(patient_name, doctor_id, day, normalized_time)
         
         if success:
-            doctor_name = DOCTORS[doctor_id]["name"]
-            confirmation = f"Perfect! I've booked your appointment with {doctor_name} on {day.title()} at {normalized_time}. "
-            confirmation += f"Please arrive 15 minutes early. Is there anything else I can help you with?"
+            confirmation = self._confirmation_text(doctor_id, date, normalized_time)
             
             # Reset booking context for next appointment
             self.booking_context = {}
+            self.bookings_completed += 1
+            self.awaiting_yes_no = True
             return confirmation
         else:
-            return "I'm sorry, there was an issue booking your appointment. Please try again."
+            # Another caller claimed the slot between the availability check and booking
+            return self._offer_alternatives(doctor_id, day, normalized_time, f"I'm sorry, {normalized_time} was just taken.")
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Smart voice appointment scheduler")
+    parser.add_argument("--profile", nargs="?", const="profile.json", metavar="PATH",
+                        help="record per-stage latency and write a session breakdown as JSON (default: profile.json)")
+    parser.add_argument("--cprofile", metavar="PATH", help="also run the session under cProfile and save stats to PATH")
+    args = parser.parse_args(argv)
+    if args.profile or args.cprofile:
+        tracer.enable()
     try:
-        scheduler = SmartAppointmentScheduler()
-        scheduler.run()
+        scheduler = SmartAppointmentScheduler(warm_up=True)
+        if args.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.runcall(scheduler.run)
+            profiler.dump_stats(args.cprofile)
+        else:
+            scheduler.run()
     except Exception as e:
         print(f"Failed to start application: {e}")
-        print("Make sure you have set your OpenAI API key in the .env file")
\ No newline at end of file
+        print("Make sure you have set your OpenAI API key in the .env file")
+    finally:
+        if tracer.enabled:
+            tracer.dump(args.profile or "profile.json")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import importlib.util
+import io
+import os
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from config import OPENAI_TIMEOUTS, VOICE_CONFIG
+from openai_client import call_with_retries
+
+def wav_duration(audio: bytes) -> float:
+    """Length in seconds of WAV bytes (0.0 if they can't be parsed)"""
+    try:
+        with wave.open(io.BytesIO(audio), "rb") as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return 0.0
+
+def silent_wav(seconds: float, sample_rate: int = 24000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(bytes(2 * int(seconds * sample_rate)))
+    return buffer.getvalue()
+
+# Text to speech
+
+class TTSBackend:
+    """Turns text into audio bytes in ``audio_format``.
+
+    ``local`` engines run on this machine: low latency and no network, but
+    a plainer voice. ``deadline`` is the most time the call may take,
+    retries included.
+    """
+    name = "tts"
+    local = False
+    audio_format = "wav"
+
+    def cache_parts(self) -> Tuple[str, ...]:
+        """What besides the text identifies this backend's audio in the TTS cache"""
+        return (self.name,)
+
+    def available(self) -> bool:
+        return True
+
+    def load(self) -> None:
+        """Do slow one-time set-up ahead of the first request (optional)"""
+
+    def synthesize(self, text: str, deadline: float) -> bytes:
+        raise NotImplementedError
+
+class OpenAITTS(TTSBackend):
+    name = "openai-tts"
+
+    def __init__(self, client: Callable[[], Any], model: str = "tts-1", voice: str = "alloy", audio_format: str = "wav"):
+        self.client = client
+        self.model = model
+        self.voice = voice
+        self.audio_format = audio_format
+
+    def cache_parts(self) -> Tuple[str, ...]:
+        return self.voice, self.model
+
+    def synthesize(self, text: str, deadline: float) -> bytes:
+        response = call_with_retries("tts", lambda timeout: self.client().audio.speech.create(
+            model=self.model,
+            voice=self.voice,
+            input=text,
+            response_format=self.audio_format,
+            timeout=timeout
+        ), deadline)
+        return response.content
+
+class Pyttsx3TTS(TTSBackend):
+    """Offline TTS through the platform speech engine (SAPI5, NSSpeechSynthesizer, eSpeak)"""
+    name = "pyttsx3"
+    local = True
+
+    def __init__(self, rate: int = VOICE_CONFIG["rate"], volume: float = VOICE_CONFIG["volume"]):
+        self.rate = rate
+        self.volume = volume
+        self._engine = None
+        # pyttsx3 engines are not thread-safe
+        self._lock = threading.Lock()
+
+    def cache_parts(self) -> Tuple[str, ...]:
+        return self.name, str(self.rate), str(self.volume)
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("pyttsx3") is not None
+
+    def load(self) -> None:
+        with self._lock:
+            self._load()
+
+    def _load(self) -> Any:
+        if self._engine is None:
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+            self._engine.setProperty("volume", self.volume)
+        return self._engine
+
+    def synthesize(self, text: str, deadline: float) -> bytes:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with self._lock:
+                engine = self._load()
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+class StubTTS(TTSBackend):
+    """Offline stand-in: returns silent WAV after a fixed delay, or fails on demand"""
+
+    def __init__(self, name: str = "stub-tts", local: bool = True, latency: float = 0.0, fail: bool = False):
+        self.name = name
+        self.local = local
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def synthesize(self, text: str, deadline: float) -> bytes:
+        self.calls += 1
+        time.sleep(min(self.latency, deadline))
+        if self.fail or self.latency > deadline:
+            raise ConnectionError(f"{self.name} unavailable")
+        return silent_wav(0.01 * len(text))
+
+# Speech to text
+
+class STTBackend:
+    """Turns WAV bytes into lowercase text.
+
+    ``keywords`` (e.g. yes/no) tells the engine which few words to listen
+    for. Engines that can't use the hint transcribe freely.
+    """
+    name = "stt"
+    local = False
+
+    def available(self) -> bool:
+        return True
+
+    def load(self) -> None:
+        """Do slow one-time set-up ahead of the first request (optional)"""
+
+    def transcribe(self, audio: bytes, deadline: float, keywords: Optional[Sequence[str]] = None) -> str:
+        raise NotImplementedError
+
+class WhisperSTT(STTBackend):
+    name = "whisper"
+
+    def __init__(self, client: Callable[[], Any], model: str = "whisper-1"):
+        self.client = client
+        self.model = model
+
+    def transcribe(self, audio: bytes, deadline: float, keywords: Optional[Sequence[str]] = None) -> str:
+        transcript = call_with_retries("transcribe", lambda timeout: self.client().audio.transcriptions.create(
+            model=self.model,
+            file=("input.wav", audio),
+            timeout=timeout
+        ), deadline)
+        return transcript.text.lower().strip()
+
+class SphinxSTT(STTBackend):
+    """Offline recognition with CMU PocketSphinx; keyword spotting for short expected answers"""
+    name = "sphinx"
+    local = True
+
+    def available(self) -> bool:
+        return all(importlib.util.find_spec(module) for module in ("speech_recognition", "pocketsphinx"))
+
+    def load(self) -> None:
+        import speech_recognition
+        import pocketsphinx
+
+    def transcribe(self, audio: bytes, deadline: float, keywords: Optional[Sequence[str]] = None) -> str:
+        import speech_recognition as sr
+        with sr.AudioFile(io.BytesIO(audio)) as source:
+            data = sr.Recognizer().record(source)
+        entries = [(keyword, 1e-20) for keyword in keywords] if keywords else None
+        try:
+            return sr.Recognizer().recognize_sphinx(data, keyword_entries=entries).lower().strip()
+        except sr.UnknownValueError:
+            return ""
+
+class StubSTT(STTBackend):
+    """Offline stand-in: returns scripted transcripts in order after a fixed delay, or fails on demand"""
+
+    def __init__(self, transcripts: Sequence[str] = (), name: str = "stub-stt", local: bool = True,
+                 latency: float = 0.0, fail: bool = False):
+        self.transcripts = list(transcripts)
+        self.name = name
+        self.local = local
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def transcribe(self, audio: bytes, deadline: float, keywords: Optional[Sequence[str]] = None) -> str:
+        self.calls += 1
+        time.sleep(min(self.latency, deadline))
+        if self.fail or self.latency > deadline:
+            raise ConnectionError(f"{self.name} unavailable")
+        return self.transcripts.pop(0) if self.transcripts else ""
+
+# Routing
+
+class SpeechRouter:
+    """Picks a speech backend per request from measured latency and health.
+
+    Short texts (up to ``local_max_chars``, which covers fixed prompts and
+    yes/no confirmations) go to whichever engine has been fastest, which is
+    normally the local one. Open-ended speech goes to the cloud engines for
+    voice quality. Short recordings made when only yes/no is expected go to
+    local recognition first, and everything else to Whisper.
+
+    A backend is taken out of rotation for ``cooldown`` seconds after it
+    fails, or when its latency average (EWMA) rises above ``slow_seconds``.
+    During that time, requests go to the remaining engines and the backend
+    is only tried last. While a local engine is there to fall back on,
+    cloud calls are capped at ``cloud_deadline`` seconds.
+    """
+
+    def __init__(self, cloud_tts: Optional[TTSBackend] = None, local_tts: Optional[TTSBackend] = None,
+                 cloud_stt: Optional[STTBackend] = None, local_stt: Optional[STTBackend] = None,
+                 local_max_chars: int = VOICE_CONFIG["local_max_chars"],
+                 local_stt_max_seconds: float = VOICE_CONFIG["local_stt_max_seconds"],
+                 slow_seconds: float = VOICE_CONFIG["cloud_slow_seconds"],
+                 cloud_deadline: float = VOICE_CONFIG["cloud_deadline"],
+                 cooldown: float = VOICE_CONFIG["cooldown"], alpha: float = 0.3):
+        self.tts = [backend for backend in (cloud_tts, local_tts) if backend is not None and backend.available()]
+        self.stt = [backend for backend in (cloud_stt, local_stt) if backend is not None and backend.available()]
+        self.local_max_chars = local_max_chars
+        self.local_stt_max_seconds = local_stt_max_seconds
+        self.slow_seconds = slow_seconds
+        self.cloud_deadline = cloud_deadline
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.calls: Counter = Counter()
+        self.failures: Counter = Counter()
+        self._latency: Dict[str, float] = {}
+        self._down_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Set up the local engines ahead of the first request"""
+        for backend in self.tts + self.stt:
+            if backend.local:
+                backend.load()
+
+    def healthy(self, backend: Any) -> bool:
+        return time.monotonic() >= self._down_until.get(backend.name, 0.0)
+
+    def _order(self, backends: List[Any], prefer_fast: bool) -> List[Any]:
+        if prefer_fast:
+            # Unmeasured engines count as fast so they get measured; ties keep local first
+            ranked = sorted(backends, key=lambda backend: (self._latency.get(backend.name, 0.0), not backend.local))
+        else:
+            ranked = sorted(backends, key=lambda backend: backend.local)
+        return [backend for backend in ranked if self.healthy(backend)] + \
+               [backend for backend in ranked if not self.healthy(backend)]
+
+    def tts_order(self, text: str) -> List[TTSBackend]:
+        return self._order(self.tts, prefer_fast=len(text) <= self.local_max_chars)
+
+    def stt_order(self, seconds: float, keywords: Optional[Sequence[str]] = None) -> List[STTBackend]:
+        return self._order(self.stt, prefer_fast=bool(keywords) and seconds <= self.local_stt_max_seconds)
+
+    def call(self, backend: Any, operation: str, fn: Callable[[float], Any], fallback: bool) -> Any:
+        """Run fn(deadline) on a backend, recording its latency or failure"""
+        deadline = OPENAI_TIMEOUTS[operation]
+        if fallback and not backend.local:
+            deadline = min(deadline, self.cloud_deadline)
+        started = time.perf_counter()
+        try:
+            result = fn(deadline)
+        except Exception:
+            with self._lock:
+                self.calls[backend.name] += 1
+                self.failures[backend.name] += 1
+                self._down_until[backend.name] = time.monotonic() + self.cooldown
+            raise
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.calls[backend.name] += 1
+            previous = self._latency.get(backend.name)
+            latency = elapsed if previous is None else previous + self.alpha * (elapsed - previous)
+            self._latency[backend.name] = latency
+            if latency > self.slow_seconds:
+                self._down_until[backend.name] = time.monotonic() + self.cooldown
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Calls, failures and latency average per backend"""
+        with self._lock:
+            return {
+                backend.name: {
+                    "calls": self.calls[backend.name],
+                    "failures": self.failures[backend.name],
+                    "latency_ms": round(self._latency[backend.name] * 1000, 1) if backend.name in self._latency else None,
+                    "healthy": self.healthy(backend)
+                }
+                for backend in self.tts + self.stt
+            }
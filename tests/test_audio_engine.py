@@ -0,0 +1,60 @@
+"""AudioEngine barge-in on the null audio device, with the WAV fixtures of benchmarks.bench_barge_in"""
+import time
+
+import pytest
+
+from audio_engine import AudioEngine, NullAudioDevice, read_wav
+from benchmarks.bench_barge_in import EchoAudioDevice, make_fixtures
+
+SPEECH_AT = 1.0
+SPEECH_SECONDS = 1.2
+
+@pytest.fixture(scope="module")
+def fixtures(tmp_path_factory):
+    return make_fixtures(str(tmp_path_factory.mktemp("wav")), SPEECH_AT, SPEECH_SECONDS)
+
+def start_engine(device):
+    engine = AudioEngine(device).start()
+    time.sleep(0.3)  # let the capture thread calibrate on silence
+    return engine
+
+def test_prompt_plays_in_full_without_caller(fixtures):
+    device = NullAudioDevice()
+    engine = start_engine(device)
+    prompt, rate = read_wav(fixtures["prompt"])
+    engine.play(prompt, rate)
+    try:
+        assert engine.wait(timeout=10)
+    finally:
+        engine.close()
+    assert engine.barge_ins == 0
+    assert sum(block.size for block in device.played) == prompt.size
+
+def test_caller_barges_in_and_is_recorded(fixtures):
+    device = NullAudioDevice()
+    engine = start_engine(device)
+    prompt, rate = read_wav(fixtures["prompt"])
+    device.feed_wav(fixtures["caller"])
+    engine.play(prompt, rate)
+    try:
+        assert not engine.wait(timeout=10)
+        recording = engine.listen(timeout=5)
+    finally:
+        engine.close()
+    assert engine.barge_ins == 1
+    played = sum(block.size for block in device.played) / device.output_rate
+    assert SPEECH_AT < played < SPEECH_AT + 0.5
+    # The whole utterance, including its first words, plus pre-roll
+    assert recording is not None
+    assert SPEECH_SECONDS <= recording.size / device.input_rate <= SPEECH_SECONDS + 0.4
+
+def test_prompt_echo_is_not_barge_in(fixtures):
+    device = EchoAudioDevice(echo_db=-20.0)
+    engine = start_engine(device)
+    prompt, rate = read_wav(fixtures["echo_prompt"])
+    engine.play(prompt, rate)
+    try:
+        assert engine.wait(timeout=10)
+    finally:
+        engine.close()
+    assert engine.barge_ins == 0
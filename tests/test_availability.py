@@ -0,0 +1,119 @@
+"""resolve_day and the AvailabilityIndex bitmaps"""
+import datetime
+
+import pytest
+
+from availability import AvailabilityIndex, free_ranges, resolve_day, slot_grid, slot_index
+
+MONDAY = datetime.date(2026, 10, 12)
+
+@pytest.mark.parametrize("spoken, expected", [
+    ("today", MONDAY),
+    ("tomorrow", datetime.date(2026, 10, 13)),
+    ("monday", MONDAY),
+    ("Monday.", MONDAY),
+    ("next monday", datetime.date(2026, 10, 19)),
+    ("monday afternoon", MONDAY),
+    ("wednesday afternoon", datetime.date(2026, 10, 14)),
+    ("the monday after", datetime.date(2026, 10, 19)),
+    ("a week from friday", datetime.date(2026, 10, 23)),
+    ("sunday", datetime.date(2026, 10, 18)),
+    ("2026-11-03", datetime.date(2026, 11, 3)),
+    ("october 20th", datetime.date(2026, 10, 20)),
+    ("1 november", datetime.date(2026, 11, 1)),
+    ("october 1", datetime.date(2027, 10, 1)),
+])
+def test_resolve_day(spoken, expected):
+    assert resolve_day(spoken, MONDAY) == expected
+
+def test_resolve_day_unknown():
+    assert resolve_day("whenever suits", MONDAY) is None
+
+def test_slot_index():
+    # ali works 9-17 in 20-minute slots
+    assert slot_grid("ali")[:3] == ["09:00", "09:20", "09:40"]
+    assert slot_index("ali", "09:40") == 2
+    assert slot_index("ali", "09:10") is None
+    assert slot_index("ali", "08:40") is None
+    assert slot_index("ali", "17:00") is None
+
+class Clock:
+    def __init__(self, today: datetime.date):
+        self.today = today
+
+    def __call__(self) -> datetime.date:
+        return self.today
+
+def make_index(booked=None, today=MONDAY):
+    booked = {} if booked is None else booked
+    clock = Clock(today)
+    return AvailabilityIndex(lambda doctor_id, day: booked.get((doctor_id, day), []),
+                             horizon_days=14, clock=clock), clock
+
+def test_working_dates_follow_doctor_days():
+    index, _ = make_index()
+    # ali: Monday, Wednesday, Friday
+    assert [date.weekday() for date in index.working_dates("ali")] == [0, 2, 4, 0, 2, 4]
+    assert index.covers("ali", MONDAY)
+    assert not index.covers("ali", MONDAY + datetime.timedelta(days=1))
+    assert not index.covers("ali", MONDAY + datetime.timedelta(days=14))
+
+def test_booked_slots_are_cleared_from_mask():
+    index, _ = make_index({("ali", "2026-10-12"): ["09:00", "09:40", "not a slot"]})
+    mask = index.free_mask("ali", MONDAY)
+    assert not mask & 0b101
+    assert mask & 0b10
+    assert free_ranges("ali", mask).startswith("09:20, 10:00-")
+
+def test_earliest_skips_full_days_and_past_slots():
+    index, _ = make_index({("ali", "2026-10-12"): slot_grid("ali")})
+    assert index.earliest("ali", MONDAY) == (datetime.date(2026, 10, 14), 0)
+    index, _ = make_index()
+    assert index.earliest("ali", MONDAY, from_index=5) == (MONDAY, 5)
+    last = len(slot_grid("ali"))
+    assert index.earliest("ali", MONDAY, from_index=last) == (datetime.date(2026, 10, 14), 0)
+
+def test_set_slot_books_and_frees():
+    index, _ = make_index()
+    wednesday = datetime.date(2026, 10, 14)
+    index.earliest("ali", MONDAY)  # materialize ali
+    for slot in range(len(slot_grid("ali"))):
+        index.set_slot("ali", MONDAY, slot, free=False)
+    assert index.free_mask("ali", MONDAY) == 0
+    assert index.free_text("ali", MONDAY) == "fully booked"
+    assert index.earliest("ali", MONDAY) == (wednesday, 0)
+    index.set_slot("ali", MONDAY, 3, free=True)
+    assert index.earliest("ali", MONDAY) == (MONDAY, 3)
+    assert index.free_text("ali", MONDAY) == "10:00"
+
+def test_set_slot_before_materialized_is_picked_up_from_callback():
+    booked = {}
+    index, _ = make_index(booked)
+    assert not index.tracks("ali")
+    index.set_slot("ali", MONDAY, 0, free=False)  # no-op
+    booked[("ali", "2026-10-12")] = ["09:00"]
+    assert index.earliest("ali", MONDAY) == (MONDAY, 1)
+
+def test_nearest_orders_by_distance():
+    index, _ = make_index({("ali", "2026-10-12"): ["12:00", "12:20"]})
+    noon = 12 * 60
+    slots = [slot_grid("ali")[i] for i in index.nearest("ali", MONDAY, noon, count=4)]
+    # Ties go to the earlier slot
+    assert slots == ["11:40", "11:20", "12:40", "11:00"]
+    late = [slot_grid("ali")[i] for i in index.nearest("ali", MONDAY, 20 * 60, count=2)]
+    assert late == ["16:40", "16:20"]
+
+def test_nearest_respects_from_index():
+    index, _ = make_index()
+    # It is already past 13:00: nothing earlier may be offered
+    from_index = slot_index("ali", "13:00")
+    slots = [slot_grid("ali")[i] for i in index.nearest("ali", MONDAY, 10 * 60, count=3, from_index=from_index)]
+    assert slots == ["13:00", "13:20", "13:40"]
+
+def test_window_rolls_at_midnight():
+    index, clock = make_index()
+    index.earliest("ali", MONDAY)
+    index.set_slot("ali", MONDAY, 0, free=False)
+    clock.today = MONDAY + datetime.timedelta(days=1)
+    assert not index.covers("ali", MONDAY)
+    assert index.working_dates("ali")[0] == datetime.date(2026, 10, 14)
@@ -0,0 +1,114 @@
+"""BookingJournal replay, snapshots and crash recovery"""
+import os
+
+import pytest
+
+from booking_store import BookingJournal, fcntl
+
+def appointment(patient_name: str, time_slot: str, doctor_id: str = "ali", day: str = "2026-10-12"):
+    return {"patient_name": patient_name, "doctor_id": doctor_id, "day": day, "time_slot": time_slot}
+
+def slots(appointments):
+    return sorted((a["doctor_id"], a["day"], a["time_slot"], a["patient_name"]) for a in appointments)
+
+def reload(directory, **kwargs):
+    journal = BookingJournal(str(directory), **kwargs)
+    try:
+        return journal.load()
+    finally:
+        journal.close()
+
+def test_replays_bookings_and_cancellations(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    assert journal.load() == []
+    journal.record_booking(appointment("Ann", "09:00"))
+    journal.record_booking(appointment("Bob", "09:20"))
+    journal.record_cancellation("ali", "2026-10-12", "09:00")
+    journal.record_batch([appointment("Cid", "09:40")], [("ali", "2026-10-12", "09:20")])
+    journal.close()
+    assert slots(reload(tmp_path)) == [("ali", "2026-10-12", "09:40", "Cid")]
+
+def test_replay_keeps_first_booking_of_a_slot(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Ann", "09:00"))
+    journal.record_booking(appointment("Bob", "09:00"))
+    journal.close()
+    assert slots(reload(tmp_path)) == [("ali", "2026-10-12", "09:00", "Ann")]
+
+def test_torn_tail_is_dropped(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Ann", "09:00"))
+    journal.close()
+    with open(journal.journal_path, "ab") as f:
+        f.write(b'["b","Bob","ali","2026-10')
+    assert slots(reload(tmp_path)) == [("ali", "2026-10-12", "09:00", "Ann")]
+    assert open(journal.journal_path, "rb").read().endswith(b"]\n")
+    # Appends after recovery land on a clean line
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Cid", "09:20"))
+    journal.close()
+    assert len(reload(tmp_path)) == 2
+
+@pytest.mark.parametrize("background", [False, True])
+def test_snapshot_retires_journal(tmp_path, background):
+    journal = BookingJournal(str(tmp_path), snapshot_every=2)
+    state = journal.load()
+    for patient_name, time_slot in [("Ann", "09:00"), ("Bob", "09:20")]:
+        state.append(appointment(patient_name, time_slot))
+        journal.record_booking(state[-1])
+    assert journal.needs_snapshot()
+    journal.write_snapshot(state, background=background)
+    journal.record_cancellation("ali", "2026-10-12", "09:00")
+    journal.wait_for_snapshot()
+    assert not os.path.exists(journal.previous_journal_path)
+    assert journal.records_since_snapshot == 1
+    journal.close()
+    assert slots(reload(tmp_path)) == [("ali", "2026-10-12", "09:20", "Bob")]
+
+def test_previous_journal_is_replayed_after_failed_snapshot(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Ann", "09:00"))
+    journal.close()
+    # A crash between moving the journal aside and writing the snapshot
+    os.replace(journal.journal_path, journal.previous_journal_path)
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Bob", "09:20"))
+    journal.close()
+    assert slots(reload(tmp_path)) == [("ali", "2026-10-12", "09:00", "Ann"),
+                                       ("ali", "2026-10-12", "09:20", "Bob")]
+
+@pytest.mark.skipif(fcntl is None, reason="no advisory locks on this platform")
+def test_directory_has_one_writer(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    with pytest.raises(RuntimeError):
+        BookingJournal(str(tmp_path)).load()
+    # Readers don't need the lock
+    assert reload(tmp_path, read_only=True) == []
+    journal.close()
+    assert reload(tmp_path) == []
+
+def test_read_only_journal_refuses_writes(tmp_path):
+    journal = BookingJournal(str(tmp_path), read_only=True)
+    journal.load()
+    with pytest.raises(RuntimeError):
+        journal.record_booking(appointment("Ann", "09:00"))
+    with pytest.raises(RuntimeError):
+        journal.write_snapshot([])
+
+def test_read_only_load_leaves_partial_record_alone(tmp_path):
+    journal = BookingJournal(str(tmp_path))
+    journal.load()
+    journal.record_booking(appointment("Ann", "09:00"))
+    # A record the writer is still appending
+    with open(journal.journal_path, "ab") as f:
+        f.write(b'["b","Bob","ali","2026-10')
+    size = os.path.getsize(journal.journal_path)
+    assert slots(reload(tmp_path, read_only=True)) == [("ali", "2026-10-12", "09:00", "Ann")]
+    assert os.path.getsize(journal.journal_path) == size
+    journal.close()
@@ -0,0 +1,77 @@
+"""ChatGPTHandler against a fake client that answers with canned JSON"""
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import chatgpt_handler
+from chatgpt_handler import ChatGPTHandler
+
+class FakeClient:
+    """Returns ``content`` from chat.completions.create, streamed in ``size``-character deltas"""
+
+    def __init__(self, content: str, size: int = 7):
+        self.content = content
+        self.size = size
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream: bool = False, **kwargs):
+        self.calls += 1
+        if not stream:
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+        deltas = [self.content[i:i + self.size] for i in range(0, len(self.content), self.size)]
+        chunks = [SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=d))])
+                  for d in deltas]
+        return iter(chunks + [SimpleNamespace(usage=None, choices=[])])
+
+FIELDS = {"patient_name": "Ann", "doctor_preference": None, "day_preference": None, "time_preference": "10:00"}
+
+@pytest.mark.parametrize("reply_first", [False, True])
+def test_stream_with_extraction_returns_the_fields(reply_first):
+    reply = {"reply": "Thanks Ann, checking 10:00."}
+    turn = {**reply, **FIELDS} if reply_first else {**FIELDS, **reply}
+    handler = ChatGPTHandler(client=FakeClient(json.dumps(turn)))
+    info, chunks = handler.stream_response_with_extraction("I'm Ann, 10 am please")
+    assert info["patient_name"] == "Ann"
+    assert info["time_preference"] == "10:00"
+    assert "".join(chunks) == "Thanks Ann, checking 10:00."
+
+class FakeDate(datetime.date):
+    current = datetime.date(2026, 3, 2)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+@pytest.fixture
+def fake_date(monkeypatch):
+    monkeypatch.setattr(chatgpt_handler, "datetime", SimpleNamespace(date=FakeDate))
+    monkeypatch.setattr(FakeDate, "current", FakeDate.current)
+    return FakeDate
+
+def test_system_prompt_follows_the_date(fake_date):
+    handler = ChatGPTHandler(client=FakeClient("{}"))
+    assert "Today is Monday, 2026-03-02." in handler.system_prompt
+    fake_date.current = datetime.date(2026, 3, 3)
+    assert "Today is Tuesday, 2026-03-03." in handler.system_prompt
+
+def test_cached_extraction_is_dated(fake_date):
+    client = FakeClient(json.dumps({"day_preference": "2026-03-03"}))
+    handler = ChatGPTHandler(client=client)
+    assert handler.extract_appointment_info("Tomorrow please")["day_preference"] == "2026-03-03"
+    assert handler.extract_appointment_info("tomorrow, please")["day_preference"] == "2026-03-03"
+    assert client.calls == 1
+    # The next day "tomorrow" is a different date
+    fake_date.current = datetime.date(2026, 3, 3)
+    handler.extract_appointment_info("tomorrow please")
+    assert client.calls == 2
+
+def test_sessions_share_the_extraction_cache():
+    client = FakeClient(json.dumps({"patient_name": "Ann"}))
+    first, second = ChatGPTHandler(client=client), ChatGPTHandler(client=client)
+    assert first.extraction_cache is second.extraction_cache
+    first.extract_appointment_info("my name is ann zeta")
+    assert second.extract_appointment_info("My name is Ann Zeta")["patient_name"] == "Ann"
+    assert client.calls == 1
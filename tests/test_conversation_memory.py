@@ -0,0 +1,12 @@
+"""Prompt layout of ConversationMemory.build_messages"""
+from conversation_memory import ConversationMemory
+
+def test_live_context_follows_the_history():
+    memory = ConversationMemory(token_budget=10_000)
+    memory.add("user", "Hi, I'm Ann")
+    memory.add("assistant", "Hello Ann, which doctor would you like?")
+    messages = memory.build_messages("static prompt", "Dr. Ali please", "instructions", "free: 09:00-12:00")
+    assert [m["content"] for m in messages[:2]] == ["static prompt", "instructions"]
+    assert messages[-2] == {"role": "system", "content": "free: 09:00-12:00"}
+    assert messages[-1] == {"role": "user", "content": "Dr. Ali please"}
+    assert [m["content"] for m in messages[-4:-2]] == ["Hi, I'm Ann", "Hello Ann, which doctor would you like?"]
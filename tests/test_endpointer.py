@@ -0,0 +1,72 @@
+"""EnergyEndpointer on synthetic WAV fixtures"""
+import numpy as np
+import pytest
+
+from audio_engine import encode_wav, read_wav
+from endpointer import EnergyEndpointer, level_db
+
+RATE = 16000
+FRAME = 0.03  # default frame_ms
+
+def write_fixture(path, speech_at: float, speech_seconds: float, trailing: float = 1.5,
+                  amplitude: float = 4000, noise: float = 30) -> str:
+    """Background hiss, then a syllable-modulated noise burst, then hiss again"""
+    rng = np.random.default_rng(0)
+    total = int((speech_at + speech_seconds + trailing) * RATE)
+    samples = rng.normal(0, noise, total)
+    start = int(speech_at * RATE)
+    t = np.arange(int(speech_seconds * RATE)) / RATE
+    envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 4 * t))
+    samples[start:start + t.size] += rng.normal(0, amplitude, t.size) * envelope
+    with open(path, "wb") as f:
+        f.write(encode_wav(np.clip(samples, -32768, 32767).astype(np.int16), RATE))
+    return str(path)
+
+def test_level_db():
+    assert level_db(np.zeros(480, np.int16)) == pytest.approx(-90.3, abs=0.1)
+    assert level_db(np.full(480, 32767, np.int16)) == pytest.approx(0.0, abs=0.01)
+
+def test_detects_utterance_bounds(tmp_path):
+    path = write_fixture(tmp_path / "utterance.wav", speech_at=1.0, speech_seconds=1.2)
+    start, end = EnergyEndpointer.detect_wav(path)
+    assert start == pytest.approx(1.0, abs=FRAME)
+    assert end == pytest.approx(2.2, abs=FRAME)
+
+def test_silence_has_no_speech(tmp_path):
+    path = write_fixture(tmp_path / "silence.wav", speech_at=1.0, speech_seconds=0.0)
+    assert EnergyEndpointer.detect_wav(path) is None
+
+def test_click_shorter_than_min_speech_is_ignored(tmp_path):
+    path = write_fixture(tmp_path / "click.wav", speech_at=1.0, speech_seconds=0.06)
+    assert EnergyEndpointer.detect_wav(path) is None
+
+def test_short_pause_does_not_end_utterance(tmp_path):
+    first = write_fixture(tmp_path / "first.wav", speech_at=0.5, speech_seconds=0.6, trailing=0.0)
+    samples, _ = read_wav(first)
+    pause = np.random.default_rng(1).normal(0, 30, int(0.4 * RATE)).astype(np.int16)
+    path = tmp_path / "two_words.wav"
+    with open(path, "wb") as f:
+        f.write(encode_wav(np.concatenate([samples, pause, samples[int(0.5 * RATE):], pause, pause, pause]), RATE))
+    start, end = EnergyEndpointer.detect_wav(str(path))
+    assert start == pytest.approx(0.5, abs=FRAME)
+    assert end == pytest.approx(2.1, abs=FRAME)
+
+def test_streaming_matches_whole_recording(tmp_path):
+    path = write_fixture(tmp_path / "utterance.wav", speech_at=0.8, speech_seconds=1.0)
+    samples, _ = read_wav(path)
+    endpointer = EnergyEndpointer(RATE)
+    expected = endpointer.detect(samples)
+    endpointer.reset()
+    for offset in range(0, samples.size, 333):
+        if endpointer.process(samples[offset:offset + 333]):
+            break
+    assert endpointer.done
+    assert (endpointer.speech_start, endpointer.speech_end) == expected
+
+def test_min_level_db_rejects_quiet_speech(tmp_path):
+    path = write_fixture(tmp_path / "quiet.wav", speech_at=1.0, speech_seconds=1.0, amplitude=300)
+    samples, _ = read_wav(path)
+    assert EnergyEndpointer(RATE).detect(samples) is not None
+    gated = EnergyEndpointer(RATE)
+    gated.process(samples, min_level_db=-20.0)
+    assert not gated.speech_started
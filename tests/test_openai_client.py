@@ -0,0 +1,169 @@
+"""Retry, deadline and hedging behaviour of openai_client against a local http.server stub"""
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import openai_client
+from openai_client import call_with_retries, hedged
+
+class StubError(Exception):
+    """HTTP error carrying status_code, like the OpenAI SDK's APIStatusError"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class StubServer:
+    """Answers each path from a script of (status, delay) per request, then 200 "ok" """
+
+    def __init__(self):
+        self.scripts = defaultdict(list)
+        self.hits = defaultdict(int)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits[self.path] += 1
+                script = server.scripts[self.path]
+                status, delay = script.pop(0) if script else (200, 0.0)
+                time.sleep(delay)
+                body = f"{status} #{server.hits[self.path]}".encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def get(self, path: str):
+        def request(timeout: float) -> str:
+            try:
+                with urllib.request.urlopen(self.url + path, timeout=timeout) as response:
+                    return response.read().decode()
+            except urllib.error.HTTPError as e:
+                raise StubError(e.code) from None
+        return request
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    yield stub
+    stub.httpd.shutdown()
+    stub.httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setitem(openai_client.OPENAI_CLIENT_CONFIG, "backoff_base", 0.01)
+    monkeypatch.setitem(openai_client.OPENAI_CLIENT_CONFIG, "max_retries", 2)
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_retries_transient_status(server, status):
+    server.scripts["/chat"] = [(status, 0.0), (status, 0.0)]
+    assert call_with_retries("chat", server.get("/chat"), deadline=5.0) == "200 #3"
+    assert server.hits["/chat"] == 3
+
+def test_gives_up_after_max_retries(server):
+    server.scripts["/chat"] = [(503, 0.0)] * 5
+    with pytest.raises(StubError) as error:
+        call_with_retries("chat", server.get("/chat"), deadline=5.0)
+    assert error.value.status_code == 503
+    assert server.hits["/chat"] == 3
+
+def test_client_errors_are_not_retried(server):
+    server.scripts["/chat"] = [(400, 0.0)]
+    with pytest.raises(StubError):
+        call_with_retries("chat", server.get("/chat"), deadline=5.0)
+    assert server.hits["/chat"] == 1
+
+def test_timeout_stays_within_deadline(server):
+    server.scripts["/chat"] = [(200, 2.0)]
+    started = time.monotonic()
+    with pytest.raises(OSError):  # socket timeout
+        call_with_retries("chat", server.get("/chat"), deadline=0.5)
+    assert time.monotonic() - started < 1.0
+
+def test_timeout_is_retried_while_deadline_remains(server):
+    # hedged() gives each attempt the whole remaining deadline, so use a short per-request timeout
+    server.scripts["/chat"] = [(200, 1.0)]
+    request = server.get("/chat")
+    assert call_with_retries("chat", lambda timeout: request(min(timeout, 0.2)), deadline=3.0) == "200 #2"
+
+def test_hedge_returns_the_faster_request(server):
+    server.scripts["/extract"] = [(200, 1.0)]
+    started = time.monotonic()
+    assert hedged("extract", server.get("/extract"), hedge_after=0.1) == "200 #2"
+    assert time.monotonic() - started < 0.8
+    assert server.hits["/extract"] == 2
+
+def test_no_hedge_when_first_request_is_fast(server):
+    assert hedged("extract", server.get("/extract"), hedge_after=0.5) == "200 #1"
+    assert server.hits["/extract"] == 1
+
+def test_hedge_loser_response_is_closed():
+    class Response:
+        def __init__(self, name):
+            self.name = name
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    slow = Response("slow")
+    calls = []
+
+    def request(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(0.3)
+            return slow
+        return Response("fast")
+
+    assert hedged("extract", request, hedge_after=0.05).name == "fast"
+    deadline = time.monotonic() + 2.0
+    while not slow.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert slow.closed
+
+def test_queued_hedge_is_never_sent():
+    # A duplicate still waiting for a pool thread is cancelled before it is sent
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    pool.submit(release.wait)
+    calls = []
+    queued = pool.submit(calls.append, 1.0)
+    openai_client._cancel_hedge(queued)
+    release.set()
+    pool.shutdown(wait=True)
+    assert queued.cancelled()
+    assert calls == []
+
+def test_hedging_can_be_turned_off(server, monkeypatch):
+    monkeypatch.setitem(openai_client.OPENAI_CLIENT_CONFIG, "hedging", False)
+    server.scripts["/extract"] = [(200, 0.3)]
+    assert hedged("extract", server.get("/extract"), hedge_after=0.05) == "200 #1"
+    assert server.hits["/extract"] == 1
+
+def test_hedge_timer_starts_when_request_is_sent(server, monkeypatch):
+    # The only pool thread is busy for longer than hedge_after; the queued request is not slow
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(openai_client, "_hedge_pool", pool)
+    pool.submit(time.sleep, 0.3)
+    server.scripts["/extract"] = [(200, 0.05)]
+    assert hedged("extract", server.get("/extract"), hedge_after=0.2) == "200 #1"
+    pool.shutdown(wait=True)
+    assert server.hits["/extract"] == 1
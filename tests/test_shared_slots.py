@@ -0,0 +1,76 @@
+"""Two AppointmentManagers on one SharedSlotMap, standing in for two worker processes"""
+import datetime
+
+import pytest
+
+from appointment_manager import AppointmentManager
+from availability import WEEKDAYS, slot_grid
+from booking_store import BookingJournal, worker_directory
+from config import DOCTORS
+from shared_slots import SharedSlotMap
+
+@pytest.fixture
+def shared():
+    slot_map = SharedSlotMap.create(days=28)
+    yield slot_map
+    slot_map.close()
+
+def next_working_day(doctor_id: str) -> str:
+    date = datetime.date.today() + datetime.timedelta(days=1)
+    while WEEKDAYS[date.weekday()] not in DOCTORS[doctor_id]["days"]:
+        date += datetime.timedelta(days=1)
+    return date.isoformat()
+
+def test_queries_see_claims_made_by_other_workers(shared):
+    day = next_working_day("ali")
+    first, second = AppointmentManager(shared=shared), AppointmentManager(shared=shared)
+    # Materialize the second worker's bitmaps before the first one books
+    assert second.find_earliest_slot("ali", datetime.datetime.fromisoformat(day)) == (day, "09:00")
+    before = second.availability_context("ali", day)
+    assert first.book_appointment("Ann", "ali", day, "09:00")
+    assert second.find_earliest_slot("ali", datetime.datetime.fromisoformat(day)) == (day, "09:20")
+    assert (day, "09:00") not in second.nearest_slots("ali", day, "09:00")
+    assert before.endswith(": 09:00-16:40")
+    assert second.availability_context("ali", day).endswith(": 09:20-16:40")
+    # A cancellation elsewhere frees the slot again
+    assert first.cancel_appointment("ali", day, "09:00")
+    assert second.find_earliest_slot("ali", datetime.datetime.fromisoformat(day)) == (day, "09:00")
+    assert second.availability_context("ali", day) == before
+
+def test_whole_day_booked_elsewhere_is_skipped(shared):
+    day = next_working_day("ali")
+    first, second = AppointmentManager(shared=shared), AppointmentManager(shared=shared)
+    second.find_earliest_slot("ali", datetime.datetime.fromisoformat(day))
+    assert first.book_many([{"patient_name": f"P{i}", "doctor_id": "ali", "day": day, "time_slot": slot}
+                            for i, slot in enumerate(slot_grid("ali"))])["booked"] == len(slot_grid("ali"))
+    found = second.find_earliest_slot("ali", datetime.datetime.fromisoformat(day))
+    assert found is not None and found[0] > day
+    assert second.availability_context("ali", day).endswith("fully booked")
+
+def test_restarted_worker_replays_its_own_slots(shared, tmp_path):
+    day = next_working_day("ali")
+    journals = [BookingJournal(worker_directory(str(tmp_path), i)) for i in range(2)]
+    first = AppointmentManager(journals[0], shared, worker_id=0)
+    second = AppointmentManager(journals[1], shared, worker_id=1)
+    assert first.book_appointment("Ann", "ali", day, "09:00")
+    assert second.book_appointment("Bob", "ali", day, "09:20")
+    assert shared.holder("ali", day, "09:00") == 0
+    first.close()
+    # The map outlives the worker; its restart finds its own claims still in place
+    restarted = AppointmentManager(BookingJournal(worker_directory(str(tmp_path), 0)), shared, worker_id=0)
+    assert restarted.replay_conflicts == []
+    assert restarted.is_slot_booked("ali", day, "09:20")
+    assert restarted.cancel_appointment("ali", day, "09:00")
+    assert shared.holder("ali", day, "09:00") is None
+    restarted.close()
+    second.close()
+
+def test_replayed_slot_held_by_another_worker_is_a_conflict(shared, tmp_path):
+    day = next_working_day("ali")
+    writer = AppointmentManager(BookingJournal(str(tmp_path)), worker_id=0)
+    assert writer.book_appointment("Ann", "ali", day, "09:00")
+    writer.close()
+    assert shared.claim("ali", day, "09:00", worker=1)
+    replayed = AppointmentManager(BookingJournal(str(tmp_path)), shared, worker_id=0)
+    assert [a["patient_name"] for a in replayed.replay_conflicts] == ["Ann"]
+    replayed.close()
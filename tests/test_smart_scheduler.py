@@ -0,0 +1,30 @@
+"""SmartAppointmentScheduler booking checks, with no voice or LLM calls"""
+import datetime
+from types import SimpleNamespace
+
+import smart_scheduler
+from appointment_manager import AppointmentManager
+from chatgpt_handler import ChatGPTHandler
+from smart_scheduler import SmartAppointmentScheduler
+
+def test_slot_that_started_seconds_ago_is_not_booked(monkeypatch):
+    day = datetime.date.today() + datetime.timedelta(days=1)
+    while day.weekday() not in (0, 2, 4):  # Dr. Ali works Monday, Wednesday and Friday
+        day += datetime.timedelta(days=1)
+    day = day.isoformat()
+    started = datetime.datetime.fromisoformat(f"{day}T09:00:30")
+
+    class FakeDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return started
+
+    monkeypatch.setattr(smart_scheduler, "datetime", SimpleNamespace(
+        datetime=FakeDatetime, date=datetime.date, time=datetime.time, timedelta=datetime.timedelta))
+    manager = AppointmentManager()
+    scheduler = SmartAppointmentScheduler(voice=object(), chatgpt=ChatGPTHandler(client=object()),
+                                          appointment_manager=manager, speculate=False, speak_replies=False)
+    scheduler.booking_context = {"patient_name": "Ann", "doctor_preference": "ali",
+                                 "day_preference": day, "time_preference": "09:00"}
+    assert "has already passed" in scheduler.attempt_booking()
+    assert not manager.is_slot_booked("ali", day, "09:00")
@@ -0,0 +1,64 @@
+"""SpeechRouter and VoiceInterface with stub speech backends (no network, no API key)"""
+import pytest
+
+from speech_backends import SpeechRouter, StubSTT, StubTTS, silent_wav, wav_duration
+from voice_interface import VoiceInterface
+
+SHORT = "Goodbye!"
+LONG = "Dr. Sara is free on Tuesday at 10:00, 10:20 and 11:40, and on Thursday afternoon from 14:00."
+
+def make_voice(tmp_path, cloud_fail=False, **router_options):
+    router = SpeechRouter(
+        cloud_tts=StubTTS("cloud-tts", local=False, fail=cloud_fail),
+        local_tts=StubTTS("local-tts", local=True),
+        cloud_stt=StubSTT(["i'd like to see dr. ali on monday"] * 4, "cloud-stt", local=False, fail=cloud_fail),
+        local_stt=StubSTT(["yes"] * 4, "local-stt", local=True),
+        **router_options
+    )
+    return VoiceInterface(tts_cache_dir=str(tmp_path), router=router), router
+
+def test_stub_wav_duration():
+    assert wav_duration(silent_wav(0.5, 16000)) == pytest.approx(0.5)
+    assert wav_duration(b"not a wav") == 0.0
+
+def test_long_text_goes_to_cloud_and_is_cached(tmp_path):
+    voice, router = make_voice(tmp_path)
+    path = voice.synthesize(LONG)
+    assert voice.synthesize(LONG) == path
+    assert router.calls == {"cloud-tts": 1}
+
+def test_short_text_prefers_local(tmp_path):
+    voice, router = make_voice(tmp_path)
+    voice.synthesize(SHORT)
+    assert router.calls == {"local-tts": 1}
+
+def test_cloud_failure_falls_back_to_local(tmp_path):
+    voice, router = make_voice(tmp_path, cloud_fail=True)
+    voice.synthesize(LONG)
+    assert router.calls == {"cloud-tts": 1, "local-tts": 1}
+    assert router.failures == {"cloud-tts": 1}
+    stats = router.stats()
+    assert not stats["cloud-tts"]["healthy"]
+    # While the cloud engine cools down it is tried last
+    voice.synthesize(LONG + " (again)")
+    assert router.calls == {"cloud-tts": 1, "local-tts": 2}
+
+def test_served_since_ignores_prefetch(tmp_path):
+    voice, _ = make_voice(tmp_path)
+    voice.synthesize(SHORT, prefetch=True)
+    assert not voice.served_since(SHORT, 0.0)
+    voice.synthesize(SHORT)
+    assert voice.served_since(SHORT, 0.0)
+
+def test_yes_no_answer_goes_to_local_recognition(tmp_path):
+    voice, router = make_voice(tmp_path)
+    assert voice.transcribe(silent_wav(0.8, 16000), keywords=["yes", "no"]) == "yes"
+    assert voice.transcribe(silent_wav(3.0, 16000)) == "i'd like to see dr. ali on monday"
+    assert router.calls == {"local-stt": 1, "cloud-stt": 1}
+
+def test_all_engines_failing_raises(tmp_path):
+    router = SpeechRouter(cloud_tts=StubTTS("cloud-tts", local=False, fail=True),
+                          local_tts=StubTTS("local-tts", local=True, fail=True))
+    voice = VoiceInterface(tts_cache_dir=str(tmp_path), router=router)
+    with pytest.raises(ConnectionError):
+        voice.synthesize(LONG)
@@ -0,0 +1,42 @@
+"""TurnExecutor pools, caps and waste metrics"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import turn_executor
+from turn_executor import TurnExecutor
+
+def test_urgent_speculation_skips_the_speculation_queue(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(turn_executor, "_speculation_pool", pool)
+    release = threading.Event()
+    pool.submit(release.wait)  # other sessions' look-ahead work holds every thread
+    executor = TurnExecutor(max_inflight=5)
+    optional = executor.speculate("slots", lambda: "slots")
+    reply = executor.speculate("reply", lambda: "reply", urgent=True)
+    assert reply.future.result(timeout=1.0) == "reply"
+    assert not optional.future.done()
+    release.set()
+    assert executor.use(optional) == "slots"
+    pool.shutdown(wait=True)
+
+def test_stream_replays_chunks():
+    executor = TurnExecutor()
+    speculation = executor.speculate_stream("reply", lambda: iter(["Hello", " there"]), urgent=True)
+    assert "".join(executor.stream(speculation)) == "Hello there"
+    assert executor.metrics()["reply"]["used"] == 1
+
+def test_wasteful_kind_is_capped():
+    executor = TurnExecutor(min_samples=2, max_waste_ratio=0.5)
+    for _ in range(2):
+        executor.discard(executor.speculate("audio", lambda: None))
+    assert executor.speculate("audio", lambda: None) is None
+    metrics = executor.metrics()["audio"]
+    assert (metrics["launched"], metrics["wasted"], metrics["skipped"]) == (2, 2, 1)
+
+def test_inflight_cap():
+    executor = TurnExecutor(max_inflight=1)
+    release = threading.Event()
+    first = executor.speculate("slots", release.wait)
+    assert executor.speculate("slots", lambda: None) is None
+    release.set()
+    executor.use(first)
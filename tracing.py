@@ -0,0 +1,130 @@
+import json
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+class Histogram:
+    """Latency samples for one stage; keeps a bounded uniform reservoir for percentiles"""
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self.samples: List[float] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(seconds)
+        else:
+            index = random.randrange(self.count)
+            if index < self.max_samples:
+                self.samples[index] = seconds
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(1000 * self.total, 2),
+            "p50_ms": round(1000 * self.percentile(50), 2),
+            "p95_ms": round(1000 * self.percentile(95), 2),
+            "p99_ms": round(1000 * self.percentile(99), 2),
+            "max_ms": round(1000 * self.max, 2)
+        }
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class Tracer:
+    """Per-stage latency spans with in-process histograms and per-turn breakdowns.
+
+    Disabled by default: span() then returns a shared no-op context manager
+    and record() returns immediately, so instrumentation can stay in place.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.histograms: Dict[str, Histogram] = {}
+        self.turns: List[Dict[str, float]] = []
+        self._current_turn: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            if self._current_turn is not None:
+                self._current_turn[name] = self._current_turn.get(name, 0.0) + 1000 * seconds
+
+    def start_turn(self) -> None:
+        if self.enabled:
+            with self._lock:
+                self._current_turn = {}
+
+    def end_turn(self) -> None:
+        if self.enabled:
+            with self._lock:
+                if self._current_turn:
+                    self.turns.append({k: round(v, 2) for k, v in self._current_turn.items()})
+                self._current_turn = None
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stages": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "turns": list(self.turns)
+            }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+# Process-wide tracer used by all modules
+tracer = Tracer()
+
+def span(name: str):
+    return tracer.span(name)
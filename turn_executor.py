@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+from config import SERVER_CONFIG, SPECULATION_CONFIG
+
+# Shared by every session; per-session caps are enforced by TurnExecutor. Work a turn waits on
+# (extraction and the reply drafted alongside it) gets its own pool, two threads per concurrent
+# LLM request, so optional look-ahead speculation never queues ahead of it
+_turn_pool = ThreadPoolExecutor(max_workers=2 * SERVER_CONFIG["llm_concurrency"], thread_name_prefix="turn")
+_speculation_pool = ThreadPoolExecutor(max_workers=SPECULATION_CONFIG["workers"], thread_name_prefix="speculation")
+
+_STREAM_END = object()
+
+class Speculation:
+    """A speculative task: its future plus the bookkeeping for waste metrics"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.future: Optional[Future] = None
+        self.duration: Optional[float] = None
+        self.outcome: Optional[str] = None  # "used" or "wasted"
+        self.chunks: Optional["queue.Queue[Any]"] = None
+        self.stop = threading.Event()
+
+class TurnExecutor:
+    """Runs turn work in parallel and speculative work ahead of need.
+
+    run() is for work the turn always uses (e.g. LLM extraction) and has
+    its own pool. speculate() and speculate_stream() are for work that may be thrown
+    away, such as a reply drafted before extraction decides whether the
+    booking is complete. Speculations the turn normally waits on pass
+    ``urgent=True`` and run on the turn pool too; the rest (slot lists,
+    audio for the next turn) share a smaller pool across all sessions.
+
+    Every speculation ends in use() or discard(), and those calls feed the
+    per-kind waste metrics. Once a kind has ``min_samples`` outcomes and
+    more than ``max_waste_ratio`` of them were discarded, that kind is no
+    longer speculated on. At most ``max_inflight`` speculations run at once.
+    """
+
+    def __init__(self, enabled: bool = SPECULATION_CONFIG["enabled"],
+                 max_inflight: int = SPECULATION_CONFIG["max_inflight"],
+                 max_waste_ratio: float = SPECULATION_CONFIG["max_waste_ratio"],
+                 min_samples: int = SPECULATION_CONFIG["min_samples"]):
+        self.enabled = enabled
+        self.max_inflight = max_inflight
+        self.max_waste_ratio = max_waste_ratio
+        self.min_samples = min_samples
+        self.launched: Counter = Counter()
+        self.used: Counter = Counter()
+        self.wasted: Counter = Counter()
+        self.skipped: Counter = Counter()
+        self.wasted_seconds: Counter = Counter()
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Future:
+        return _turn_pool.submit(fn, *args)
+
+    def allowed(self, kind: str) -> bool:
+        if not self.enabled:
+            return False
+        outcomes = self.used[kind] + self.wasted[kind]
+        return outcomes < self.min_samples or self.wasted[kind] / outcomes <= self.max_waste_ratio
+
+    def _begin(self, kind: str) -> Optional[Speculation]:
+        with self._lock:
+            if not self.allowed(kind) or self._inflight >= self.max_inflight:
+                self.skipped[kind] += 1
+                return None
+            self._inflight += 1
+            self.launched[kind] += 1
+        return Speculation(kind)
+
+    def _finished(self, speculation: Speculation, started: float) -> None:
+        with self._lock:
+            speculation.duration = time.perf_counter() - started
+            self._inflight -= 1
+            if speculation.outcome == "wasted":
+                self.wasted_seconds[speculation.kind] += speculation.duration
+
+    def speculate(self, kind: str, fn: Callable[..., Any], *args: Any, urgent: bool = False) -> Optional[Speculation]:
+        """Start fn(*args) speculatively; None if speculation is disabled or capped"""
+        speculation = self._begin(kind)
+        if speculation is None:
+            return None
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._finished(speculation, started)
+
+        speculation.future = (_turn_pool if urgent else _speculation_pool).submit(task)
+        return speculation
+
+    def speculate_stream(self, kind: str, fn: Callable[..., Iterator[Any]], *args: Any,
+                         urgent: bool = False) -> Optional[Speculation]:
+        """Start consuming the iterator fn(*args) into a buffer; stream() replays it live"""
+        speculation = self._begin(kind)
+        if speculation is None:
+            return None
+        speculation.chunks = queue.Queue()
+
+        def task():
+            started = time.perf_counter()
+            iterator = fn(*args)
+            try:
+                for chunk in iterator:
+                    if speculation.stop.is_set():
+                        break
+                    speculation.chunks.put(chunk)
+            finally:
+                close = getattr(iterator, "close", None)
+                if close:
+                    close()
+                speculation.chunks.put(_STREAM_END)
+                self._finished(speculation, started)
+
+        speculation.future = (_turn_pool if urgent else _speculation_pool).submit(task)
+        return speculation
+
+    def use(self, speculation: Speculation) -> Any:
+        """Take the result of a speculation (waits for it; re-raises its error)"""
+        self._resolve(speculation, used=True)
+        return speculation.future.result()
+
+    def stream(self, speculation: Speculation) -> Iterator[Any]:
+        """Use a speculate_stream() speculation: yield its chunks as they arrive"""
+        self._resolve(speculation, used=True)
+        while True:
+            chunk = speculation.chunks.get()
+            if chunk is _STREAM_END:
+                break
+            yield chunk
+        speculation.future.result()
+
+    def discard(self, speculation: Optional[Speculation]) -> None:
+        """Throw a speculation away, cancelling it if it hasn't finished"""
+        if speculation is None or speculation.outcome:
+            return
+        speculation.stop.set()
+        if speculation.future.cancel():
+            with self._lock:
+                self._inflight -= 1
+        self._resolve(speculation, used=False)
+
+    def _resolve(self, speculation: Speculation, used: bool) -> None:
+        with self._lock:
+            if speculation.outcome:
+                return
+            speculation.outcome = "used" if used else "wasted"
+            if used:
+                self.used[speculation.kind] += 1
+            else:
+                self.wasted[speculation.kind] += 1
+                # Still running: _finished() adds its time when it ends
+                if speculation.duration is not None:
+                    self.wasted_seconds[speculation.kind] += speculation.duration
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-kind speculation counts and wasted work"""
+        with self._lock:
+            kinds = set(self.launched) | set(self.skipped)
+            return {
+                kind: {
+                    "launched": self.launched[kind],
+                    "used": self.used[kind],
+                    "wasted": self.wasted[kind],
+                    "skipped": self.skipped[kind],
+                    "wasted_seconds": round(self.wasted_seconds[kind], 3)
+                }
+                for kind in sorted(kinds)
+            }
@@ -1,62 +1,315 @@
-import openai
+import io
 import os
-from typing import Optional
-from dotenv import load_dotenv
+import re
+import time
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Any, Dict, Optional, Iterable, Iterator, Sequence
+from cache import DiskCache, LRUCache
+from config import AUDIO_CONFIG, CACHE_CONFIG, VOICE_CONFIG
+from openai_client import get_client
+from speech_backends import SpeechRouter, OpenAITTS, Pyttsx3TTS, WhisperSTT, SphinxSTT, wav_duration
+from tracing import span, tracer
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise EnvironmentError("OPENAI_API_KEY not found in .env file. Please set your OpenAI API key.")
+# Sentence end: terminal punctuation + whitespace, but not after common title abbreviations
+SENTENCE_END = re.compile(r"(?<!\bDr)(?<!\bMr)(?<!\bMs)(?<!\bMrs)(?<!\bSt)[.!?]+[\"')]*\s+")
 
-openai.api_key = api_key
+RETRY_PROMPT = "Sorry, I couldn't understand what you said. Please try again."
+
+# Command-line players that block until playback ends, in order of preference
+PLAYERS = [
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"],
+    ["afplay"],
+    ["mpg123", "-q"],
+]
+
+def iter_sentences(chunks: Iterable[str], min_chars: int = 20) -> Iterator[str]:
+    """Regroup streamed text chunks into sentences of at least min_chars"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            if match.end() - start >= min_chars:
+                yield buffer[start:match.end()].strip()
+                start = match.end()
+        buffer = buffer[start:]
+    if buffer.strip():
+        yield buffer.strip()
 
 class VoiceInterface:
-    def __init__(self):
-        pass  # No need for recognizer or pyttsx3
+    """Speech in and out for the scheduler.
+
+    Recognition and synthesis go through a SpeechRouter. The default router
+    pairs Whisper and OpenAI TTS with the local engines (pyttsx3,
+    PocketSphinx) when they are installed. Pass ``router`` with stub
+    backends to run without a network or API key.
+    """
+
+    def __init__(self, tts_model: str = "tts-1", tts_voice: str = "alloy", client: Any = None,
+                 tts_cache_dir: Optional[str] = None, audio_engine: Any = None, router: Optional[SpeechRouter] = None):
+        self._client = client
+        self.tts_model = tts_model
+        self.tts_voice = tts_voice  # You can choose other voices: echo, fable, etc.
+        # The full-duplex engine plays WAV decoded in memory; CLI players get MP3
+        self._engine = audio_engine
+        self._engine_failed = False
+        self._engine_lock = threading.Lock()
+        self.audio_format = "wav" if audio_engine is not None or AUDIO_CONFIG["full_duplex"] else "mp3"
+        # Synthesized audio keyed on text + voice + model, reused across runs
+        self.tts_cache = DiskCache(
+            tts_cache_dir or CACHE_CONFIG["tts_dir"], CACHE_CONFIG["tts_entries"], CACHE_CONFIG["tts_ttl"],
+            suffix=self.audio_format
+        )
+        # Decoded prompts, so repeated phrases skip the file read and WAV decode
+        self._decoded = LRUCache(AUDIO_CONFIG["decoded_prompts"])
+        # When each recent text was last served from the TTS cache, to settle audio speculation
+        self._served = LRUCache(AUDIO_CONFIG["decoded_prompts"])
+        self.router = router if router is not None else SpeechRouter(
+            cloud_tts=OpenAITTS(lambda: self.client, tts_model, tts_voice, self.audio_format),
+            local_tts=Pyttsx3TTS() if VOICE_CONFIG["local_tts"] else None,
+            cloud_stt=WhisperSTT(lambda: self.client),
+            local_stt=SphinxSTT() if VOICE_CONFIG["local_stt"] else None
+        )
+        # Local engines may produce a different format than the cloud one; same directory, own suffix
+        self._caches: Dict[str, DiskCache] = {self.audio_format: self.tts_cache}
+        for backend in self.router.tts:
+            if backend.audio_format not in self._caches:
+                self._caches[backend.audio_format] = DiskCache(
+                    self.tts_cache.directory, CACHE_CONFIG["tts_entries"], CACHE_CONFIG["tts_ttl"],
+                    suffix=backend.audio_format
+                )
+
+    @property
+    def client(self) -> Any:
+        # Resolved on first use so constructing the interface doesn't import the OpenAI SDK
+        return self._client if self._client is not None else get_client()
 
-    def speak(self, text: str) -> None:
-        """Convert text to speech using OpenAI TTS"""
+    @property
+    def engine(self) -> Any:
+        """The full-duplex AudioEngine, opened on first use; None when disabled or no device is available"""
+        with self._engine_lock:
+            if self._engine is None and AUDIO_CONFIG["full_duplex"] and not self._engine_failed:
+                try:
+                    from audio_engine import AudioEngine, SoundDeviceAudio
+                    device = SoundDeviceAudio(AUDIO_CONFIG["input_rate"], AUDIO_CONFIG["output_rate"])
+                    self._engine = AudioEngine(
+                        device, frame_ms=AUDIO_CONFIG["frame_ms"], barge_in=AUDIO_CONFIG["barge_in"],
+                        barge_in_margin_db=AUDIO_CONFIG["barge_in_margin_db"], pre_roll_ms=AUDIO_CONFIG["pre_roll_ms"]
+                    ).start()
+                except Exception as e:
+                    print(f"Audio engine unavailable ({e}); falling back to CLI playback.")
+                    self._engine_failed = True
+        return self._engine
+
+    def synthesize(self, text: str, prefetch: bool = False) -> str:
+        """Return the path of the audio for text, synthesizing it only on a cache miss.
+
+        Audio any engine has already cached is used first. Otherwise the
+        engines are tried in the router's order until one succeeds.
+        ``prefetch`` marks a call that only fills the cache, so it isn't
+        counted by served_since().
+        """
+        backends = self.router.tts_order(text)
+        if not backends:
+            raise RuntimeError("No text-to-speech backend available")
+        keys = [DiskCache.make_key(text, *backend.cache_parts()) for backend in backends]
+        for backend, key in zip(backends, keys):
+            path = self._caches[backend.audio_format].get_path(key)
+            if path is not None:
+                if not prefetch:
+                    self._served.set(text, time.monotonic())
+                return path
+        for i, (backend, key) in enumerate(zip(backends, keys)):
+            last = i + 1 == len(backends)
+            try:
+                with span("tts_synthesis"):
+                    audio = self.router.call(backend, "tts", lambda deadline: backend.synthesize(text, deadline),
+                                             fallback=not last)
+            except Exception as e:
+                if last:
+                    raise
+                print(f"Speech engine {backend.name} failed ({e}); using {backends[i + 1].name}")
+                continue
+            return self._caches[backend.audio_format].set(key, audio)
+
+    def served_since(self, text: str, since: float) -> bool:
+        """Whether text's audio was taken from the TTS cache after time.monotonic() value since"""
+        served = self._served.get(text)
+        return served is not None and served > since
+
+    def play(self, path: str) -> bool:
+        """Play an audio file, blocking until it finishes; False if the caller interrupted it"""
+        engine = self.engine
+        if engine is not None and path.endswith(".wav"):
+            from audio_engine import read_wav
+            decoded = self._decoded.get(path)
+            if decoded is None:
+                decoded = read_wav(path)
+                self._decoded.set(path, decoded)
+            engine.play(*decoded)
+            return engine.wait()
+        for player in PLAYERS:
+            if shutil.which(player[0]):
+                subprocess.run(player + [path], check=False)
+                return True
+        # Play the audio (Windows); returns immediately
+        os.system(f'start "" "{path}"')
+        return True
+
+    def speak(self, text: str) -> bool:
+        """Convert text to speech and play it; False if the caller barged in"""
         print(f"Assistant: {text}")
         try:
-            response = openai.audio.speech.create(
-                model="tts-1",
-                voice="alloy",  # You can choose other voices: echo, fable, etc.
-                input=text
-            )
-            # Save the audio to a file and play it
-            with open("output.mp3", "wb") as f:
-                f.write(response.content)
-            # Play the audio (Windows)
-            os.system("start output.mp3")
+            path = self.synthesize(text)
+            with span("playback"):
+                return self.play(path)
         except Exception as e:
             print(f"Speech error: {e}")
+            return True
+
+    def speak_stream(self, chunks: Iterable[str]) -> str:
+        """Speak streamed text sentence by sentence and return the full text.
 
-    def listen(self, timeout: int = 10) -> Optional[str]:
-        """Listen for voice input and convert to text using OpenAI Whisper"""
+        A producer thread splits the incoming chunks into sentences and
+        synthesizes each one while earlier sentences are still playing, so
+        audio starts as soon as the first sentence is ready. If the caller
+        barges in, the remaining sentences are not synthesized or played.
+        """
+        audio_queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=4)
+        spoken = []
+        interrupted = threading.Event()
+
+        def produce():
+            try:
+                for sentence in iter_sentences(chunks):
+                    spoken.append(sentence)
+                    print(f"Assistant: {sentence}")
+                    if not interrupted.is_set():
+                        audio_queue.put(self.synthesize(sentence))
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                audio_queue.put(None)
+
+        started = time.perf_counter()
+        first_audio = True
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        while True:
+            path = audio_queue.get()
+            if path is None:
+                break
+            if interrupted.is_set():
+                continue
+            if first_audio:
+                tracer.record("time_to_first_audio", time.perf_counter() - started)
+                first_audio = False
+            try:
+                with span("playback"):
+                    if not self.play(path):
+                        interrupted.set()
+            except Exception as e:
+                print(f"Speech error: {e}")
+        producer.join()
+        return " ".join(spoken)
+
+    @staticmethod
+    def load_audio_stack() -> None:
+        """Import the capture/VAD modules listen() needs (slow on first import)"""
+        import sounddevice
+        import numpy
+        import scipy.io.wavfile
+        import endpointer
+        import audio_engine
+
+    def transcribe(self, audio: bytes, keywords: Optional[Sequence[str]] = None) -> str:
+        """Transcribe WAV bytes; ``keywords`` are the short answers expected, if any"""
+        backends = self.router.stt_order(wav_duration(audio), keywords)
+        if not backends:
+            raise RuntimeError("No speech recognition backend available")
+        response = ""
+        for i, backend in enumerate(backends):
+            last = i + 1 == len(backends)
+            try:
+                with span("transcribe"):
+                    response = self.router.call(backend, "transcribe",
+                                                lambda deadline: backend.transcribe(audio, deadline, keywords),
+                                                fallback=not last)
+            except Exception as e:
+                if last:
+                    raise
+                print(f"Speech engine {backend.name} failed ({e}); using {backends[i + 1].name}")
+                continue
+            # A keyword spotter that heard none of its keywords leaves it to the next engine
+            if response:
+                break
+        print(f"You said: {response}")
+        return response
+
+    def listen(self, timeout: int = 10, expect: Optional[Sequence[str]] = None) -> Optional[str]:
+        """Listen for voice input and convert it to text.
+
+        Capture stops as soon as the endpointer hears trailing silence after
+        speech (or after ``timeout`` seconds), and the audio is transcribed
+        from memory. With the audio engine, speech that barged in on the last
+        prompt is already being recorded and is picked up from its onset.
+        ``expect`` lists the short answers the question allows (e.g. yes/no),
+        so a short reply can be recognized locally.
+        """
         try:
+            engine = self.engine
+            if engine is not None:
+                from audio_engine import encode_wav
+                print("Listening...")
+                with span("record"):
+                    recording = engine.listen(timeout)
+                if recording is None:
+                    print("No speech detected.")
+                    return None
+                return self.transcribe(encode_wav(recording, engine.device.input_rate), expect)
+
             import sounddevice as sd
             import numpy as np
             import scipy.io.wavfile as wav
+            from endpointer import EnergyEndpointer
 
             print("Listening...")
             fs = 16000  # Whisper expects 16kHz
-            duration = timeout
+            endpointer = EnergyEndpointer(sample_rate=fs)
+            blocks: "queue.Queue" = queue.Queue()
+            chunks = []
             print("Please speak now...")
-            recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-            sd.wait()
-            wav.write("input.wav", fs, recording)
-
-            # Send audio to OpenAI Whisper
-            with open("input.wav", "rb") as audio_file:
-                transcript = openai.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file
-                )
-            response = transcript.text.lower().strip()
-            print(f"You said: {response}")
-            return response
+            stream = sd.InputStream(samplerate=fs, channels=1, dtype='int16', blocksize=endpointer.frame_size,
+                                    callback=lambda data, frames, t, status: blocks.put(data[:, 0].copy()))
+            with span("record"), stream:
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    try:
+                        block = blocks.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    chunks.append(block)
+                    if endpointer.process(block):
+                        break
+
+            if not chunks or not endpointer.speech_started:
+                print("No speech detected.")
+                return None
+            # Keep a short pre-roll before detected speech onset
+            recording = np.concatenate(chunks)[max(0, endpointer.speech_start - fs // 4):]
+            buffer = io.BytesIO()
+            wav.write(buffer, fs, recording)
+
+            return self.transcribe(buffer.getvalue(), expect)
 
         except Exception as e:
             print(f"Speech recognition error: {e}")
-            self.speak("Sorry, I couldn't understand what you said. Please try again.")
-            return None
\ No newline at end of file
+            self.speak(RETRY_PROMPT)
+            return None
+
+    def close(self) -> None:
+        if self._engine is not None:
+            self._engine.close()
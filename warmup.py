@@ -0,0 +1,44 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class WarmUp:
+    """Runs start-up work on a background thread while the app initializes.
+
+    Tasks run in the given order (put whatever the first turn needs first)
+    and never raise: a failed task is logged and the app simply pays that
+    cost later, on first use. wait() lets the caller block on a single task,
+    e.g. the greeting audio, without waiting for the rest.
+    """
+
+    def __init__(self, tasks: List[Tuple[str, Callable[[], Any]]]):
+        self.tasks = tasks
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._done = {name: threading.Event() for name, _ in tasks}
+        self._thread = threading.Thread(target=self._run, name="warm-up", daemon=True)
+
+    def start(self) -> "WarmUp":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        for name, task in self.tasks:
+            started = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                self.errors[name] = str(e)
+                logging.warning(f"Warm-up task '{name}' failed: {e}")
+            finally:
+                self.timings[name] = time.perf_counter() - started
+                self._done[name].set()
+        logging.debug(f"Warm-up finished: {self.timings}")
+
+    def wait(self, name: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until one task (or, with no name, all of them) has finished"""
+        if name is None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return self._done[name].wait(timeout)